@@ -0,0 +1,267 @@
+import string
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Sequence
+from kdf.cost_estimator import format_duration
+
+
+# Charsets incorporados de hashcat (?l, ?u, ...)
+BUILTIN_CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " !\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~",
+    "b": "".join(chr(i) for i in range(256)),
+}
+BUILTIN_CHARSETS["a"] = (BUILTIN_CHARSETS["l"] + BUILTIN_CHARSETS["u"]
+                         + BUILTIN_CHARSETS["d"] + BUILTIN_CHARSETS["s"])
+
+_CUSTOM_CHARSET_ARGS = {"-1": "1", "-2": "2", "-3": "3", "-4": "4",
+                        "--custom-charset1": "1", "--custom-charset2": "2",
+                        "--custom-charset3": "3", "--custom-charset4": "4"}
+
+
+def _option(args: Sequence[str], *names: str) -> Optional[str]:
+    for i, arg in enumerate(args):
+        if arg in names and i + 1 < len(args):
+            return args[i + 1]
+        for name in names:
+            if name.startswith("--") and arg.startswith(name + "="):
+                return arg[len(name) + 1:]
+    return None
+
+
+def _expand_charset(spec: str, custom: Dict[str, str]) -> str:
+    """Caracteres de una definición de charset ('?l?d_', ...)."""
+    chars = []
+    i = 0
+    while i < len(spec):
+        if spec[i] == "?" and i + 1 < len(spec):
+            key = spec[i + 1]
+            chars.append(BUILTIN_CHARSETS.get(key) or custom.get(key) or ("?" if key == "?" else ""))
+            i += 2
+        else:
+            chars.append(spec[i])
+            i += 1
+    return "".join(chars)
+
+
+def mask_positions(mask: str, extra_args: Sequence[str] = ()) -> List[int]:
+    """Tamaño del charset de cada posición de una máscara de hashcat."""
+    custom = {}
+    for arg_name, key in _CUSTOM_CHARSET_ARGS.items():
+        spec = _option(extra_args, arg_name)
+        if spec is not None:
+            custom[key] = _expand_charset(spec, custom)
+
+    sizes = []
+    i = 0
+    while i < len(mask):
+        if mask[i] == "?" and i + 1 < len(mask):
+            key = mask[i + 1]
+            if key == "?":
+                sizes.append(1)
+            elif key in BUILTIN_CHARSETS:
+                sizes.append(len(BUILTIN_CHARSETS[key]))
+            elif key in custom:
+                sizes.append(len(set(custom[key])))
+            else:
+                raise ValueError(f"Charset desconocido en la máscara: ?{key}")
+            i += 2
+        else:
+            sizes.append(1)
+            i += 1
+    return sizes
+
+
+def mask_keyspace(mask: str, extra_args: Sequence[str] = ()) -> int:
+    """Candidatos de una máscara; con --increment, la suma de cada largo."""
+    sizes = mask_positions(mask, extra_args)
+    if "--increment" in extra_args or "-i" in extra_args:
+        low = int(_option(extra_args, "--increment-min") or 1)
+        high = int(_option(extra_args, "--increment-max") or len(sizes))
+    else:
+        low = high = len(sizes)
+    total = 0
+    product = 1
+    for length, size in enumerate(sizes, 1):
+        product *= size
+        if low <= length <= high:
+            total += product
+    return total
+
+
+def count_lines(path: str, chunk_size: int = 1024 * 1024) -> int:
+    """Líneas de un wordlist (la última sin salto también cuenta), leyendo en bloques."""
+    count = 0
+    last = b""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            count += chunk.count(b"\n")
+            last = chunk
+    if last and not last.endswith(b"\n"):
+        count += 1
+    return count
+
+
+def count_rules(path: str) -> int:
+    """Reglas de un archivo de reglas de hashcat (sin vacías ni comentarios)."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return sum(1 for line in f if line.strip() and not line.lstrip().startswith("#"))
+
+
+@dataclass
+class AttackPhase:
+    """Una fase de ataque de hashcat (-a mode, objetivos) con su costo estimado."""
+    name: str
+    mode: str
+    targets: List[str]
+    extra_args: List[str] = field(default_factory=list)
+    keyspace: int = 0                        # Candidatos totales (con reglas/máscara)
+    estimated_seconds: Optional[float] = None
+    time_box: Optional[int] = None           # --runtime asignado; None = hasta terminar
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "targets": self.targets,
+            "extra_args": self.extra_args,
+            "keyspace": self.keyspace,
+            "estimated_seconds": self.estimated_seconds,
+            "time_box": self.time_box
+        }
+
+
+@dataclass
+class AttackPlan:
+    phases: List[AttackPhase]
+    speed: Optional[float]                   # H/s estimados para el KDF real del archivo
+    budget_seconds: Optional[float] = None
+
+    @property
+    def estimated_seconds(self) -> Optional[float]:
+        if any(p.estimated_seconds is None for p in self.phases):
+            return None
+        return sum(p.estimated_seconds for p in self.phases)
+
+    def lines(self) -> List[str]:
+        """El plan en texto, una línea por fase."""
+        fmt = format_duration
+        speed = f"{self.speed:.0f} H/s" if self.speed else "velocidad desconocida"
+        budget = f", presupuesto {fmt(self.budget_seconds)}" if self.budget_seconds else ""
+        out = [f"[PLAN] {len(self.phases)} fases, {speed}{budget}"]
+        for i, phase in enumerate(self.phases, 1):
+            estimate = fmt(phase.estimated_seconds) if phase.estimated_seconds is not None else "?"
+            box = f" (cortada a {fmt(phase.time_box)})" if phase.time_box else ""
+            out.append(f"    {i}. {phase.name}: {phase.keyspace} candidatos, ~{estimate}{box}")
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "speed": self.speed,
+            "budget_seconds": self.budget_seconds,
+            "estimated_seconds": self.estimated_seconds,
+            "phases": [p.to_dict() for p in self.phases]
+        }
+
+
+class AttackPlanner:
+    """
+    Responsabilidad:
+    Ordenar y acotar en tiempo las fases de un ataque según su costo esperado.
+
+    - Keyspace de cada fase: líneas del wordlist × reglas, máscara (con --increment)
+      o ambos en los modos híbridos 6/7.
+    - Duración: keyspace / velocidad, con la velocidad del benchmark (hecho con el
+      KDF por defecto de RAR5, 2^15) escalada al KDF Count real del archivo, más un
+      arranque fijo por fase (autotune, kernels).
+    - Orden: de la fase más barata a la más cara.
+    - Presupuesto: reparto equitativo ('water-filling'): cada fase recibe hasta su
+      parte del tiempo restante; lo que una fase barata no usa pasa a las demás, y
+      la que no entra se corta con --runtime (su checkpoint queda para después).
+    """
+
+    BENCHMARK_KDF_COUNT = 15
+    PHASE_OVERHEAD_SECONDS = 5.0
+
+    def __init__(self, speed: Optional[float] = None, kdf_count: int = BENCHMARK_KDF_COUNT,
+                 overhead_seconds: float = PHASE_OVERHEAD_SECONDS):
+        """
+        Args:
+            speed: H/s medidos con el KDF del benchmark (None: sin estimación de tiempo).
+            kdf_count: log2 de las iteraciones PBKDF2 del archivo (el del hash $rar5$).
+        """
+        self.benchmark_speed = speed
+        self.kdf_count = kdf_count
+        self.overhead_seconds = overhead_seconds
+
+    @staticmethod
+    def iterations(kdf_count: int) -> int:
+        # RAR5 deriva 2^kdf_count iteraciones y 32 más para el PswCheck
+        return (1 << kdf_count) + 32
+
+    @staticmethod
+    def kdf_count_from_hash(hash_string: str) -> int:
+        """log2 de las iteraciones de un string $rar5$<len>$<salt>$<kdf>$<iv>$<len>$<check>."""
+        parts = hash_string.strip().split("$")
+        if len(parts) != 8 or parts[:2] != ["", "rar5"] or not parts[4].isdigit():
+            raise ValueError(f"No es un hash $rar5$ válido: {hash_string.strip()[:40]!r}")
+        return int(parts[4])
+
+    @property
+    def speed(self) -> Optional[float]:
+        """H/s esperados con el KDF real del archivo."""
+        if not self.benchmark_speed:
+            return None
+        return self.benchmark_speed * self.iterations(self.BENCHMARK_KDF_COUNT) / self.iterations(self.kdf_count)
+
+    def keyspace(self, phase: AttackPhase) -> int:
+        rules = 1
+        for i, arg in enumerate(phase.extra_args):
+            if arg in ("-r", "--rules-file") and i + 1 < len(phase.extra_args):
+                rules *= count_rules(phase.extra_args[i + 1])
+        if phase.mode == "0":
+            return count_lines(phase.targets[0]) * rules
+        if phase.mode == "3":
+            return mask_keyspace(phase.targets[0], phase.extra_args)
+        if phase.mode == "6":
+            return count_lines(phase.targets[0]) * mask_keyspace(phase.targets[1], phase.extra_args)
+        if phase.mode == "7":
+            return mask_keyspace(phase.targets[0], phase.extra_args) * count_lines(phase.targets[1])
+        raise ValueError(f"Modo de ataque sin estimación de keyspace: -a {phase.mode}")
+
+    def plan(self, phases: List[AttackPhase], budget_seconds: Optional[float] = None) -> AttackPlan:
+        """Estima, ordena (más baratas primero) y, con presupuesto, acota cada fase."""
+        speed = self.speed
+        for phase in phases:
+            phase.keyspace = self.keyspace(phase)
+            phase.estimated_seconds = phase.keyspace / speed + self.overhead_seconds if speed else None
+            phase.time_box = None
+
+        # sorted es estable: sin velocidad se ordena por keyspace, igual que con ella
+        ordered = sorted(phases, key=lambda p: p.keyspace)
+
+        if budget_seconds:
+            remaining = float(budget_seconds)
+            for i, phase in enumerate(ordered):
+                share = remaining / (len(ordered) - i)
+                if phase.estimated_seconds is not None and phase.estimated_seconds <= share:
+                    remaining -= phase.estimated_seconds
+                else:
+                    phase.time_box = max(1, int(share))
+                    remaining -= share
+        return AttackPlan(ordered, speed, budget_seconds)
+
+    @staticmethod
+    def smart_phases(wordlist_path: str, max_digits: int = 4) -> List[AttackPhase]:
+        """
+        Fases de start_smart_attack: diccionario y diccionario + 1..max_digits dígitos
+        (números, años 1950-2099, fechas DDMM/MMDD), cada largo como fase propia.
+        """
+        phases = [AttackPhase("Diccionario directo", "0", [wordlist_path])]
+        for digits in range(1, max_digits + 1):
+            phases.append(AttackPhase(f"Diccionario + {digits} dígito{'s' if digits > 1 else ''}",
+                                      "6", [wordlist_path, "?d" * digits]))
+        return phases
@@ -0,0 +1,97 @@
+import logging
+import threading
+from typing import Iterable, Iterator, Union, Optional
+
+logger = logging.getLogger(__name__)
+
+Candidate = Union[str, bytes]
+
+
+class CandidateFeeder:
+    """
+    Responsabilidad:
+    Escribir en el stdin de hashcat (modo -a 0 sin wordlist) los candidatos de un
+    iterador de Python, sin pasar por un wordlist en disco.
+
+    - Los candidatos se acumulan y se escriben en lotes de ~batch_size bytes.
+    - La contrapresión es la del pipe: cuando hashcat no consume, write bloquea y el
+      iterador deja de avanzar (no se genera más de lo que cabe en el pipe + un lote).
+    - Cuenta exactamente lo entregado: 'written' son los candidatos ya escritos en el
+      pipe (los que hashcat probó, como mucho).
+    - Un candidato con salto de línea, o que empieza con '$HEX[', se envía como
+      $HEX[...] (hashcat lo decodifica también en stdin).
+    """
+
+    DEFAULT_BATCH_SIZE = 256 * 1024
+    ENCODING = "utf-8"
+
+    def __init__(self, candidates: Iterable[Candidate], batch_size: int = DEFAULT_BATCH_SIZE):
+        self.candidates = candidates
+        self.batch_size = batch_size
+        self.written = 0
+        self.bytes_written = 0
+        self.exhausted = False         # El iterador se agotó (hashcat recibió EOF)
+        self.error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def encode(cls, candidate: Candidate) -> bytes:
+        """Línea de stdin para un candidato (sin el salto)."""
+        if isinstance(candidate, str):
+            candidate = candidate.encode(cls.ENCODING, errors="surrogateescape")
+        if b"\n" in candidate or b"\r" in candidate or candidate.startswith(b"$HEX["):
+            return b"$HEX[" + candidate.hex().encode("ascii") + b"]"
+        return candidate
+
+    def start(self, pipe, run) -> threading.Thread:
+        """Escribe en 'pipe' desde un hilo propio hasta agotar, run.stop_flag o cierre de hashcat."""
+        self._thread = threading.Thread(target=self._feed, args=(pipe, run), daemon=True,
+                                        name="hashcat-stdin")
+        self._thread.start()
+        return self._thread
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _feed(self, pipe, run):
+        batch = []
+        batch_bytes = 0
+        pending = 0
+        iterator: Iterator[Candidate] = iter(self.candidates)
+        try:
+            for candidate in iterator:
+                line = self.encode(candidate)
+                batch.append(line)
+                batch_bytes += len(line) + 1
+                pending += 1
+                if batch_bytes >= self.batch_size:
+                    if run.stop_flag or not self._write(pipe, batch, pending):
+                        return
+                    batch, batch_bytes, pending = [], 0, 0
+            if batch and not run.stop_flag and not self._write(pipe, batch, pending):
+                return
+            self.exhausted = not run.stop_flag
+        except Exception as e:
+            # Un generador (o un candidato) que falla termina la entrada como si se hubiera agotado
+            logger.exception("El generador de candidatos falló tras %d candidatos", self.written)
+            self.error = e
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _write(self, pipe, batch, count) -> bool:
+        """Escribe un lote. False si hashcat ya cerró stdin."""
+        data = b"\n".join(batch) + b"\n"
+        try:
+            pipe.write(data)
+            pipe.flush()
+        except (BrokenPipeError, ValueError):
+            # hashcat terminó antes (la encontró, se detuvo o falló): no hay a quién escribir
+            logger.debug("hashcat cerró stdin tras %d candidatos", self.written)
+            return False
+        self.written += count
+        self.bytes_written += len(data)
+        return True
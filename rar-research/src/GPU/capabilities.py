@@ -0,0 +1,288 @@
+import os
+import re
+import json
+import time
+import shutil
+import socket
+import hashlib
+import logging
+import tempfile
+import subprocess
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Tuple, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HashcatDevice:
+    """Un dispositivo de cómputo según 'hashcat -I'."""
+    device_id: int
+    name: str
+    backend: str                    # 'CUDA', 'HIP', 'OpenCL', 'Metal'
+    device_type: str = "GPU"
+    alias_of: Optional[int] = None  # Mismo hardware ya expuesto por otro backend (hashcat lo omite)
+
+    def to_dict(self) -> dict:
+        return {"id": self.device_id, "name": self.name, "backend": self.backend,
+                "type": self.device_type, "alias_of": self.alias_of}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HashcatDevice":
+        return cls(data["id"], data["name"], data["backend"], data.get("type", "GPU"), data.get("alias_of"))
+
+
+@dataclass(frozen=True)
+class HashcatCapabilities:
+    """
+    Lo que una instalación de hashcat puede hacer en este host: versión, backends,
+    dispositivos y velocidad medida del modo 13000 para cada perfil de carga (-w).
+    """
+    binary: str
+    binary_sha256: str
+    host: str
+    version: str
+    backends: Tuple[str, ...]
+    devices: Tuple[HashcatDevice, ...]
+    speeds: Dict[int, Dict[int, int]] = field(default_factory=dict)  # -w -> {device_id: H/s}
+    probed_at: float = 0.0
+
+    # Un dispositivo más lento que esto (respecto del más rápido) solo alarga la cola del ataque
+    MIN_DEVICE_SHARE = 0.05
+
+    @property
+    def active_devices(self) -> Tuple[HashcatDevice, ...]:
+        return tuple(d for d in self.devices if d.alias_of is None)
+
+    def total_speed(self, workload: int, devices: Optional[Sequence[int]] = None) -> int:
+        """H/s sumando los dispositivos (todos, o solo los de 'devices')."""
+        return sum(speed for device_id, speed in self.speeds.get(workload, {}).items()
+                   if devices is None or device_id in devices)
+
+    def best_workload(self, default: int = 3) -> int:
+        """Perfil -w con mayor velocidad total medida (a igualdad, el menos agresivo)."""
+        if not self.speeds:
+            return default
+        return max(sorted(self.speeds), key=self.total_speed)
+
+    def preferred_devices(self) -> Optional[List[int]]:
+        """
+        IDs para -d con el mejor perfil: se descartan los dispositivos que aportan
+        menos de MIN_DEVICE_SHARE del más rápido. None si conviene usarlos todos.
+        """
+        speeds = self.speeds.get(self.best_workload(), {})
+        if not speeds:
+            return None
+        fastest = max(speeds.values())
+        chosen = sorted(d for d, speed in speeds.items() if speed >= fastest * self.MIN_DEVICE_SHARE)
+        return chosen if len(chosen) < len(speeds) else None
+
+    def to_dict(self) -> dict:
+        return {
+            "binary": self.binary,
+            "binary_sha256": self.binary_sha256,
+            "host": self.host,
+            "version": self.version,
+            "backends": list(self.backends),
+            "devices": [d.to_dict() for d in self.devices],
+            # JSON: claves como texto
+            "speeds": {str(w): {str(d): s for d, s in per_device.items()}
+                       for w, per_device in self.speeds.items()},
+            "probed_at": self.probed_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HashcatCapabilities":
+        return cls(
+            binary=data["binary"],
+            binary_sha256=data["binary_sha256"],
+            host=data["host"],
+            version=data["version"],
+            backends=tuple(data.get("backends", ())),
+            devices=tuple(HashcatDevice.from_dict(d) for d in data.get("devices", ())),
+            speeds={int(w): {int(d): int(s) for d, s in per_device.items()}
+                    for w, per_device in data.get("speeds", {}).items()},
+            probed_at=data.get("probed_at", 0.0)
+        )
+
+
+def binary_identity(hashcat_path: str) -> Optional[Tuple[str, str]]:
+    """(ruta real, sha256) del ejecutable de hashcat, o None si no existe."""
+    resolved = hashcat_path if os.path.isfile(hashcat_path) else shutil.which(hashcat_path)
+    if not resolved:
+        return None
+    resolved = os.path.realpath(resolved)
+    digest = hashlib.sha256()
+    try:
+        with open(resolved, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return resolved, digest.hexdigest()
+
+
+class HashcatProbe:
+    """
+    Responsabilidad:
+    Relevar una instalación de hashcat: --version, dispositivos y backends (-I) y
+    benchmark del modo 13000 (-b --machine-readable) para cada perfil de carga.
+    Es lento (un benchmark por perfil): el resultado se guarda en CapabilityCache.
+    """
+
+    MODE_RAR5 = "13000"
+    WORKLOADS = (1, 2, 3, 4)
+    DEFAULT_TIMEOUT = 600
+
+    BACKEND_HEADERS = {"CUDA Info:": "CUDA", "HIP Info:": "HIP", "OpenCL Info:": "OpenCL", "Metal Info:": "Metal"}
+    _DEVICE_RE = re.compile(r"^\s*(?:Backend )?Device ID #(\d+)(?:\s*\(Alias: #(\d+)\))?")
+    _FIELD_RE = re.compile(r"^\s*(Name|Type)\.*:\s*(.*)$")
+
+    def __init__(self, hashcat_path: str, workloads: Sequence[int] = WORKLOADS,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.hashcat_path = hashcat_path
+        self.workloads = tuple(workloads)
+        self.timeout = timeout
+
+    def _run(self, args: list) -> subprocess.CompletedProcess:
+        # En Windows hashcat necesita su directorio como cwd (kernels, OpenCL/)
+        cwd = os.path.dirname(self.hashcat_path) if os.path.isabs(self.hashcat_path) else None
+        return subprocess.run([self.hashcat_path] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              cwd=cwd, universal_newlines=True, timeout=self.timeout)
+
+    def version(self) -> str:
+        result = self._run(["--version"])
+        if result.returncode != 0:
+            raise RuntimeError(f"hashcat --version falló: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    @classmethod
+    def parse_backend_info(cls, text: str) -> Tuple[Tuple[str, ...], Tuple[HashcatDevice, ...]]:
+        """Backends y dispositivos de la salida de 'hashcat -I'."""
+        backends = []
+        devices = []
+        backend = None
+        current = None
+
+        def flush():
+            if current is not None:
+                device_id, alias, info = current
+                default_type = "GPU" if backend in ("CUDA", "HIP", "Metal") else "?"
+                devices.append(HashcatDevice(device_id, info.get("Name", ""), backend or "?",
+                                             info.get("Type", default_type),
+                                             alias if alias is not None and alias < device_id else None))
+
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped in cls.BACKEND_HEADERS:
+                flush()
+                current = None
+                backend = cls.BACKEND_HEADERS[stripped]
+                backends.append(backend)
+                continue
+            match = cls._DEVICE_RE.match(line)
+            if match:
+                flush()
+                alias = int(match.group(2)) if match.group(2) else None
+                current = (int(match.group(1)), alias, {})
+                continue
+            match = cls._FIELD_RE.match(line)
+            if match and current is not None and match.group(1) not in current[2]:
+                current[2][match.group(1)] = match.group(2).strip()
+        flush()
+        return tuple(backends), tuple(devices)
+
+    @classmethod
+    def parse_benchmark(cls, text: str, mode: str = MODE_RAR5) -> Dict[int, int]:
+        """
+        Velocidad por dispositivo de 'hashcat -b --machine-readable'
+        (líneas 'device:modo:core:mem:ms:H/s').
+        """
+        speeds = {}
+        for line in text.splitlines():
+            fields = line.strip().split(":")
+            if len(fields) < 3 or fields[1] != mode or not fields[0].isdigit():
+                continue
+            try:
+                speeds[int(fields[0])] = int(float(fields[-1]))
+            except ValueError:
+                continue
+        return speeds
+
+    def devices(self) -> Tuple[Tuple[str, ...], Tuple[HashcatDevice, ...]]:
+        return self.parse_backend_info(self._run(["-I"]).stdout)
+
+    def benchmark(self, workload: int = 3, devices: Optional[Sequence[int]] = None) -> Dict[int, int]:
+        """H/s del modo 13000 por dispositivo con el perfil 'workload'."""
+        args = ["-b", "-m", self.MODE_RAR5, "-w", str(workload), "--machine-readable", "--quiet"]
+        if devices:
+            args.extend(["-d", ",".join(str(d) for d in devices)])
+        return self.parse_benchmark(self._run(args).stdout)
+
+    def probe(self, identity: Optional[Tuple[str, str]] = None) -> HashcatCapabilities:
+        """Relevamiento completo. identity: (ruta, sha256) si ya se calculó."""
+        identity = identity or binary_identity(self.hashcat_path)
+        if identity is None:
+            raise FileNotFoundError(f"No se encontró hashcat en '{self.hashcat_path}'")
+        version = self.version()
+        backends, devices = self.devices()
+        speeds = {}
+        for workload in self.workloads:
+            measured = self.benchmark(workload)
+            logger.info("hashcat -w %d: %d H/s", workload, sum(measured.values()))
+            if measured:
+                speeds[workload] = measured
+        return HashcatCapabilities(identity[0], identity[1], socket.gethostname(), version,
+                                   backends, devices, speeds, time.time())
+
+
+class CapabilityCache:
+    """
+    Responsabilidad:
+    Guardar el relevamiento de hashcat por host y por binario (sha256 del ejecutable),
+    para que el motor arranque sin volver a lanzar hashcat. Un binario actualizado
+    o otro host tienen otra clave y se relevan de nuevo.
+    """
+
+    FORMAT_VERSION = 1
+    ENV_DIR = "RAR_RESEARCH_HASHCAT_DIR"
+    DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rar-research", "hashcat")
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.environ.get(self.ENV_DIR) or self.DEFAULT_DIR
+
+    def _entry_path(self, host: str, binary_sha256: str) -> str:
+        key = hashlib.sha256(f"{host}\0{binary_sha256}".encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, identity: Optional[Tuple[str, str]], host: Optional[str] = None) -> Optional[HashcatCapabilities]:
+        """Relevamiento guardado para el binario (ruta, sha256) en este host, o None."""
+        if identity is None:
+            return None
+        host = host or socket.gethostname()
+        try:
+            with open(self._entry_path(host, identity[1]), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get("version") != self.FORMAT_VERSION:
+                return None
+            capabilities = HashcatCapabilities.from_dict(entry["capabilities"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if capabilities.host != host or capabilities.binary_sha256 != identity[1]:
+            return None
+        return capabilities
+
+    def store(self, capabilities: HashcatCapabilities) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {"version": self.FORMAT_VERSION, "capabilities": capabilities.to_dict()}
+        # Escritura atómica, como IndexCache
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, indent=2)
+            os.replace(tmp_path, self._entry_path(capabilities.host, capabilities.binary_sha256))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
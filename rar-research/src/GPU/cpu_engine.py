@@ -4,14 +4,28 @@ import subprocess
 import concurrent.futures
 import time
 from typing import Optional, Callable
+from core.models import ArchiveModel
+from core.result_store import ResultStore
+from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
 
 class CPUEngine:
     """
-    Motor de fuerza bruta/diccionario basado en CPU utilizando UnRAR.
+    Motor de fuerza bruta/diccionario basado en CPU.
+    Si el ArchiveModel trae PswCheck, cada candidato se verifica en proceso con
+    PBKDF2 (sin lanzar procesos); si no, se valida con UnRAR.
     Es más lento que GPU pero sirve como fallback infalible y validación.
+    Con PswCheck, un hash ya resuelto en el ResultStore retorna sin probar candidatos.
     """
     
-    def __init__(self):
+    def __init__(self, use_results: bool = True, result_store: Optional[ResultStore] = None):
+        """
+        Args:
+            use_results: Si es False, no consulta ni actualiza el almacén de resultados.
+            result_store: Almacén a utilizar (por defecto, el del directorio de usuario).
+        """
+        self.result_store = None
+        if use_results:
+            self.result_store = result_store if result_store is not None else ResultStore()
         self.unrar_path = self._find_unrar()
         self.stop_flag = False
 
@@ -38,11 +52,23 @@ class CPUEngine:
 
     def start_dictionary_attack(self, rar_path: str, wordlist_path: str, 
                                callback: Optional[Callable] = None, 
-                               workers: int = 20) -> Optional[str]:
+                               workers: int = 20,
+                               model: Optional[ArchiveModel] = None) -> Optional[str]:
         """
         Ejecuta ataque de diccionario usando CPU y múltiples hilos.
+        model: análisis del archivo; habilita la verificación por PswCheck.
         """
-        if not self.unrar_path:
+        record = model.primary_record if model else None
+        use_psw_check = record is not None and record.psw_check is not None
+        rar_hash = record.hashcat_format() if use_psw_check else None
+
+        known = self.result_store.lookup(rar_hash) if self.result_store is not None else None
+        if known is not None:
+            if callback:
+                callback(f"[CPU] Hash ya resuelto ({known.engine}): se omite el ataque")
+            return known.password
+
+        if not use_psw_check and not self.unrar_path:
             if callback:
                 callback("[ERROR] No se encontró UnRAR/WinRAR. No se puede ejecutar ataque CPU.")
             return None
@@ -61,10 +87,22 @@ class CPUEngine:
         total = len(words)
         if callback:
             callback(f"[CPU] Iniciando ataque con {workers} hilos. Total palabras: {total}")
-            callback(f"[CPU] Usando binario: {self.unrar_path}")
+            if use_psw_check:
+                callback(f"[CPU] Verificación por PswCheck (KDF 2^{record.kdf_count})")
+            else:
+                callback(f"[CPU] Usando binario: {self.unrar_path}")
 
         found_password = None
+        start = time.perf_counter()
         
+        kdf = PBKDF2Adapter()
+
+        # Verificación en proceso (hashlib libera el GIL durante PBKDF2)
+        def check_password(password):
+            if self.stop_flag: return None
+            check = kdf.derive_psw_check(password.encode('utf-8'), record.salt, record.kdf_count)
+            return password if check == record.psw_check else None
+
         # Función para un solo intento
         def try_password(password):
             if self.stop_flag: return None
@@ -97,7 +135,8 @@ class CPUEngine:
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
             # Enviar todas las tareas
-            future_to_pwd = {executor.submit(try_password, pwd): pwd for pwd in words}
+            attempt = check_password if use_psw_check else try_password
+            future_to_pwd = {executor.submit(attempt, pwd): pwd for pwd in words}
             
             for future in concurrent.futures.as_completed(future_to_pwd):
                 if self.stop_flag:
@@ -116,6 +155,10 @@ class CPUEngine:
                     progress = (processed / total) * 100
                     callback(f"[CPU] Progreso: {processed}/{total} ({progress:.1f}%)")
 
+        if found_password and rar_hash and self.result_store is not None:
+            self.result_store.record(rar_hash, found_password, "cpu", archive=rar_path,
+                                     elapsed_seconds=time.perf_counter() - start, candidates=processed + 1)
+
         return found_password
 
     def stop(self):
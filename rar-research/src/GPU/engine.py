@@ -4,23 +4,89 @@ import sys
 import time
 import threading
 import json
-from typing import Optional, Callable
+import signal
+import struct
+import hashlib
+import shutil
+import tempfile
+import uuid
+from typing import Optional, Callable, List, Tuple, Iterable, Union, Dict
+from core.result_store import ResultStore
+from .hashcat_status import HashcatStatus, ThrottledStatusCallback
+from .candidate_pipe import CandidateFeeder
+from .capabilities import HashcatCapabilities, HashcatProbe, CapabilityCache, binary_identity
+from .attack_planner import AttackPlanner, AttackPlan
+from kdf.hardware_profiles import HardwareProfile, HardwareProfileStore
 
 class HashcatEngine:
     """
     Controlador para ejecutar Hashcat como subproceso.
     Soporta ataque de fuerza bruta (Mascara) y Diccionario para RAR5 (Modo 13000).
+    Antes de lanzar hashcat consulta el ResultStore: un hash ya resuelto retorna
+    su contraseña sin ningún ataque, y cada contraseña encontrada se registra ahí.
+
+    El progreso se lee del estado JSON de hashcat (--status-json, ver hashcat_status)
+    y la contraseña, del outfile del propio ataque: no se interpretan textos de la
+    interfaz ni se lanza un segundo proceso con --show.
+
+    Cada ataque es una sesión de hashcat con nombre propio (hash + modo + objetivos +
+    porción del keyspace) y su propio directorio de trabajo en session_dir (hash,
+    outfile y .restore). Si el mismo trabajo se vuelve a pedir y su checkpoint existe,
+    se reanuda con --restore en lugar de empezar de cero; hashcat borra el checkpoint
+    al agotar el keyspace o encontrar la clave, y entonces se borra el directorio.
+
+    Los métodos start_* ejecutan de a un ataque por motor (self.process); para varios
+    trabajos en cola o en paralelo por dispositivo, ver job_queue.HashcatJobQueue.
+
+    El perfil de carga (-w) y los dispositivos (-d) salen del relevamiento de la
+    instalación (capabilities.HashcatProbe), guardado por host y binario: con un
+    relevamiento en caché el motor arranca sin lanzar hashcat.
     """
     
     MODE_RAR5 = "13000"
+    # Outfile: hash y contraseña en hex (1 = hash, 3 = hex_plain); sobrevive a cualquier byte
+    OUTFILE_FORMAT = "1,3"
+    DEFAULT_STATUS_INTERVAL = 2
+    DEFAULT_WORKLOAD = 3
+
+    ENV_SESSION_DIR = "RAR_RESEARCH_SESSIONS"
+    DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rar-research", "sessions")
+    # Cabecera de restore_data_t (restore.h): version, cwd[256], dicts_pos, masks_pos, words_cur
+    _RESTORE_HEADER = struct.Struct("<i256sII4xQ")
     
-    def __init__(self, hashcat_path: str = None):
+    def __init__(self, hashcat_path: str = None, use_results: bool = True,
+                 result_store: Optional[ResultStore] = None,
+                 status_interval: float = DEFAULT_STATUS_INTERVAL,
+                 session_dir: Optional[str] = None, use_sessions: bool = True,
+                 capability_cache: Optional[CapabilityCache] = None, auto_probe: bool = False,
+                 workload: Optional[int] = None, devices: Optional[List[int]] = None):
         """
         Args:
             hashcat_path: Ruta al ejecutable de hashcat.
                           Si es None, busca en la instalación local del proyecto (src/GPU/bin).
                           Si no lo encuentra, asume 'hashcat' en el PATH.
+            use_results: Si es False, no consulta ni actualiza el almacén de resultados.
+            result_store: Almacén a utilizar (por defecto, el del directorio de usuario).
+            status_interval: Segundos entre estados de hashcat (--status-timer) y mínimo
+                             entre entregas al status_callback.
+            session_dir: Directorio de hash, outfile y checkpoint de cada sesión
+                         (por defecto RAR_RESEARCH_SESSIONS o ~/.cache/rar-research/sessions).
+            use_sessions: Si es False, hashcat no deja checkpoint (--restore-disable) y
+                          un trabajo interrumpido vuelve a empezar de cero.
+            capability_cache: Caché de relevamientos (por defecto, el del directorio de usuario).
+            auto_probe: Si no hay relevamiento en caché, relevar ahora (lento: benchmarks)
+                        en lugar de solo comprobar --version.
+            workload/devices: Fijan -w y -d en lugar de tomarlos del relevamiento.
         """
+        self.status_interval = status_interval
+        self.last_status: Optional[HashcatStatus] = None
+        self.session_dir = session_dir or os.environ.get(self.ENV_SESSION_DIR) or self.DEFAULT_SESSION_DIR
+        self.use_sessions = use_sessions
+        self.last_session: Optional[str] = None
+        self.last_feeder: Optional[CandidateFeeder] = None
+        self.result_store = None
+        if use_results:
+            self.result_store = result_store if result_store is not None else ResultStore()
         if hashcat_path is None:
             # Buscar en binarios locales
             from .installer import HASHCAT_EXE
@@ -34,7 +100,38 @@ class HashcatEngine:
         print(f"[DEBUG] Engine hashcat_path: {self.hashcat_path}")
         self.process = None
         self.stop_flag = False
-        self._validate_executable()
+        # Sesiones con un hashcat en curso (dos procesos no pueden compartir checkpoint)
+        self._active_sessions = set()
+        self._sessions_lock = threading.Lock()
+
+        self._fixed_workload = workload
+        self._fixed_devices = devices
+        self.capability_cache = capability_cache if capability_cache is not None else CapabilityCache()
+        self._identity = binary_identity(self.hashcat_path)
+        self.capabilities: Optional[HashcatCapabilities] = self.capability_cache.load(self._identity)
+        if self.capabilities is None:
+            if auto_probe and self._identity is not None:
+                self.probe()
+            else:
+                self._validate_executable()
+        self._apply_capabilities()
+
+    def _apply_capabilities(self):
+        """Elige -w y -d: los fijados por el llamador, o los mejores del relevamiento."""
+        caps = self.capabilities
+        self.workload = self._fixed_workload or (caps.best_workload(self.DEFAULT_WORKLOAD) if caps
+                                                 else self.DEFAULT_WORKLOAD)
+        self.devices = self._fixed_devices if self._fixed_devices is not None else \
+            (caps.preferred_devices() if caps else None)
+
+    def probe(self, workloads=HashcatProbe.WORKLOADS) -> HashcatCapabilities:
+        """Releva la instalación (versión, dispositivos, benchmark por perfil) y la guarda en caché."""
+        print(f"[GPU] Relevando hashcat ({len(workloads)} benchmarks del modo {self.MODE_RAR5})...")
+        self._identity = binary_identity(self.hashcat_path)
+        self.capabilities = HashcatProbe(self.hashcat_path, workloads).probe(self._identity)
+        self.capability_cache.store(self.capabilities)
+        self._apply_capabilities()
+        return self.capabilities
 
     def _validate_executable(self):
         # Intentar ejecutar --version para ver si funciona
@@ -51,138 +148,379 @@ class HashcatEngine:
             print(f"[WARN] No se encontró hashcat en '{self.hashcat_path}'.")
             print("       Ejecuta 'python src/cli/main.py setup_gpu' para instalarlo automáticamente.")
 
-    def run_benchmark(self):
-        """Ejecuta el benchmark de Hashcat para RAR5"""
-        cmd = [self.hashcat_path, "-b", "-m", self.MODE_RAR5]
-        print(f"[GPU] Ejecutando benchmark: {' '.join(cmd)}")
-        subprocess.run(cmd)
+    def run_benchmark(self, workload: Optional[int] = None,
+                      profile_store: Optional[HardwareProfileStore] = None,
+                      profile_name: str = "hashcat") -> Dict[int, int]:
+        """
+        Ejecuta el benchmark de Hashcat para RAR5 con el perfil de carga elegido.
+        Retorna H/s por dispositivo (vacío si hashcat no pudo medir).
+        Con profile_store, guarda la medición como perfil de hardware 'profile_name'.
+        """
+        workload = workload or self.workload
+        print(f"[GPU] Ejecutando benchmark: -m {self.MODE_RAR5} -w {workload}")
+        speeds = HashcatProbe(self.hashcat_path).benchmark(workload, self.devices)
+        for device_id, speed in sorted(speeds.items()):
+            print(f"    - Dispositivo #{device_id}: {speed} H/s")
+        if profile_store is not None and speeds:
+            profile = HardwareProfile.from_hashcat_benchmark(speeds, self.capabilities, profile_name)
+            profile_store.save(profile)
+            print(f"[OK] Perfil '{profile.name}' guardado en {profile_store.path}")
+        return speeds
+
+    def measured_speed(self) -> Optional[float]:
+        """
+        H/s del modo 13000 con el KDF del benchmark para el perfil y dispositivos
+        elegidos (del relevamiento), o None si la instalación no se relevó.
+        """
+        if self.capabilities is None:
+            return None
+        return self.capabilities.total_speed(self.workload, self.devices) or None
+
+    def plan_smart_attack(self, hash_string: str, wordlist_path: str,
+                          budget_seconds: Optional[float] = None) -> AttackPlan:
+        """Plan de start_smart_attack: fases ordenadas por costo y acotadas al presupuesto."""
+        planner = AttackPlanner(self.measured_speed(), AttackPlanner.kdf_count_from_hash(hash_string))
+        return planner.plan(AttackPlanner.smart_phases(wordlist_path), budget_seconds)
 
     def start_smart_attack(self, hash_string: str, wordlist_path: str,
-                          callback: Optional[Callable] = None) -> Optional[str]:
+                          callback: Optional[Callable] = None,
+                          status_callback: Optional[Callable[[HashcatStatus], None]] = None,
+                          budget_seconds: Optional[float] = None) -> Optional[str]:
         """
         Estrategia inteligente:
         1. Diccionario simple (rápido)
-        2. Híbrido: Diccionario + Sufijos numéricos (1-4 dígitos)
+        2. Híbrido: Diccionario + Sufijos numéricos (1, 2, 3 y 4 dígitos, una fase cada uno)
            Cubre: números simples, años (1950-2099), fechas (DDMM/MMDD)
+
+        Las fases corren de la más barata a la más cara según AttackPlanner (keyspace,
+        velocidad medida y KDF Count del hash). Con budget_seconds, las que no entran
+        se cortan con --runtime y su checkpoint queda para reanudarlas después.
+        El plan se muestra (callback o stdout) antes de empezar.
         """
-        # Paso 1: Diccionario directo
-        if callback: callback("[GPU] Fase 1: Ataque de Diccionario Directo...")
-        res = self.start_dictionary_attack(hash_string, wordlist_path, callback)
-        if res: return res
+        known = self.result_store.lookup(hash_string) if self.result_store is not None else None
+        if known is not None:
+            if callback:
+                callback(f"[GPU] Hash ya resuelto ({known.engine}): se omite el ataque")
+            return known.password
 
-        # Paso 2: Híbrido (Wordlist + Mask)
-        # Modo 6: Wordlist + Mask
-        # Mask: ?d?d?d?d con --increment (1 a 4 dígitos)
-        if callback: callback("[GPU] Fase 2: Ataque Híbrido (Fechas/Años/Números)...")
-        
-        extra_args = ["--increment", "--increment-min", "1", "--increment-max", "4"]
-        # En modo 6: hashcat [options] hashfile wordlist mask
-        return self._run_attack(hash_string, mode="6", targets=[wordlist_path, "?d?d?d?d"], 
-                              callback=callback, extra_args=extra_args)
+        plan = self.plan_smart_attack(hash_string, wordlist_path, budget_seconds)
+        for line in plan.lines():
+            (callback or print)(line)
+
+        for i, phase in enumerate(plan.phases, 1):
+            if self.stop_flag:
+                break
+            if callback: callback(f"[GPU] Fase {i}: {phase.name}...")
+            res = self._run_attack(hash_string, mode=phase.mode, targets=phase.targets, callback=callback,
+                                   extra_args=phase.extra_args, status_callback=status_callback,
+                                   max_runtime=phase.time_box)
+            if res: return res
+        return None
 
     def start_bruteforce(self, hash_string: str, mask: str = "?a?a?a?a", 
                         callback: Optional[Callable] = None,
-                        extra_args: list = None) -> Optional[str]:
+                        extra_args: list = None,
+                        status_callback: Optional[Callable[[HashcatStatus], None]] = None,
+                        skip: Optional[int] = None, limit: Optional[int] = None,
+                        max_runtime: Optional[int] = None) -> Optional[str]:
         """
         Inicia un ataque de máscara (Fuerza Bruta).
+        skip/limit: porción del keyspace a recorrer (ver keyspace y plan_slices).
+        max_runtime: corta a los N segundos dejando checkpoint; volver a llamar reanuda.
         """
-        return self._run_attack(hash_string, mode="3", targets=[mask], callback=callback, extra_args=extra_args)
+        return self._run_attack(hash_string, mode="3", targets=[mask], callback=callback,
+                                extra_args=extra_args, status_callback=status_callback,
+                                skip=skip, limit=limit, max_runtime=max_runtime)
 
     def start_dictionary_attack(self, hash_string: str, wordlist_path: str,
                                callback: Optional[Callable] = None,
-                               extra_args: list = None) -> Optional[str]:
+                               extra_args: list = None,
+                               status_callback: Optional[Callable[[HashcatStatus], None]] = None,
+                               skip: Optional[int] = None, limit: Optional[int] = None,
+                               max_runtime: Optional[int] = None) -> Optional[str]:
         """
         Inicia un ataque de diccionario.
+        skip/limit y max_runtime: como en start_bruteforce (el keyspace son las palabras).
+        """
+        return self._run_attack(hash_string, mode="0", targets=[wordlist_path], callback=callback,
+                                extra_args=extra_args, status_callback=status_callback,
+                                skip=skip, limit=limit, max_runtime=max_runtime)
+
+    def start_pipe_attack(self, hash_string: str, candidates: Union[CandidateFeeder, Iterable],
+                          callback: Optional[Callable] = None,
+                          extra_args: list = None,
+                          status_callback: Optional[Callable[[HashcatStatus], None]] = None) -> Optional[str]:
+        """
+        Ataque de diccionario con candidatos generados en Python: se escriben en el
+        stdin de hashcat a medida que se consumen, sin wordlist en disco.
+        candidates: iterador de str/bytes, o un CandidateFeeder (para leer su progreso).
+        extra_args: p. ej. reglas (-r), que hashcat aplica también a stdin.
+        Sin checkpoint: un flujo no se puede rebobinar para reanudarlo.
         """
-        return self._run_attack(hash_string, mode="0", targets=[wordlist_path], callback=callback, extra_args=extra_args)
+        feeder = candidates if isinstance(candidates, CandidateFeeder) else CandidateFeeder(candidates)
+        self.last_feeder = feeder
+        return self._run_attack(hash_string, mode="0", targets=[], callback=callback,
+                                extra_args=extra_args, status_callback=status_callback, feeder=feeder)
+
+    # --- Sesiones y keyspace ---
+
+    def session_name(self, hash_string: str, mode: str, targets: list, extra_args: list = None,
+                     skip: Optional[int] = None, limit: Optional[int] = None) -> str:
+        """
+        Nombre de sesión estable para un trabajo: el mismo hash con la misma fase
+        (modo, objetivos, argumentos y porción del keyspace) da siempre el mismo nombre.
+        max_runtime no participa: un trabajo cortado por tiempo se reanuda igual.
+        """
+        archive = hashlib.sha1(ResultStore.normalize(hash_string).encode()).hexdigest()[:12]
+        phase = json.dumps([mode, list(targets), list(extra_args or ()), skip, limit])
+        return f"rar5_{archive}_a{mode}_{hashlib.sha1(phase.encode()).hexdigest()[:10]}"
+
+    def session_workdir(self, session: str) -> str:
+        """Directorio de trabajo de una sesión (hash, outfile y checkpoint)."""
+        return os.path.join(os.path.abspath(self.session_dir), session)
+
+    @staticmethod
+    def _job_files(workdir: str) -> Tuple[str, str, str]:
+        """(hash_file, out_file, restore_file) dentro de un directorio de trabajo."""
+        return (os.path.join(workdir, "target.hash"), os.path.join(workdir, "target.out"),
+                os.path.join(workdir, "target.restore"))
+
+    def _session_paths(self, session: str) -> Tuple[str, str, str]:
+        return self._job_files(self.session_workdir(session))
+
+    def has_checkpoint(self, session: str) -> bool:
+        return os.path.exists(self._session_paths(session)[2])
+
+    def checkpoint_position(self, session: str) -> Optional[int]:
+        """
+        Posición guardada en el checkpoint (words_cur: candidatos base ya recorridos),
+        o None si la sesión no tiene checkpoint legible.
+        """
+        try:
+            with open(self._session_paths(session)[2], "rb") as f:
+                data = f.read(self._RESTORE_HEADER.size)
+        except OSError:
+            return None
+        if len(data) < self._RESTORE_HEADER.size:
+            return None
+        return self._RESTORE_HEADER.unpack(data)[4]
+
+    def discard_session(self, session: str):
+        """Borra el directorio de la sesión (checkpoint incluido): el próximo intento empieza de cero."""
+        shutil.rmtree(self.session_workdir(session), ignore_errors=True)
+
+    def keyspace(self, mode: str, targets: list, extra_args: list = None) -> Optional[int]:
+        """
+        Keyspace base de una fase según hashcat (--keyspace), en las unidades de
+        --skip/--limit: palabras del diccionario o candidatos de la parte base de la
+        máscara (no incluye la amplificación de reglas o de la máscara interna).
+        None si hashcat no lo pudo calcular.
+        """
+        cmd = [self.hashcat_path, "-m", self.MODE_RAR5, "-a", mode, "--keyspace"]
+        cmd.extend(extra_args or [])
+        cmd.extend(targets)
+        cwd = os.path.dirname(self.hashcat_path) if os.path.isabs(self.hashcat_path) else None
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    cwd=cwd, universal_newlines=True)
+        except OSError:
+            return None
+        for line in reversed(result.stdout.splitlines()):
+            if line.strip().isdigit():
+                return int(line.strip())
+        return None
+
+    def plan_slices(self, keyspace: int, seconds: float, speed: Optional[float] = None,
+                    amplifier: int = 1) -> List[Tuple[int, int]]:
+        """
+        Divide un keyspace base en porciones (skip, limit) de unos 'seconds' segundos.
+
+        Args:
+            speed: Hashes por segundo (por defecto, el último estado medido).
+            amplifier: Candidatos por cada unidad del keyspace base (reglas o máscara
+                       interna); con un estado previo de la misma fase es
+                       progress_total // keyspace.
+        """
+        if speed is None:
+            speed = self.last_status.speed if self.last_status else 0
+        if speed <= 0:
+            raise ValueError("Se necesita una velocidad medida para dividir el keyspace")
+        chunk = max(1, int(speed * seconds) // max(1, amplifier))
+        return [(skip, min(chunk, keyspace - skip)) for skip in range(0, keyspace, chunk)]
 
     def _run_attack(self, hash_string: str, mode: str, targets: list,
                    callback: Optional[Callable] = None,
-                   extra_args: list = None) -> Optional[str]:
+                   extra_args: list = None,
+                   status_callback: Optional[Callable[[HashcatStatus], None]] = None,
+                   skip: Optional[int] = None, limit: Optional[int] = None,
+                   max_runtime: Optional[int] = None, devices: Optional[list] = None,
+                   run=None, feeder: Optional[CandidateFeeder] = None) -> Optional[str]:
         """
         Método interno para ejecutar hashcat con diferentes modos (-a).
         targets: lista de argumentos posicionales (wordlist, mask, etc.)
+        callback: recibe las líneas de texto de hashcat (las que no son estado).
+        status_callback: recibe HashcatStatus, como máximo uno cada status_interval
+                         segundos (los estados finales siempre).
+        skip/limit: porción del keyspace base (--skip/--limit); cada porción es su propia sesión.
+        max_runtime: segundos máximos de esta corrida (--runtime).
+        devices: IDs de dispositivo de hashcat (-d; por defecto self.devices); un trabajo
+                 reanudado conserva los del checkpoint.
+        run: dueño del proceso y del estado (process, stop_flag, last_status, last_session):
+             el propio motor, o un HashcatJob cuando lo ejecuta la cola.
+        feeder: candidatos para el stdin de hashcat (targets vacío); sin checkpoint.
         """
-        # Crear archivo temporal para el hash
-        hash_file = os.path.abspath("target.hash")
-        # Asegurar encoding y newline
-        with open(hash_file, "w", encoding="utf-8", newline="\n") as f:
-            f.write(hash_string.strip() + "\n")
-            
-        # Construir comando principal
-        cmd = [
-            self.hashcat_path,
-            "-m", self.MODE_RAR5,
-            "-a", mode,
-            "-w", "3", 
-            "--status", "--status-timer", "2"
-        ]
-        
-        if extra_args:
-            cmd.extend(extra_args)
-            
-        cmd.append(hash_file)
-        cmd.extend(targets)
-        
+        run = self if run is None else run
+        known = self.result_store.lookup(hash_string) if self.result_store is not None else None
+        if known is not None:
+            if callback:
+                callback(f"[GPU] Hash ya resuelto ({known.engine}): se omite el ataque")
+            return known.password
+        if (skip is not None or limit is not None) and extra_args and "--increment" in extra_args:
+            # hashcat rechaza --skip/--limit junto con --increment
+            raise ValueError("skip/limit no se pueden combinar con --increment")
+        start = time.perf_counter()
+
+        os.makedirs(self.session_dir, exist_ok=True)
+        session = self.session_name(hash_string, mode, targets, extra_args, skip, limit)
+        if feeder is not None:
+            # Dos flujos distintos para el mismo hash no son el mismo trabajo
+            session += "_" + uuid.uuid4().hex[:8]
+        with self._sessions_lock:
+            if session in self._active_sessions:
+                raise RuntimeError(f"La sesión {session} ya tiene un hashcat en curso")
+            self._active_sessions.add(session)
+        run.last_session = session
+        try:
+            return self._run_session(hash_string, mode, targets, callback, extra_args, status_callback,
+                                     skip, limit, max_runtime, devices, run, session, start, feeder)
+        finally:
+            with self._sessions_lock:
+                self._active_sessions.discard(session)
+
+    def _run_session(self, hash_string, mode, targets, callback, extra_args, status_callback,
+                     skip, limit, max_runtime, devices, run, session, start, feeder=None) -> Optional[str]:
+        # Sin sesiones (o leyendo de stdin) no hay nada que reanudar: basta un directorio temporal
+        resumable = self.use_sessions and feeder is None
+        if resumable:
+            workdir = self.session_workdir(session)
+            os.makedirs(workdir, exist_ok=True)
+        else:
+            workdir = tempfile.mkdtemp(prefix=session + "-", dir=self.session_dir)
+        hash_file, out_file, restore_file = self._job_files(workdir)
+
         found_password = None
-        
-        # Ejecutar ataque
-        success = self._run_process(cmd, callback)
-        
-        if success:
-            # Si terminó exitosamente (o dice Cracked), intentamos recuperar la contraseña con --show
-            found_password = self._retrieve_password(hash_file)
-        
-        # Limpieza
-        # if os.path.exists(hash_file):
-        #    os.remove(hash_file)
-            
-        return found_password
-
-    def _retrieve_password(self, hash_file):
-        """Ejecuta hashcat --show para obtener la contraseña limpia"""
-        cmd = [
-            self.hashcat_path,
-            "-m", self.MODE_RAR5,
-            "--show",
-            hash_file
-        ]
-        
         try:
-            cwd = os.path.dirname(self.hashcat_path) if os.path.isabs(self.hashcat_path) else None
-            result = subprocess.run(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                cwd=cwd,
-                universal_newlines=True
-            )
-            
-            output = result.stdout.strip()
-            # Formato esperado: $rar5$....:password
-            if output:
-                # Separar por el último ':'
-                # Cuidado: la contraseña puede contener ':'
-                # Hashcat output para RAR5 es: hash:password
-                # El hash empieza con $rar5$ y NO contiene ':' (es hex y $)
-                
-                # Separar por el PRIMER ':' para soportar contraseñas con ':'
-                parts = output.split(':', 1)
-                if len(parts) == 2:
-                    return parts[1]
-            return None
-            
-        except Exception as e:
-            print(f"[ERROR] Falló la recuperación de contraseña: {e}")
+            restored = False
+            if resumable and os.path.exists(restore_file):
+                # Interrumpido justo después de encontrarla: el outfile ya la tiene
+                found_password = self._read_outfile(out_file, hash_string)
+                if found_password is None:
+                    if callback:
+                        position = self.checkpoint_position(session)
+                        callback(f"[GPU] Reanudando sesión {session} desde {position if position is not None else '?'}")
+                    # hashcat toma del checkpoint los argumentos originales (hash, outfile, --runtime...)
+                    cmd = [self.hashcat_path, "--session", session, "--restore", "--restore-file-path", restore_file]
+                    restored = self._run_process(cmd, callback, status_callback, run) or run.last_status is not None
+                    if not restored and callback:
+                        callback(f"[GPU] Checkpoint de {session} inválido: se empieza de cero")
+
+            if found_password is None and not restored and not run.stop_flag:
+                # Asegurar encoding y newline
+                with open(hash_file, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(hash_string.strip() + "\n")
+                # Un outfile de una corrida anterior no debe confundirse con este resultado
+                for stale in (out_file, restore_file):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+
+                # Construir comando principal
+                # Sin potfile: un hash ya presente en él no llegaría al outfile. Lo ya resuelto
+                # lo responde el ResultStore (que importa potfiles de hashcat).
+                cmd = [
+                    self.hashcat_path,
+                    "-m", self.MODE_RAR5,
+                    "-a", mode,
+                    "-w", str(self.workload),
+                    "--status", "--status-json", "--status-timer", str(max(1, int(self.status_interval))),
+                    "--outfile", out_file, "--outfile-format", self.OUTFILE_FORMAT,
+                    "--potfile-disable"
+                ]
+                if resumable:
+                    cmd.extend(["--session", session, "--restore-file-path", restore_file])
+                else:
+                    # Nombre único igual: dos hashcat con la misma sesión no arrancan a la vez
+                    cmd.extend(["--session", os.path.basename(workdir), "--restore-disable"])
+                devices = devices or self.devices
+                if devices:
+                    cmd.extend(["-d", ",".join(str(d) for d in devices)])
+                if skip is not None:
+                    cmd.extend(["--skip", str(skip)])
+                if limit is not None:
+                    cmd.extend(["--limit", str(limit)])
+                if max_runtime:
+                    cmd.extend(["--runtime", str(int(max_runtime))])
+
+                if extra_args:
+                    cmd.extend(extra_args)
+
+                cmd.append(hash_file)
+                cmd.extend(targets)
+
+                # Ejecutar ataque; la contraseña se lee del outfile aunque el código de salida
+                # no sea 0 (p. ej. stop() justo después de encontrarla)
+                self._run_process(cmd, callback, status_callback, run, feeder)
+
+            if found_password is None:
+                found_password = self._read_outfile(out_file, hash_string)
+
+            if found_password and self.result_store is not None:
+                candidates = run.last_status.progress_done if run.last_status else None
+                if candidates is None and feeder is not None:
+                    candidates = feeder.written
+                self.result_store.record(hash_string, found_password, "hashcat",
+                                         elapsed_seconds=time.perf_counter() - start, candidates=candidates)
+
+            return found_password
+        finally:
+            # Limpieza: sin checkpoint (o con la clave ya encontrada) la sesión terminó
+            if not resumable or found_password or not os.path.exists(restore_file):
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    @staticmethod
+    def _read_outfile(out_file: str, hash_string: str) -> Optional[str]:
+        """Contraseña de 'hash_string' en el outfile (líneas hash:hex_plain), o None."""
+        target = hash_string.strip().lower()
+        try:
+            with open(out_file, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
             return None
 
-    def _run_process(self, cmd, callback):
+        for line in lines:
+            # El hash $rar5$ no contiene ':' y el hex tampoco: el último separa ambos
+            rar_hash, _, hex_plain = line.rpartition(":")
+            if rar_hash.strip().lower() != target:
+                continue
+            try:
+                return bytes.fromhex(hex_plain).decode("utf-8", errors="surrogateescape")
+            except ValueError:
+                continue
+        return None
+
+    def _run_process(self, cmd, callback, status_callback=None, run=None, feeder=None):
+        """
+        Ejecuta hashcat hasta que termine o run.stop_flag. Retorna True si terminó bien.
+        Con feeder, los candidatos se escriben en su stdin desde otro hilo.
+        """
+        run = self if run is None else run
         print(f"[GPU] Iniciando motor...")
         
         cwd = os.path.dirname(self.hashcat_path) if os.path.isabs(self.hashcat_path) else None
         
-        self.process = subprocess.Popen(
+        run.last_status = None
+        run.process = subprocess.Popen(
             cmd,
+            stdin=subprocess.PIPE if feeder is not None else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             cwd=cwd,
@@ -190,42 +528,67 @@ class HashcatEngine:
             bufsize=1
         )
         
-        success = False
+        throttled = ThrottledStatusCallback(status_callback, self.status_interval) if status_callback else None
+        if feeder is not None:
+            feeder.start(run.process.stdin.buffer, run)
         
-        while True:
-            if self.stop_flag:
-                self.process.terminate()
-                break
-                
-            output = self.process.stdout.readline()
-            
-            if output == '' and self.process.poll() is not None:
-                break
-                
-            if output:
-                clean_line = output.strip()
-                
-                # Detectar éxito (Hashcat en inglés o español si estuviera localizado)
-                if "Status...........: Cracked" in clean_line:
-                    success = True
-                    # Podemos detener el bucle, Hashcat terminará pronto
-                
-                if callback:
-                    callback(clean_line)
+        try:
+            while True:
+                if run.stop_flag:
+                    self._interrupt(run.process)
+                    break
+
+                output = run.process.stdout.readline()
+
+                if output == '' and run.process.poll() is not None:
+                    break
+
+                if output:
+                    clean_line = output.strip()
+
+                    status = HashcatStatus.parse_line(clean_line)
+                    if status is not None:
+                        run.last_status = status
+                        if throttled:
+                            throttled(status)
+                        continue
+
+                    if callback:
+                        callback(clean_line)
+        except BaseException:
+            # Un callback que falla (o Ctrl-C) no deja a hashcat ocupando el dispositivo
+            self._interrupt(run.process)
+            run.process.wait()
+            raise
                     
-        rc = self.process.poll()
+        rc = run.process.wait()
+        if feeder is not None:
+            # Terminado hashcat, el hilo sale por BrokenPipe si seguía bloqueado en write
+            feeder.join()
         # Hashcat retorna 0 si cracked all, 1 si exhausted
-        if rc == 0:
-            success = True
+        success = rc == 0 or (run.last_status is not None and run.last_status.is_cracked)
             
         if not success:
-            stderr_out = self.process.stderr.read()
+            stderr_out = run.process.stderr.read()
             if stderr_out:
                 print(f"\n[GPU LOG] {stderr_out}")
             
         return success
 
+    @staticmethod
+    def _interrupt(process):
+        """
+        Detiene hashcat como Ctrl-C (SIGINT): termina ordenadamente y deja el
+        checkpoint al día. En Windows no hay SIGINT para un proceso hijo.
+        """
+        if process is None or process.poll() is not None:
+            return
+        if os.name == "nt":
+            process.terminate()
+        else:
+            process.send_signal(signal.SIGINT)
+
     def stop(self):
         self.stop_flag = True
         if self.process:
-            self.process.terminate()
+            self._interrupt(self.process)
@@ -0,0 +1,189 @@
+"""
+Estado de hashcat en formato máquina (--status-json).
+
+Con --status --status-json, hashcat escribe en stdout una línea JSON por cada
+intervalo de --status-timer. Este módulo la convierte en objetos tipados, sin
+depender de los textos de la interfaz (que cambian entre versiones y traducciones).
+"""
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple, Callable
+
+
+class HashcatStatusCode:
+    """Códigos del campo 'status' (status_rc_t de hashcat)."""
+    INIT = 0
+    AUTOTUNE = 1
+    SELFTEST = 2
+    RUNNING = 3
+    PAUSED = 4
+    EXHAUSTED = 5
+    CRACKED = 6
+    ABORTED = 7
+    QUIT = 8
+    BYPASS = 9
+    ABORTED_CHECKPOINT = 10
+    ABORTED_RUNTIME = 11
+    RUNNING_CHECKPOINT_QUIT = 12
+    ERROR = 13
+    ABORTED_FINISH = 14
+    RUNNING_QUIT_AFTER_ATTACK = 15
+    AUTODETECT = 16
+
+    NAMES = {
+        0: "Initializing", 1: "Autotuning", 2: "Selftest", 3: "Running", 4: "Paused",
+        5: "Exhausted", 6: "Cracked", 7: "Aborted", 8: "Quit", 9: "Bypass",
+        10: "Aborted (Checkpoint)", 11: "Aborted (Runtime)", 12: "Running (Checkpoint Quit requested)",
+        13: "Error", 14: "Aborted (Finish)", 15: "Running (Quit after attack requested)", 16: "Autodetect",
+    }
+
+    # Estados con los que el proceso termina
+    FINAL = frozenset({EXHAUSTED, CRACKED, ABORTED, QUIT, BYPASS, ABORTED_CHECKPOINT,
+                       ABORTED_RUNTIME, ERROR, ABORTED_FINISH})
+
+
+@dataclass(frozen=True)
+class DeviceStatus:
+    """Un dispositivo de cómputo en una línea de estado."""
+    device_id: int
+    name: str
+    device_type: str
+    speed: int                        # Hashes por segundo
+    temperature: Optional[int] = None  # °C (-1 o ausente si el driver no lo informa)
+    utilization: Optional[int] = None  # %
+
+    @classmethod
+    def from_json(cls, data: dict) -> "DeviceStatus":
+        temperature = data.get("temp")
+        return cls(
+            device_id=int(data.get("device_id", 0)),
+            name=data.get("device_name", ""),
+            device_type=data.get("device_type", ""),
+            speed=int(data.get("speed", 0)),
+            temperature=temperature if temperature is not None and temperature >= 0 else None,
+            utilization=data.get("util")
+        )
+
+
+@dataclass(frozen=True)
+class HashcatStatus:
+    """
+    Una línea de --status-json ya decodificada.
+    'progress' cuenta candidatos (por salt); 'recovered' cuenta hashes.
+    """
+    status: int
+    session: str
+    progress_done: int
+    progress_total: int
+    recovered: int
+    total_hashes: int
+    rejected: int
+    restore_point: int
+    devices: Tuple[DeviceStatus, ...]
+    time_start: Optional[int] = None
+    estimated_stop: Optional[int] = None
+    received_at: float = 0.0          # time.time() al leer la línea
+
+    @classmethod
+    def from_json(cls, data: dict, received_at: Optional[float] = None) -> "HashcatStatus":
+        progress = data.get("progress") or [0, 0]
+        recovered = data.get("recovered_hashes") or [0, 0]
+        return cls(
+            status=int(data.get("status", HashcatStatusCode.INIT)),
+            session=data.get("session", ""),
+            progress_done=int(progress[0]),
+            progress_total=int(progress[1]),
+            recovered=int(recovered[0]),
+            total_hashes=int(recovered[1]),
+            rejected=int(data.get("rejected", 0)),
+            restore_point=int(data.get("restore_point", 0)),
+            devices=tuple(DeviceStatus.from_json(d) for d in data.get("devices", ())),
+            time_start=data.get("time_start"),
+            estimated_stop=data.get("estimated_stop"),
+            received_at=time.time() if received_at is None else received_at
+        )
+
+    @classmethod
+    def parse_line(cls, line: str) -> Optional["HashcatStatus"]:
+        """HashcatStatus de una línea de stdout, o None si no es una línea de estado JSON."""
+        line = line.strip()
+        if not line.startswith("{"):
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or "status" not in data:
+            return None
+        return cls.from_json(data)
+
+    @property
+    def status_name(self) -> str:
+        return HashcatStatusCode.NAMES.get(self.status, f"Status {self.status}")
+
+    @property
+    def speed(self) -> int:
+        """Hashes por segundo sumando todos los dispositivos."""
+        return sum(device.speed for device in self.devices)
+
+    @property
+    def progress_percent(self) -> float:
+        return 100.0 * self.progress_done / self.progress_total if self.progress_total else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Segundos hasta el fin estimado por hashcat (None si no lo informa)."""
+        if not self.estimated_stop:
+            return None
+        return max(0.0, self.estimated_stop - self.received_at)
+
+    @property
+    def is_cracked(self) -> bool:
+        return self.status == HashcatStatusCode.CRACKED or \
+            (self.total_hashes > 0 and self.recovered >= self.total_hashes)
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in HashcatStatusCode.FINAL
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status_name,
+            "progress": [self.progress_done, self.progress_total],
+            "progress_percent": round(self.progress_percent, 2),
+            "recovered": [self.recovered, self.total_hashes],
+            "speed": self.speed,
+            "eta_seconds": self.eta_seconds,
+            "devices": [{"id": d.device_id, "name": d.name, "speed": d.speed,
+                         "temperature": d.temperature, "utilization": d.utilization}
+                        for d in self.devices]
+        }
+
+
+class ThrottledStatusCallback:
+    """
+    Entrega estados a 'callback' como máximo una vez cada 'interval' segundos.
+    Los estados finales (y el primero con hashes recuperados) se entregan siempre.
+    """
+
+    def __init__(self, callback: Callable[[HashcatStatus], None], interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+        self._last: Optional[float] = None
+        self._recovered = 0
+        self.delivered = 0
+
+    def __call__(self, status: HashcatStatus) -> bool:
+        """Retorna True si el estado se entregó."""
+        now = self.clock()
+        urgent = status.is_final or status.recovered > self._recovered
+        self._recovered = max(self._recovered, status.recovered)
+        if not urgent and self._last is not None and now - self._last < self.interval:
+            return False
+        self._last = now
+        self.delivered += 1
+        self.callback(status)
+        return True
@@ -0,0 +1,279 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+from typing import Optional, Callable, List, Sequence, Iterable, Union
+from .engine import HashcatEngine
+from .candidate_pipe import CandidateFeeder
+from .hashcat_status import HashcatStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobState:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"              # Terminó: result tiene la contraseña o es None (agotado)
+    FAILED = "failed"          # Excepción al ejecutar (ver error)
+    CANCELLED = "cancelled"
+
+    FINAL = frozenset({DONE, FAILED, CANCELLED})
+
+
+class HashcatJob:
+    """
+    Un ataque en la cola: qué ejecutar (los mismos argumentos que _run_attack) y su
+    estado. Es también el dueño del proceso de hashcat mientras corre (process,
+    stop_flag, last_status, last_session), así que cada trabajo se cancela y se
+    consulta sin tocar a los demás.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, hash_string: str, mode: str, targets: list, extra_args: list = None,
+                 skip: Optional[int] = None, limit: Optional[int] = None,
+                 max_runtime: Optional[int] = None, priority: int = 0,
+                 callback: Optional[Callable] = None,
+                 status_callback: Optional[Callable[[HashcatStatus], None]] = None,
+                 feeder: Optional[CandidateFeeder] = None):
+        self.id = next(self._ids)
+        self.hash_string = hash_string
+        self.mode = mode
+        self.targets = list(targets)
+        self.extra_args = list(extra_args) if extra_args else None
+        self.skip = skip
+        self.limit = limit
+        self.max_runtime = max_runtime
+        self.priority = priority
+        self.callback = callback
+        self.status_callback = status_callback
+        self.feeder = feeder           # Candidatos por stdin (start_pipe_attack)
+
+        self.state = JobState.QUEUED
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.devices: Optional[List[int]] = None   # Asignados por la cola al arrancar
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        # Estado de ejecución que escribe HashcatEngine._run_attack
+        self.process = None
+        self.stop_flag = False
+        self.last_status: Optional[HashcatStatus] = None
+        self.last_session: Optional[str] = None
+
+        self._queue: Optional["HashcatJobQueue"] = None
+        self._finished = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.state in JobState.FINAL
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que el trabajo termine. Retorna False si venció el timeout."""
+        return self._finished.wait(timeout)
+
+    def cancel(self) -> bool:
+        """Cancela el trabajo (ver HashcatJobQueue.cancel)."""
+        return self._queue.cancel(self) if self._queue is not None else False
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "priority": self.priority,
+            "session": self.last_session,
+            "devices": self.devices,
+            "mode": self.mode,
+            "targets": self.targets,
+            "piped": self.feeder.written if self.feeder is not None else None,
+            "found": self.result is not None,
+            "error": str(self.error) if self.error else None,
+            "status": self.last_status.to_dict() if self.last_status else None,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class HashcatJobQueue:
+    """
+    Responsabilidad:
+    Ejecutar varios ataques de hashcat con un mismo HashcatEngine, en orden de
+    prioridad, en uno o más grupos de dispositivos a la vez.
+
+    - Cada grupo de dispositivos ('slot', p. ej. [[1], [2]] para dos GPUs) tiene un
+      hilo que toma el siguiente trabajo apenas termina el anterior; con un solo slot
+      (devices=None: todos los dispositivos) la cola es secuencial.
+    - Cada trabajo tiene su sesión, directorio de trabajo, hash y outfile (los de
+      HashcatEngine), así que dos trabajos nunca comparten archivos.
+    - Un trabajo igual a otro en cola o en curso (misma sesión) no se duplica: submit
+      retorna el existente.
+    - Cancelar un trabajo en curso interrumpe su hashcat como Ctrl-C: el checkpoint
+      queda y volver a encolarlo lo reanuda.
+    """
+
+    def __init__(self, engine: HashcatEngine, devices: Optional[Sequence[Sequence[int]]] = None):
+        """
+        Args:
+            engine: Motor con la configuración de hashcat, sesiones y resultados.
+            devices: Grupos de IDs de dispositivo de hashcat (-d), uno por trabajo
+                     simultáneo. None: un solo trabajo a la vez con todos.
+        """
+        self.engine = engine
+        self.slots = [list(slot) for slot in devices] if devices else [None]
+        self._heap = []
+        self._order = itertools.count()
+        self._jobs: List[HashcatJob] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._worker, args=(slot,), daemon=True,
+                                          name=f"hashcat-slot-{i}")
+                         for i, slot in enumerate(self.slots)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(cancel_pending=exc_type is not None)
+
+    def submit(self, hash_string: str, mode: str, targets: list, extra_args: list = None,
+               skip: Optional[int] = None, limit: Optional[int] = None,
+               max_runtime: Optional[int] = None, priority: int = 0,
+               callback: Optional[Callable] = None,
+               status_callback: Optional[Callable[[HashcatStatus], None]] = None) -> HashcatJob:
+        """
+        Encola un ataque (mode/targets como en hashcat -a). Mayor prioridad sale antes;
+        a igual prioridad, en orden de llegada.
+        """
+        if (skip is not None or limit is not None) and extra_args and "--increment" in extra_args:
+            raise ValueError("skip/limit no se pueden combinar con --increment")
+        job = HashcatJob(hash_string, mode, targets, extra_args, skip, limit, max_runtime,
+                         priority, callback, status_callback)
+        job.last_session = self.engine.session_name(hash_string, mode, targets, extra_args, skip, limit)
+        return self._enqueue(job, deduplicate=True)
+
+    def submit_pipe(self, hash_string: str, candidates: Union[CandidateFeeder, Iterable],
+                    extra_args: list = None, priority: int = 0,
+                    callback: Optional[Callable] = None,
+                    status_callback: Optional[Callable[[HashcatStatus], None]] = None) -> HashcatJob:
+        """Encola un ataque con candidatos generados en Python (ver HashcatEngine.start_pipe_attack)."""
+        feeder = candidates if isinstance(candidates, CandidateFeeder) else CandidateFeeder(candidates)
+        job = HashcatJob(hash_string, "0", [], extra_args, priority=priority, callback=callback,
+                         status_callback=status_callback, feeder=feeder)
+        # Cada flujo es un trabajo distinto: no se deduplica
+        return self._enqueue(job, deduplicate=False)
+
+    def _enqueue(self, job: HashcatJob, deduplicate: bool) -> HashcatJob:
+        job._queue = self
+        priority = job.priority
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("La cola ya está cerrada")
+            if deduplicate:
+                for other in self._jobs:
+                    if not other.done and other.feeder is None and other.last_session == job.last_session:
+                        return other
+            self._jobs.append(job)
+            heapq.heappush(self._heap, (-priority, next(self._order), job))
+            self._cond.notify()
+        logger.debug("Trabajo %d encolado (%s, prioridad %d)", job.id, job.last_session, priority)
+        return job
+
+    def submit_bruteforce(self, hash_string: str, mask: str = "?a?a?a?a", **kwargs) -> HashcatJob:
+        return self.submit(hash_string, "3", [mask], **kwargs)
+
+    def submit_dictionary(self, hash_string: str, wordlist_path: str, **kwargs) -> HashcatJob:
+        return self.submit(hash_string, "0", [wordlist_path], **kwargs)
+
+    def cancel(self, job: HashcatJob) -> bool:
+        """
+        Cancela un trabajo en cola (no llega a correr) o en curso (se interrumpe su
+        hashcat). Retorna False si ya había terminado.
+        """
+        with self._cond:
+            if job.done:
+                return False
+            job.stop_flag = True
+            if job.state == JobState.QUEUED:
+                self._finish(job, JobState.CANCELLED)
+                return True
+        HashcatEngine._interrupt(job.process)
+        return True
+
+    def jobs(self) -> List[HashcatJob]:
+        with self._cond:
+            return list(self._jobs)
+
+    def status(self) -> List[dict]:
+        return [job.to_dict() for job in self.jobs()]
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que terminen todos los trabajos encolados hasta ahora."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in self.jobs():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        Cierra la cola. Los trabajos pendientes se ejecutan igual, salvo con
+        cancel_pending (que además interrumpe los que están en curso).
+        """
+        with self._cond:
+            self._closed = True
+            pending = [job for job in self._jobs if not job.done] if cancel_pending else []
+            self._cond.notify_all()
+        for job in pending:
+            self.cancel(job)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _finish(self, job: HashcatJob, state: str):
+        # Con self._cond tomado
+        job.state = state
+        job.finished_at = time.time()
+        job._finished.set()
+        self._cond.notify_all()
+
+    def _next_job(self) -> Optional[HashcatJob]:
+        with self._cond:
+            while True:
+                while self._heap:
+                    job = heapq.heappop(self._heap)[2]
+                    if job.state == JobState.QUEUED:  # Los cancelados en cola se descartan
+                        job.state = JobState.RUNNING
+                        job.started_at = time.time()
+                        return job
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _worker(self, slot: Optional[List[int]]):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job.devices = slot
+            state = JobState.DONE
+            try:
+                job.result = self.engine._run_attack(
+                    job.hash_string, job.mode, job.targets, callback=job.callback,
+                    extra_args=job.extra_args, status_callback=job.status_callback,
+                    skip=job.skip, limit=job.limit, max_runtime=job.max_runtime,
+                    devices=slot, run=job, feeder=job.feeder)
+                if job.stop_flag and job.result is None:
+                    state = JobState.CANCELLED
+            except Exception as e:
+                logger.exception("Trabajo %d falló", job.id)
+                job.error = e
+                state = JobState.FAILED
+            with self._cond:
+                self._finish(job, state)
@@ -65,6 +65,29 @@ class AES256RARAdapter(CipherAdapter):
         else:
             raise ImportError("No se encontró librería criptográfica (cryptography o tiny_aes).")
 
+    def encrypt_block(self, plaintext: bytes, key: bytes, iv: bytes) -> bytes:
+        """
+        Cifra con AES-256-CBC sin padding (el llamador completa a múltiplos de 16,
+        como hace RAR5 con ceros). Se usa para generar archivos de prueba.
+        """
+        if len(plaintext) % self.BLOCK_SIZE != 0:
+            raise ValueError(f"El texto plano debe ser múltiplo de {self.BLOCK_SIZE} bytes.")
+        if len(key) != 32:
+            raise ValueError("AES-256 requiere una clave de 32 bytes.")
+        if len(iv) != 16:
+            raise ValueError("AES requiere un IV de 16 bytes.")
+
+        if _HAS_CRYPTOGRAPHY:
+            cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+            encryptor = cipher.encryptor()
+            return encryptor.update(plaintext) + encryptor.finalize()
+
+        elif _HAS_TINY_AES:
+            return AES256Cipher(key).encrypt_cbc(plaintext, iv)
+
+        else:
+            raise ImportError("No se encontró librería criptográfica (cryptography o tiny_aes).")
+
     # Mantenemos decrypt_block como alias para compatibilidad interna temporal si es necesario
     def decrypt_block(self, ciphertext: bytes, key: bytes, iv: bytes) -> bytes:
         return self.decrypt_sample(key, iv=iv, ciphertext=ciphertext)
@@ -64,12 +64,28 @@ def expand_key(master_key):
     for i in range(8, 60):
         temp = key_columns[i-1]
         if i % 8 == 0:
-            temp = sub_word(rot_word(temp)) ^ r_con[i // 8]
+            temp = sub_word(rot_word(temp)) ^ (r_con[i // 8] << 24)
         elif i % 8 == 4:
             temp = sub_word(temp)
         key_columns[i] = key_columns[i-8] ^ temp
     return key_columns
 
+def sub_bytes(state):
+    for r in range(4):
+        for c in range(4):
+            state[r][c] = s_box[state[r][c]]
+
+def shift_rows(state):
+    # Row 1 shift left 1
+    state[1][0], state[1][1], state[1][2], state[1][3] = \
+        state[1][1], state[1][2], state[1][3], state[1][0]
+    # Row 2 shift left 2
+    state[2][0], state[2][1], state[2][2], state[2][3] = \
+        state[2][2], state[2][3], state[2][0], state[2][1]
+    # Row 3 shift left 3
+    state[3][0], state[3][1], state[3][2], state[3][3] = \
+        state[3][3], state[3][0], state[3][1], state[3][2]
+
 def inv_sub_bytes(state):
     for r in range(4):
         for c in range(4):
@@ -110,6 +126,18 @@ def inv_mix_columns(state):
         state[2][c] = gmul(s0, 0x0d) ^ gmul(s1, 0x09) ^ gmul(s2, 0x0e) ^ gmul(s3, 0x0b)
         state[3][c] = gmul(s0, 0x0b) ^ gmul(s1, 0x0d) ^ gmul(s2, 0x09) ^ gmul(s3, 0x0e)
 
+def mix_columns(state):
+    for c in range(4):
+        s0 = state[0][c]
+        s1 = state[1][c]
+        s2 = state[2][c]
+        s3 = state[3][c]
+
+        state[0][c] = gmul(s0, 0x02) ^ gmul(s1, 0x03) ^ s2 ^ s3
+        state[1][c] = s0 ^ gmul(s1, 0x02) ^ gmul(s2, 0x03) ^ s3
+        state[2][c] = s0 ^ s1 ^ gmul(s2, 0x02) ^ gmul(s3, 0x03)
+        state[3][c] = gmul(s0, 0x03) ^ s1 ^ s2 ^ gmul(s3, 0x02)
+
 def add_round_key(state, key_schedule, round):
     for c in range(4):
         k = key_schedule[round * 4 + c]
@@ -118,6 +146,30 @@ def add_round_key(state, key_schedule, round):
         state[2][c] ^= (k >> 8) & 0xFF
         state[3][c] ^= k & 0xFF
 
+def aes_encrypt_block(plaintext, key_schedule):
+    state = [[0]*4 for _ in range(4)]
+    for r in range(4):
+        for c in range(4):
+            state[r][c] = plaintext[r + 4*c]
+
+    add_round_key(state, key_schedule, 0)
+
+    for round in range(1, 14):
+        sub_bytes(state)
+        shift_rows(state)
+        mix_columns(state)
+        add_round_key(state, key_schedule, round)
+
+    sub_bytes(state)
+    shift_rows(state)
+    add_round_key(state, key_schedule, 14)
+
+    output = bytearray(16)
+    for r in range(4):
+        for c in range(4):
+            output[r + 4*c] = state[r][c]
+    return bytes(output)
+
 def aes_decrypt_block(ciphertext, key_schedule):
     state = [[0]*4 for _ in range(4)]
     for r in range(4):
@@ -170,3 +222,19 @@ class AES256Cipher:
             prev_block = block
             
         return bytes(plaintext)
+
+    def encrypt_cbc(self, data, iv):
+        if len(iv) != 16:
+            raise ValueError("IV must be 16 bytes")
+        if len(data) % 16 != 0:
+            raise ValueError("Data must be a multiple of 16 bytes")
+
+        ciphertext = bytearray()
+        prev_block = iv
+
+        for i in range(0, len(data), 16):
+            block = bytes(data[i + j] ^ prev_block[j] for j in range(16))
+            prev_block = aes_encrypt_block(block, self.key_schedule)
+            ciphertext.extend(prev_block)
+
+        return bytes(ciphertext)
@@ -2,31 +2,45 @@ import argparse
 import sys
 import os
 import json
+import logging
 
 # Ajuste de path para importaciones
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 
-from core.rar_parser import RarParser
-from core.metadata import Metadata
-from core.crypto_profile import CryptoProfile
+from core.archive_analyzer import ArchiveAnalyzer
+from core.batch_analyzer import BatchAnalyzer, BatchOptions
+from core.block_reader import skip_stream
 from reporting.exporter import Exporter
 from orchestrator.execution_manager import ExecutionManager
 from openRAR.rar_opener import RarOpener
 
 def main():
-    print(f"DEBUG ARGV: {sys.argv}")
     parser = argparse.ArgumentParser(description="Rarmpage Research CLI")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el detalle de cada bloque parseado")
     subparsers = parser.add_subparsers(dest="command", help="Comandos disponibles")
 
     # Comando: analyze
-    analyze_parser = subparsers.add_parser("analyze", help="Analiza la estructura de un archivo RAR")
-    analyze_parser.add_argument("file", help="Ruta al archivo RAR")
+    analyze_parser = subparsers.add_parser("analyze", help="Analiza la estructura de uno o varios archivos RAR")
+    analyze_parser.add_argument("file", nargs="+", help="Archivo RAR, directorio o glob (varios: modo lote, una línea JSON por archivo); '-' lee el archivo de stdin")
     analyze_parser.add_argument("--format", choices=["json", "csv"], default="json", help="Formato de salida")
+    analyze_parser.add_argument("--mmap", action="store_true", help="Recorre los headers sobre el archivo mapeado en memoria (sin copias)")
+    analyze_parser.add_argument("--no-cache", action="store_true", help="Ignora el índice de parseo en caché")
+    analyze_parser.add_argument("--readahead", type=int, default=64, help="Buffer máximo de lectura de headers en KiB (default: 64)")
+    analyze_parser.add_argument("--records", action="store_true", help="Recorre todo el archivo y lista los registros del Extra Area de cada entrada")
+    analyze_parser.add_argument("--all-hashes", action="store_true", help="Recorre todo el archivo y lista un hash por cada clave distinta (salt, KDF, PswCheck)")
+    analyze_parser.add_argument("--verify-crc", action="store_true", help="Verifica el CRC32 de cada header")
+    analyze_parser.add_argument("--recover", action="store_true", help="Sigue después de bloques dañados desde el próximo header con CRC válido")
+    analyze_parser.add_argument("--drain", action="store_true", help="Con '-': tras emitir el resultado, consume el resto de stdin (el productor del pipe no recibe SIGPIPE)")
+    analyze_parser.add_argument("--ndjson", action="store_true", help="Fuerza el modo lote (NDJSON) aunque sea un solo archivo")
+    analyze_parser.add_argument("--workers", type=int, default=None, help="Procesos del modo lote (default: CPUs)")
+    analyze_parser.add_argument("--max-in-flight", type=int, default=None, help="Archivos en proceso a la vez en modo lote (default: 2 por proceso)")
 
     # Comando: test_framework
     test_parser = subparsers.add_parser("test_framework", help="Prueba el pipeline completo con un archivo")
     test_parser.add_argument("file", help="Ruta al archivo RAR")
     test_parser.add_argument("--password", default="test", help="Contraseña para probar (default: test)")
+    test_parser.add_argument("--no-cache", action="store_true", help="Ignora el índice de parseo en caché")
+    test_parser.add_argument("--no-results", action="store_true", help="No consulta ni actualiza el almacén de resultados")
 
     # Comando: open_rar (Nueva Capa)
     open_parser = subparsers.add_parser("open_rar", help="Intenta abrir un RAR usando librerías estándar (rarfile)")
@@ -51,48 +65,122 @@ def main():
     gpu_parser.add_argument("-r", "--rules", default=None, help="Archivo de reglas para Hashcat (ej: best64.rule)")
     gpu_parser.add_argument("--smart", action="store_true", help="Activar modo inteligente: combina diccionario con números, fechas y años (1950+)")
     gpu_parser.add_argument("--auto-extract", action="store_true", help="Extraer automáticamente si se encuentra la contraseña (sin preguntar)")
+    gpu_parser.add_argument("--no-cache", action="store_true", help="Ignora el índice de parseo en caché")
+    gpu_parser.add_argument("--no-results", action="store_true", help="No consulta ni actualiza el almacén de resultados")
+    gpu_parser.add_argument("--budget", type=int, default=None, help="Con --smart: segundos totales; las fases caras se acotan para que entren todas")
+    gpu_parser.add_argument("--max-runtime", type=int, default=None, help="Corta cada fase a los N segundos dejando checkpoint; repetir el comando reanuda")
+    gpu_parser.add_argument("--no-restore", action="store_true", help="No usa sesiones de hashcat: un ataque interrumpido empieza de cero")
+
+    # Comando: results
+    results_parser = subparsers.add_parser("results", help="Almacén local de contraseñas recuperadas (potfiles de hashcat)")
+    results_parser.add_argument("file", nargs="*", help="Archivos RAR a consultar")
+    results_parser.add_argument("--import-potfile", default=None, help="Importa las líneas $rar5$ de un potfile de hashcat")
+    results_parser.add_argument("--export-potfile", default=None, help="Exporta el almacén como potfile de hashcat")
+    results_parser.add_argument("--db", default=None, help="Base de resultados (default: ~/.cache/rar-research/results.sqlite)")
 
     # Comando: setup_gpu
     subparsers.add_parser("setup_gpu", help="Descarga e instala Hashcat automáticamente en el proyecto")
 
+    # Comando: gpu_probe
+    probe_parser = subparsers.add_parser("gpu_probe", help="Releva hashcat (versión, dispositivos, velocidad por perfil -w) y lo guarda en caché")
+    probe_parser.add_argument("--hashcat-bin", default=None, help="Ruta al ejecutable de hashcat (Opcional)")
+    probe_parser.add_argument("--force", action="store_true", help="Vuelve a relevar aunque haya un relevamiento en caché")
+    probe_parser.add_argument("--workloads", default="1,2,3,4", help="Perfiles -w a medir (default: 1,2,3,4)")
+
+    # Comando: benchmark
+    hw_bench_parser = subparsers.add_parser("benchmark", help="Mide la velocidad del KDF de RAR5 en esta máquina y la guarda como perfil de hardware")
+    hw_bench_parser.add_argument("--cpu", action="store_true", help="Mide la CPU (PBKDF2 con hashlib)")
+    hw_bench_parser.add_argument("--gpu", action="store_true", help="Mide hashcat (modo 13000)")
+    hw_bench_parser.add_argument("--hashcat-bin", default=None, help="Ruta al ejecutable de hashcat (Opcional)")
+    hw_bench_parser.add_argument("--duration", type=float, default=2, help="Segundos por prueba de CPU (default: 2)")
+    hw_bench_parser.add_argument("--no-save", action="store_true", help="Solo mide: no actualiza los perfiles")
+    hw_bench_parser.add_argument("--profiles", default=None, help="Archivo de perfiles (default: ~/.cache/rar-research/hardware_profiles.json)")
+    hw_bench_parser.add_argument("--list", action="store_true", help="Muestra los perfiles guardados sin medir")
+
+    # Comando: parser_benchmark
+    bench_parser = subparsers.add_parser("parser_benchmark", help="Mide el throughput de los parsers sobre archivos generados")
+    bench_parser.add_argument("--scale", type=float, default=1.0, help="Multiplica el tamaño de los fixtures (default: 1.0)")
+    bench_parser.add_argument("--repeats", type=int, default=3, help="Corridas por medición; se toma la mejor (default: 3)")
+    bench_parser.add_argument("--output", default=None, help="Guarda el resultado en este JSON")
+    bench_parser.add_argument("--baseline", default=None, help="JSON de referencia: falla si hay regresiones")
+    bench_parser.add_argument("--tolerance", type=float, default=0.5, help="Empeoramiento admitido frente al baseline (default: 0.5 = 50%%)")
+    bench_parser.add_argument("--update-baseline", action="store_true", help="Reemplaza el baseline con este resultado")
+
     args = parser.parse_args()
 
-    if args.command == "analyze":
-        if not os.path.exists(args.file):
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="[%(levelname)s] %(message)s")
+    logging.debug("argv: %s", sys.argv)
+
+    stream = None
+    if args.command == "analyze" and args.file == ["-"]:
+        # Flujo no posicionable: se recorre en una sola pasada, sin copia a disco
+        stream = sys.stdin.buffer
+
+    if args.command == "analyze" and stream is None \
+            and (args.ndjson or len(args.file) > 1 or not os.path.isfile(args.file[0])):
+        # Modo lote: una línea JSON por archivo a medida que terminan; el resumen va a stderr
+        options = BatchOptions(use_mmap=args.mmap, use_cache=not args.no_cache,
+                               readahead=args.readahead * 1024, verify_crc=args.verify_crc,
+                               recover=args.recover)
+        batch = BatchAnalyzer(workers=args.workers, max_in_flight=args.max_in_flight, options=options)
+        for result in batch.run(args.file):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+
+        summary = batch.summary
+        print(f"[Resumen] {summary.files} archivos ({summary.failed} con error, "
+              f"{summary.encrypted} cifrados) en {summary.elapsed_seconds:.2f}s "
+              f"| {summary.files_per_second:.1f} archivos/s", file=sys.stderr)
+
+    elif args.command == "analyze":
+        args.file = args.file[0] if stream is None else "<stdin>"
+        if stream is None and not os.path.exists(args.file):
             print(f"Error: Archivo no encontrado: {args.file}")
             return
 
-        print(f"Analizando: {args.file}")
+        print(f"Analizando: {args.file}", file=sys.stderr if stream is not None else sys.stdout)
         
-        # 1. Parsear
-        rar_parser = RarParser(args.file)
+        # 1. Analizar hasta el primer registro de encriptación
         try:
-            rar_parser.parse()
+            analyzer = ArchiveAnalyzer(args.file, use_mmap=args.mmap, use_cache=not args.no_cache,
+                                       readahead=args.readahead * 1024, extra_records=args.records,
+                                       verify_crc=args.verify_crc, recover=args.recover, stream=stream)
+            model = analyzer.analyze(first_crypto_only=not (args.records or args.all_hashes))
         except Exception as e:
             print(f"Error durante el parsing: {e}")
             return
 
         # 2. Generar Perfil
-        profile = CryptoProfile()
-        if rar_parser.is_rar5():
-            # Simulamos datos detectados
-            profile.cipher_algo = "AES-256" # Default RAR5
-            profile.kdf_algo = "PBKDF2-HMAC-SHA256"
-            
-            # Intentar obtener iteraciones reales si el parser las sacó
-            ctx = rar_parser.get_crypto_context()
-            if ctx and 'iterations' in ctx.params:
-                 # Actualizar perfil si tenemos datos reales
-                 pass
+        profile = model.crypto_profile()
 
         # 3. Exportar
         normalized_data = profile.normalize()
-        exporter = Exporter(normalized_data)
+        if model.errors:
+            normalized_data["malformed_blocks"] = [e.to_dict() for e in model.errors]
+        if args.records:
+            table = model.table
+            normalized_data["entries"] = [
+                {"name": table.name(i), "records": [r.to_dict() for r in table.extra_records(i)]}
+                for i in range(len(table))
+            ]
+        if args.all_hashes:
+            normalized_data["crypto_groups"] = [
+                {"salt_hex": g.record.salt.hex(), "kdf_count": g.record.kdf_count,
+                 "hashcat": g.hashcat_format(), "entries": len(g.entries)}
+                for g in model.crypto_groups()
+            ]
+        if stream is not None:
+            # Quien lee de un pipe no tiene el archivo para volver a extraer el hash
+            normalized_data["hashcat"] = model.hashcat_hash
+        exporter = Exporter()
         
         if args.format == "json":
-            print(exporter.to_json())
+            print(exporter.to_json(normalized_data), flush=True)
         else:
-            print(exporter.to_csv())
+            print(exporter.to_csv(normalized_data), flush=True)
+
+        if stream is not None and args.drain:
+            skip_stream(stream)
 
     elif args.command == "test_framework":
         if not os.path.exists(args.file):
@@ -100,8 +188,8 @@ def main():
             return
             
         print(f"Iniciando Test de Framework sobre: {args.file}")
-        manager = ExecutionManager()
-        result = manager.attempt_open(args.file, args.password)
+        manager = ExecutionManager(use_results=not args.no_results)
+        result = manager.attempt_open(args.file, args.password, use_cache=not args.no_cache)
         
         print("\n=== REPORTE DE EJECUCIÓN ===")
         print(json.dumps(result, indent=2))
@@ -134,6 +222,7 @@ def main():
         try:
             from GPU.extractor import RarHashExtractor
             from GPU.engine import HashcatEngine
+            from GPU.hashcat_status import HashcatStatusCode
         except ImportError as e:
             print(f"[ERROR] No se pudo importar el módulo GPU: {e}")
             return
@@ -142,8 +231,9 @@ def main():
         
         # 1. Extraer Hash
         try:
-            extractor = RarHashExtractor(args.file)
-            rar_hash = extractor.get_hashcat_format()
+            extractor = RarHashExtractor(args.file, use_cache=not args.no_cache)
+            model = extractor.analyze()
+            rar_hash = extractor.get_hashcat_format(model) if model else None
             
             if not rar_hash:
                 print("[!] Error: No se pudo extraer un hash válido. Verifique:")
@@ -155,28 +245,21 @@ def main():
             print(f"[*] Preview: {rar_hash[:60]}...")
             
             # 2. Iniciar Motor
-            engine = HashcatEngine(args.hashcat_bin)
+            engine = HashcatEngine(args.hashcat_bin, use_results=not args.no_results,
+                                   use_sessions=not args.no_restore)
             
-            def status_callback(msg):
-                # UI Limpia: Solo mostrar progreso y estado final
-                if "Progress.........:" in msg:
-                    # msg format: "Progress.........: 123/456 (10.00%)"
-                    try:
-                        content = msg.split(":", 1)[1].strip()
-                        # Usar retorno de carro \r para sobrescribir la línea
-                        sys.stdout.write(f"\r[*] Probando: {content}   ")
-                        sys.stdout.flush()
-                    except:
-                        pass
-                elif "Status...........:" in msg:
-                     status = msg.split(":", 1)[1].strip()
-                     if status == "Cracked":
-                         print(f"\n[+] Estado: ¡Encontrada!")
-                     elif status == "Exhausted":
-                         print(f"\n[-] Estado: Agotado (No encontrada en este rango)")
-                elif "Speed.#1.........:" in msg:
-                    # Opcional: Mostrar velocidad si se desea
-                    pass
+            def status_callback(status):
+                # UI Limpia: progreso, velocidad y ETA sobre una sola línea; estado final aparte
+                if status.status == HashcatStatusCode.CRACKED:
+                    print(f"\n[+] Estado: ¡Encontrada!")
+                elif status.status == HashcatStatusCode.EXHAUSTED:
+                    print(f"\n[-] Estado: Agotado (No encontrada en este rango)")
+                else:
+                    eta = f"{status.eta_seconds:.0f}s" if status.eta_seconds is not None else "?"
+                    # Usar retorno de carro \r para sobrescribir la línea
+                    sys.stdout.write(f"\r[*] Probando: {status.progress_done}/{status.progress_total} "
+                                     f"({status.progress_percent:.2f}%) | {status.speed} H/s | ETA {eta}   ")
+                    sys.stdout.flush()
                 
             # Construir máscara y argumentos
             mask = args.mask
@@ -252,7 +335,8 @@ def main():
                     print(f"[!] Error: No se encontró el archivo de diccionario: {args.wordlist}")
                     return
                 
-                password = engine.start_smart_attack(rar_hash, args.wordlist, callback=status_callback)
+                password = engine.start_smart_attack(rar_hash, args.wordlist, status_callback=status_callback,
+                                                     budget_seconds=args.budget)
 
             elif args.wordlist:
                 print(f"[*] Modo: Ataque de Diccionario")
@@ -261,27 +345,29 @@ def main():
                     print(f"[!] Error: No se encontró el archivo de diccionario: {args.wordlist}")
                     return
                 # Para diccionario no usamos extra_args de máscara, pero sí reglas
-                password = engine.start_dictionary_attack(rar_hash, args.wordlist, callback=status_callback, extra_args=extra_args)
+                password = engine.start_dictionary_attack(rar_hash, args.wordlist, status_callback=status_callback, extra_args=extra_args,
+                                                          max_runtime=args.max_runtime)
             else:
                 print(f"[*] Modo: Fuerza Bruta (Máscara)")
                 print(f"    - Máscara: {mask}")
                 print(f"    - Charset: {args.charset}")
                 if extra_args:
                     print(f"    - Extra Args: {extra_args}")
-                password = engine.start_bruteforce(rar_hash, mask=mask, callback=status_callback, extra_args=extra_args)
+                password = engine.start_bruteforce(rar_hash, mask=mask, status_callback=status_callback, extra_args=extra_args,
+                                                   max_runtime=args.max_runtime)
             
             if not password and args.wordlist:
-                print("\n[!] GPU no encontró la contraseña. Intentando verificación profunda con CPU (UnRAR)...")
+                print("\n[!] GPU no encontró la contraseña. Intentando verificación profunda con CPU...")
                 print("    Este método es más lento pero infalible para validar el diccionario.")
                 try:
                     from GPU.cpu_engine import CPUEngine
-                    cpu_engine = CPUEngine()
+                    cpu_engine = CPUEngine(use_results=not args.no_results)
                     
                     def cpu_callback(msg):
                         sys.stdout.write(f"\r{msg}   ")
                         sys.stdout.flush()
                         
-                    password = cpu_engine.start_dictionary_attack(args.file, args.wordlist, callback=cpu_callback)
+                    password = cpu_engine.start_dictionary_attack(args.file, args.wordlist, callback=cpu_callback, model=model)
                     print() # Newline post callback
                 except Exception as e:
                     print(f"\n[!] Error en motor CPU: {e}")
@@ -343,6 +429,82 @@ def main():
             print(f"[ERROR] Faltan dependencias para el instalador: {e}")
             print("Intenta: pip install py7zr requests")
 
+    elif args.command == "gpu_probe":
+        import subprocess
+        from GPU.engine import HashcatEngine
+
+        engine = HashcatEngine(args.hashcat_bin, use_results=False)
+        if engine.capabilities is None or args.force:
+            try:
+                engine.probe([int(w) for w in args.workloads.split(",")])
+            except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+                print(f"[ERROR] No se pudo relevar hashcat: {e}")
+                return
+        report = engine.capabilities.to_dict()
+        report["selected"] = {"workload": engine.workload, "devices": engine.devices}
+        print(json.dumps(report, indent=2))
+
+    elif args.command == "results":
+        from core.result_store import ResultStore
+
+        with ResultStore(args.db) as store:
+            if args.import_potfile:
+                added = store.import_potfile(args.import_potfile)
+                print(f"[OK] {added} hashes nuevos importados de {args.import_potfile}")
+            for path in args.file:
+                # Todas las claves del archivo (puede tener entradas con otra contraseña)
+                model = ArchiveAnalyzer(path).analyze()
+                found = [store.lookup(h) for h in model.hashcat_hashes]
+                result = {"file": path, "hashes": len(found),
+                          "solved": [dict(r.to_dict(), password=r.password) for r in found if r]}
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            if args.export_potfile:
+                count = store.export_potfile(args.export_potfile)
+                print(f"[OK] {count} hashes exportados a {args.export_potfile}")
+            if not (args.file or args.import_potfile or args.export_potfile):
+                print(f"[*] {len(store)} hashes resueltos en {store.path}")
+
+    elif args.command == "benchmark":
+        from kdf.hardware_profiles import HardwareProfileStore
+
+        store = HardwareProfileStore(args.profiles)
+        if not args.list:
+            save_to = None if args.no_save else store
+            if args.cpu or not args.gpu:
+                from simulation.cpu_benchmark import benchmark_cpu
+                benchmark_cpu(args.duration, store=save_to)
+            if args.gpu:
+                import subprocess
+                from GPU.engine import HashcatEngine
+                try:
+                    engine = HashcatEngine(args.hashcat_bin, use_results=False)
+                    if not engine.run_benchmark(profile_store=save_to):
+                        print("[ERROR] hashcat no reportó velocidades para el modo 13000")
+                except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+                    print(f"[ERROR] No se pudo medir hashcat: {e}")
+        print(json.dumps([p.to_dict() for p in store], indent=2))
+
+    elif args.command == "parser_benchmark":
+        from simulation.parser_suite import run_suite, check_baseline, save_results, \
+            format_table, BenchmarkRegression
+
+        print(f"[*] Generando fixtures (escala {args.scale}) y midiendo parsers...")
+        result = run_suite(scale=args.scale, repeats=args.repeats)
+        print(format_table(result))
+        if args.output:
+            save_results(result, args.output)
+
+        if args.baseline and args.update_baseline:
+            save_results(result, args.baseline)
+            print(f"[OK] Baseline actualizado: {args.baseline}")
+        elif args.baseline:
+            try:
+                check_baseline(result, args.baseline, args.tolerance)
+            except BenchmarkRegression as e:
+                print(f"[FAIL] {e}", file=sys.stderr)
+                sys.exit(1)
+            print(f"[OK] Sin regresiones frente a {args.baseline}")
+
     else:
         parser.print_help()
 
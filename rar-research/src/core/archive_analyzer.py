@@ -0,0 +1,124 @@
+import logging
+from typing import Optional, List
+from .rar_parser import RarParser
+from .block_reader import BlockReader
+from .volume_set import VolumeSet, VolumeSetParser
+from .stream_parser import StreamParser
+from .metadata import HeaderType
+from .models import ArchiveModel, CryptoRecord, BlockRecord
+from .entry_table import EntryTable
+from .index_cache import IndexCache
+from crypto_engine.execution_limits import ExecutionLimits
+
+logger = logging.getLogger(__name__)
+
+class ArchiveAnalyzer:
+    """
+    Responsabilidad:
+    Recorrer los headers de un archivo RAR una única vez y producir el ArchiveModel
+    inmutable (tabla de entradas, registros de encriptación y string de hashcat) que consumen
+    todos los comandos y motores.
+
+    Si la ruta es un volumen de un archivo partido (.partN.rar, .rar + .r00), el conjunto
+    se recorre como un único flujo con VolumeSetParser. Si se pasa 'stream', el archivo
+    se lee de ese flujo no posicionable con StreamParser y 'file_path' es solo su nombre.
+    """
+
+    def __init__(self, file_path: str, use_mmap: bool = False, use_cache: bool = True,
+                 index_cache: Optional[IndexCache] = None, limits: Optional[ExecutionLimits] = None,
+                 readahead: int = BlockReader.DEFAULT_READAHEAD, extra_records: bool = False,
+                 verify_crc: bool = False, recover: bool = False, stream=None):
+        """
+        Args:
+            extra_records: Conserva el Extra Area de cada entrada para decodificar todos
+                           sus registros (EntryTable.extra_records); sin esto solo se
+                           decodifica el registro de encriptación.
+            verify_crc: Verifica el CRC32 de cada header (ver RarParser).
+            recover: Sigue después de un bloque dañado desde el próximo header con CRC
+                     válido: los registros de encriptación posteriores también se reportan.
+            stream: Flujo binario (stdin, un pipe) del que se lee el archivo en una sola
+                    pasada, sin seek ni copia a disco. No admite recover.
+        """
+        if stream is not None and recover:
+            raise ValueError("recover necesita un archivo posicionable, no un flujo")
+        self.file_path = file_path
+        self.extra_records = extra_records
+        self.verify_crc = verify_crc
+        self.recover = recover
+        self.readahead = readahead
+        self.limits = limits
+        self.use_mmap = use_mmap
+        self.use_cache = use_cache
+        self.index_cache = index_cache
+        self.stream = stream
+
+    def analyze(self, first_crypto_only: bool = False) -> ArchiveModel:
+        """
+        Analiza el archivo.
+
+        Args:
+            first_crypto_only: Si es True, el recorrido se detiene en el primer
+                               registro de encriptación (suficiente para atacar).
+        """
+        table = EntryTable()
+        records: List[CryptoRecord] = []
+        complete = True
+
+        parser = self._parser()
+        # iter_blocks abre el archivo solo si el índice en caché no alcanza
+        blocks = parser.iter_blocks()
+        try:
+            for block in blocks:
+                crypto_index = EntryTable.NO_CRYPTO
+                if block.salt is not None:
+                    crypto_index = len(records)
+                    records.append(self._to_record(block))
+                table.append(block, crypto_index)
+
+                if crypto_index != EntryTable.NO_CRYPTO:
+                    if first_crypto_only:
+                        complete = False
+                        break
+        finally:
+            # Cierra el generador (guarda el índice parcial y libera el archivo)
+            blocks.close()
+
+        model = ArchiveModel(
+            path=self.file_path,
+            version=parser.version,
+            table=table,
+            crypto_records=tuple(records),
+            complete=complete,
+            errors=tuple(parser.errors),
+            volumes=tuple(getattr(parser, 'volumes', ()))
+        )
+        logger.info("Análisis de %s: %d entradas, %d registros de encriptación",
+                    self.file_path, len(model.table), len(model.crypto_records))
+        return model
+
+    def _parser(self):
+        if self.stream is not None:
+            return StreamParser(self.stream, self.file_path, limits=self.limits, readahead=self.readahead,
+                                keep_extra_records=self.extra_records, verify_crc=self.verify_crc)
+        options = dict(use_mmap=self.use_mmap, use_cache=self.use_cache, index_cache=self.index_cache,
+                       limits=self.limits, readahead=self.readahead,
+                       keep_extra_records=self.extra_records, verify_crc=self.verify_crc,
+                       recover=self.recover)
+        if VolumeSet.is_multivolume(self.file_path):
+            return VolumeSetParser(self.file_path, **options)
+        return RarParser(self.file_path, **options)
+
+    @staticmethod
+    def _to_record(block: BlockRecord) -> CryptoRecord:
+        def _bytes(value):
+            return bytes(value) if value is not None else None
+
+        return CryptoRecord(
+            block_offset=block.offset,
+            header_encrypted=block.type == HeaderType.CRYPT,
+            flags=block.enc_flags or 0,
+            kdf_count=block.kdf_count if block.kdf_count is not None else 15,
+            salt=bytes(block.salt),
+            iv=_bytes(block.iv),
+            psw_check=_bytes(block.psw_check)
+        )
@@ -0,0 +1,226 @@
+import os
+import glob
+import time
+import fnmatch
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional, Iterable, Iterator
+from .archive_analyzer import ArchiveAnalyzer
+from .block_reader import BlockReader
+from .volume_set import VolumeSet
+from .index_cache import IndexCache
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BatchOptions:
+    """Parámetros de ArchiveAnalyzer que se envían a cada proceso del pool."""
+    use_mmap: bool = False
+    use_cache: bool = True
+    index_cache: Optional[IndexCache] = None
+    readahead: int = BlockReader.DEFAULT_READAHEAD
+    first_crypto_only: bool = True
+    verify_crc: bool = False
+    recover: bool = False
+
+@dataclass
+class BatchSummary:
+    files: int = 0
+    failed: int = 0
+    encrypted: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "encrypted": self.encrypted,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "files_per_second": round(self.files_per_second, 2)
+        }
+
+def analyze_one(path: str, options: BatchOptions) -> dict:
+    """
+    Analiza un archivo y retorna su línea de reporte (un dict serializable a JSON).
+    Nunca lanza: un fallo queda en la propia línea con status "error".
+    Se ejecuta en los procesos del pool, por eso es una función de módulo.
+    """
+    start = time.perf_counter()
+    result = {"path": path, "status": "ok"}
+    try:
+        analyzer = ArchiveAnalyzer(path, use_mmap=options.use_mmap, use_cache=options.use_cache,
+                                   index_cache=options.index_cache, readahead=options.readahead,
+                                   verify_crc=options.verify_crc, recover=options.recover)
+        model = analyzer.analyze(first_crypto_only=options.first_crypto_only)
+        parse_seconds = time.perf_counter() - start
+
+        record = model.primary_record
+        result.update({
+            "version": model.version,
+            "is_encrypted": model.is_encrypted,
+            "header_encrypted": model.header_encrypted,
+            "kdf_count": record.kdf_count if record else None,
+            "crypto_profile": model.crypto_profile().normalize(),
+            "entries": len(model.table),
+            "complete": model.complete,
+            "malformed_blocks": [e.to_dict() for e in model.errors]
+        })
+        result["timings"] = {
+            "parse_seconds": round(parse_seconds, 6),
+            "total_seconds": round(time.perf_counter() - start, 6)
+        }
+    except Exception as e:
+        result.update({
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "timings": {"total_seconds": round(time.perf_counter() - start, 6)}
+        })
+    return result
+
+class BatchAnalyzer:
+    """
+    Responsabilidad:
+    Analizar muchos archivos (directorios, globs o rutas sueltas) en un pool de procesos
+    y entregar cada resultado apenas termina, sin esperar al lote completo.
+
+    - Las tareas en vuelo están acotadas (max_in_flight): el lote no se encola entero.
+    - El fallo de un archivo (o de su proceso) queda en su resultado y no aborta el lote.
+    - Al terminar, 'summary' tiene los totales y los archivos por segundo.
+    """
+
+    DEFAULT_PATTERN = "*.rar"
+
+    def __init__(self, workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 options: Optional[BatchOptions] = None, pattern: str = DEFAULT_PATTERN):
+        """
+        Args:
+            workers: Procesos del pool (por defecto, los CPUs). Con 1 se analiza en este proceso.
+            max_in_flight: Tareas enviadas y no terminadas como máximo (por defecto, 2 por proceso).
+            options: Parámetros de ArchiveAnalyzer para cada archivo.
+            pattern: Patrón de nombres al recorrer directorios.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max(max_in_flight or 2 * self.workers, 1)
+        self.options = options or BatchOptions()
+        self.pattern = pattern
+        self.summary = BatchSummary()
+
+    def expand_targets(self, targets: Iterable[str]) -> Iterator[str]:
+        """
+        Genera las rutas de archivo a analizar, sin repetir:
+        un directorio se recorre recursivamente filtrando por 'pattern',
+        una ruta inexistente se interpreta como glob y un archivo se toma tal cual.
+        Los volúmenes de un mismo conjunto se reducen al primero (se analiza el conjunto).
+        """
+        seen = set()
+        for target in targets:
+            if os.path.isdir(target):
+                candidates = self._walk_directory(target)
+            elif os.path.isfile(target):
+                candidates = [target]
+            else:
+                candidates = sorted(p for p in glob.iglob(target, recursive=True) if os.path.isfile(p))
+                if not candidates:
+                    logger.warning("Sin archivos para: %s", target)
+
+            for path in candidates:
+                if VolumeSet.is_multivolume(path):
+                    try:
+                        path = VolumeSet(path).first
+                    except FileNotFoundError:
+                        pass    # Sin primer volumen: el análisis reporta el error
+                key = os.path.abspath(path)
+                if key not in seen:
+                    seen.add(key)
+                    yield path
+
+    def _walk_directory(self, directory: str) -> Iterator[str]:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if fnmatch.fnmatch(name.lower(), self.pattern):
+                    yield os.path.join(root, name)
+
+    def run(self, targets: Iterable[str]) -> Iterator[dict]:
+        """Genera un resultado por archivo, en orden de finalización."""
+        self.summary = BatchSummary()
+        start = time.perf_counter()
+        paths = self.expand_targets(targets)
+        try:
+            if self.workers == 1:
+                results = (analyze_one(path, self.options) for path in paths)
+            else:
+                results = self._run_pool(paths)
+            for result in results:
+                self._account(result)
+                self.summary.elapsed_seconds = time.perf_counter() - start
+                yield result
+        finally:
+            self.summary.elapsed_seconds = time.perf_counter() - start
+
+    def _run_pool(self, paths: Iterator[str]) -> Iterator[dict]:
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        pending = {}
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                # Se rellena hasta max_in_flight antes de esperar al próximo resultado
+                while not exhausted and len(pending) < self.max_in_flight:
+                    path = next(paths, None)
+                    if path is None:
+                        exhausted = True
+                    else:
+                        pending[pool.submit(analyze_one, path, self.options)] = path
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                suspects = []
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        suspects.append(path)
+                    except Exception as e:
+                        yield {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                if suspects:
+                    # Un proceso murió (crash, OOM) y con él todo el pool: las tareas en vuelo
+                    # fallan aunque no tengan la culpa. Se reintentan de a una, aisladas,
+                    # y el lote sigue en un pool nuevo
+                    logger.warning("Pool de procesos roto; se reintentan %d archivos aislados",
+                                   len(suspects) + len(pending))
+                    suspects.extend(pending.values())
+                    for future in pending:
+                        future.cancel()
+                    pending.clear()
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=self.workers)
+                    for path in suspects:
+                        yield self._run_isolated(path)
+        finally:
+            # Si el llamador deja de consumir, las tareas aún no iniciadas no se ejecutan
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def _run_isolated(self, path: str) -> dict:
+        """Analiza un archivo en un proceso propio: si vuelve a morir, el error es solo suyo."""
+        with ProcessPoolExecutor(max_workers=1) as solo:
+            try:
+                return solo.submit(analyze_one, path, self.options).result()
+            except Exception as e:
+                return {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    def _account(self, result: dict):
+        self.summary.files += 1
+        if result["status"] != "ok":
+            self.summary.failed += 1
+        elif result.get("is_encrypted"):
+            self.summary.encrypted += 1
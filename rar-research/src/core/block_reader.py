@@ -0,0 +1,201 @@
+import os
+import sys
+from typing import Optional
+
+class BlockReader:
+    """
+    Responsabilidad:
+    Servir las lecturas de headers desde un único buffer secuencial grande
+    (readahead), en lugar de varias lecturas chicas por bloque.
+
+    - Una lectura física trae la ventana actual; los headers siguientes que caen
+      dentro del buffer se sirven como memoryview sin otra syscall.
+    - La ventana arranca en MIN_READAHEAD y se duplica (hasta 'readahead') mientras
+      los accesos sean secuenciales; un salto lejano (quick open, áreas de datos
+      grandes) la vuelve al mínimo para no leer bytes que nadie usa.
+    - Saltar un área de datos que queda fuera del buffer no lee nada: la próxima
+      lectura hace seek directamente al destino.
+    - Contadores: bytes leídos vs. bytes salteados, lecturas y seeks emitidos.
+    """
+
+    DEFAULT_READAHEAD = 64 * 1024
+    MIN_READAHEAD = 512
+
+    def __init__(self, file_obj, readahead: int = DEFAULT_READAHEAD):
+        self.file_obj = file_obj
+        self.readahead = max(readahead, self.MIN_READAHEAD)
+        self.size = os.fstat(file_obj.fileno()).st_size
+
+        self._window = self.MIN_READAHEAD
+        self._buffer = memoryview(b'')
+        self._start = 0
+        self._file_pos = None   # Posición física del archivo (None = desconocida)
+
+        self.bytes_read = 0
+        self.bytes_skipped = 0
+        self.read_calls = 0
+        self.seek_calls = 0
+
+    @property
+    def _end(self) -> int:
+        return self._start + len(self._buffer)
+
+    def window(self, pos: int, min_size: int = 1) -> memoryview:
+        """
+        Vista desde 'pos' hasta el final del buffer actual, con al menos 'min_size'
+        bytes (o hasta el fin del archivo). Solo lee del disco si el buffer no alcanza.
+        """
+        need = min(max(min_size, 1), self.size - pos)
+        if need <= 0:
+            return memoryview(b'')
+        if not (self._start <= pos and pos + need <= self._end):
+            self._fill(pos, need)
+        return self._buffer[pos - self._start:]
+
+    def read_at(self, pos: int, size: int) -> memoryview:
+        """Exactamente 'size' bytes desde 'pos' (menos si el archivo termina antes)."""
+        return self.window(pos, size)[:size]
+
+    def _fill(self, pos: int, need: int):
+        if self.read_calls and self._start <= pos <= self._end + self._window:
+            # Acceso secuencial: leer de corrido cuesta menos que otro seek
+            self._window = min(self._window * 2, self.readahead)
+        else:
+            self._window = self.MIN_READAHEAD
+        if self.read_calls and pos > self._end:
+            # El tramo entre el buffer anterior y 'pos' (áreas de datos) nunca se lee
+            self.bytes_skipped += pos - self._end
+
+        if self._file_pos != pos:
+            self.file_obj.seek(pos)
+            self.seek_calls += 1
+        data = self.file_obj.read(max(self._window, need))
+        self.read_calls += 1
+        self.bytes_read += len(data)
+
+        # Las vistas entregadas antes siguen siendo válidas: retienen el buffer anterior
+        self._buffer = memoryview(data)
+        self._start = pos
+        self._file_pos = pos + len(data)
+
+    def stats(self) -> dict:
+        return {
+            "readahead": self.readahead,
+            "bytes_read": self.bytes_read,
+            "bytes_skipped": self.bytes_skipped,
+            "read_calls": self.read_calls,
+            "seek_calls": self.seek_calls
+        }
+
+
+def skip_stream(stream, size: Optional[int] = None, chunk_size: int = 1024 * 1024) -> int:
+    """
+    Lee y descarta 'size' bytes de un flujo no posicionable (todo, hasta el final,
+    si 'size' es None), en trozos de 'chunk_size' sobre un único buffer reutilizado.
+    Retorna los bytes descartados (menos que 'size' si el flujo terminó antes).
+    """
+    scratch = memoryview(bytearray(max(chunk_size, 1)))
+    readinto = getattr(stream, 'readinto', None)
+    skipped = 0
+    while size is None or skipped < size:
+        want = len(scratch) if size is None else min(len(scratch), size - skipped)
+        if readinto is not None:
+            count = readinto(scratch[:want])
+        else:
+            count = len(stream.read(want))
+        if not count:
+            break
+        skipped += count
+    return skipped
+
+
+class StreamBlockReader:
+    """
+    Responsabilidad:
+    Servir las lecturas de headers desde un flujo no posicionable (stdin, un pipe,
+    la salida de tar o de un backup), con la misma interfaz que BlockReader.
+
+    - Solo avanza: pedir una posición anterior al buffer actual lanza ValueError.
+    - Saltar un área de datos lee y descarta en trozos de 'skip_chunk' bytes
+      (skip_stream); esos bytes cuentan en bytes_skipped, no en bytes_read.
+    - Las lecturas usan read1 cuando el flujo lo tiene: un header se entrega en
+      cuanto llegan sus bytes, sin esperar a llenar el readahead.
+    - El tamaño se desconoce hasta llegar al final: 'size' vale UNKNOWN_SIZE hasta
+      entonces y después el offset final del flujo.
+    """
+
+    UNKNOWN_SIZE = sys.maxsize
+    DEFAULT_SKIP_CHUNK = 1024 * 1024
+
+    def __init__(self, stream, readahead: int = BlockReader.DEFAULT_READAHEAD,
+                 skip_chunk: int = DEFAULT_SKIP_CHUNK):
+        self.file_obj = stream
+        self.readahead = max(readahead, BlockReader.MIN_READAHEAD)
+        self.skip_chunk = skip_chunk
+        self.size = self.UNKNOWN_SIZE
+        self._read = getattr(stream, 'read1', stream.read)
+
+        self._buffer = memoryview(b'')
+        self._start = 0
+
+        self.bytes_read = 0
+        self.bytes_skipped = 0
+        self.read_calls = 0
+
+    @property
+    def _end(self) -> int:
+        return self._start + len(self._buffer)
+
+    def window(self, pos: int, min_size: int = 1) -> memoryview:
+        """
+        Vista desde 'pos' hasta el final del buffer actual, con al menos 'min_size'
+        bytes (o hasta el fin del flujo). Solo lee si el buffer no alcanza.
+        """
+        if pos < self._start:
+            raise ValueError(f"Flujo no posicionable: el offset {pos} ya fue consumido")
+        need = min(max(min_size, 1), self.size - pos)
+        if need <= 0:
+            return memoryview(b'')
+        if pos + need > self._end:
+            self._fill(pos, need)
+        return self._buffer[pos - self._start:]
+
+    def read_at(self, pos: int, size: int) -> memoryview:
+        """Exactamente 'size' bytes desde 'pos' (menos si el flujo termina antes)."""
+        return self.window(pos, size)[:size]
+
+    def _fill(self, pos: int, need: int):
+        if pos > self._end:
+            gap = pos - self._end
+            skipped = skip_stream(self.file_obj, gap, self.skip_chunk)
+            self.bytes_skipped += skipped
+            self._start, self._buffer = self._end + skipped, memoryview(b'')
+            if skipped < gap:
+                self.size = self._start
+                return
+
+        # Lo que queda del buffer desde 'pos' (a lo sumo un header) se conserva
+        parts = [self._buffer[pos - self._start:]]
+        have = len(parts[0])
+        while have < need:
+            data = self._read(max(self.readahead, need - have))
+            self.read_calls += 1
+            if not data:
+                self.size = pos + have
+                break
+            self.bytes_read += len(data)
+            parts.append(data)
+            have += len(data)
+
+        # Las vistas entregadas antes siguen siendo válidas: retienen el buffer anterior
+        self._buffer = memoryview(b''.join(parts))
+        self._start = pos
+
+    def stats(self) -> dict:
+        return {
+            "readahead": self.readahead,
+            "bytes_read": self.bytes_read,
+            "bytes_skipped": self.bytes_skipped,
+            "read_calls": self.read_calls,
+            "seek_calls": 0
+        }
@@ -0,0 +1,250 @@
+"""
+Codec compartido para los tipos básicos de RAR5.
+Responsabilidad:
+- Decodificar/codificar enteros de longitud variable (VINT).
+- Decodificar el header base común a todos los bloques en una tupla fija.
+- Decodificar el cuerpo de los headers FILE y SERVICE.
+- Delimitar los registros del Extra Area (sin decodificarlos).
+
+Todas las funciones aceptan bytes, bytearray o memoryview y nunca copian el buffer.
+Convención de truncamiento: si el buffer termina antes de completar un campo,
+se retorna (0, 0) / None en lugar de un valor parcial.
+"""
+from typing import NamedTuple, Optional, Tuple, Iterator, Iterable
+
+# Flags comunes del header base (ver HeaderFlags en metadata.py)
+HFL_EXTRA = 0x0001
+HFL_DATA = 0x0002
+
+# Flags del cuerpo de FILE/SERVICE (ver FileFlags en metadata.py)
+FHFL_DIRECTORY = 0x0001
+FHFL_UTIME = 0x0002
+FHFL_CRC32 = 0x0004
+
+# Un VINT de 64 bits ocupa como máximo 10 bytes (7 bits útiles por byte)
+MAX_VINT_LEN = 10
+
+
+class BaseHeader(NamedTuple):
+    """
+    Campos base de un bloque RAR5:
+    [CRC32 (4)] [Size (V)] [Type (V)] [Flags (V)] [ExtraSize (V)]? [DataSize (V)]?
+
+    Los offsets son relativos al inicio del bloque (el primer byte del CRC).
+    """
+    crc: int
+    header_size: int    # Tamaño desde el campo Type hasta el final del header
+    size_len: int       # Bytes que ocupa el VINT de Size
+    type: int
+    flags: int
+    extra_size: int     # 0 si no hay Extra Area
+    data_size: int      # 0 si no hay Data Area
+    body_offset: int    # Inicio de los campos específicos del tipo de header
+
+    @property
+    def header_len(self) -> int:
+        """Tamaño total del header: CRC + Size + header_size."""
+        return 4 + self.size_len + self.header_size
+
+    @property
+    def extra_offset(self) -> int:
+        """Inicio del Extra Area (que ocupa el final del header)."""
+        return self.header_len - self.extra_size
+
+    @property
+    def has_extra(self) -> bool:
+        return bool(self.flags & HFL_EXTRA)
+
+    @property
+    def has_data(self) -> bool:
+        return bool(self.flags & HFL_DATA)
+
+
+class FileHeader(NamedTuple):
+    """
+    Cuerpo de un header FILE o SERVICE:
+    [FileFlags (V)] [UnpSize (V)] [Attributes (V)] [MTime (4)]? [DataCRC32 (4)]?
+    [CompInfo (V)] [HostOS (V)] [NameLength (V)] [Name]
+    """
+    file_flags: int
+    unpacked_size: int
+    attributes: int
+    mtime: Optional[int]    # Unix time (32 bits) si FHFL_UTIME
+    crc: Optional[int]      # CRC32 de los datos desempaquetados si FHFL_CRC32
+    comp_info: int          # Versión, solid, método y diccionario empaquetados
+    host_os: int            # 0 = Windows, 1 = Unix
+    name: bytes             # UTF-8 (slice del buffer; memoryview si el buffer lo es)
+
+    @property
+    def is_directory(self) -> bool:
+        return bool(self.file_flags & FHFL_DIRECTORY)
+
+    @property
+    def method(self) -> int:
+        """Método de compresión (bits 7-9): 0 = stored, 1..5 = fastest..best."""
+        return (self.comp_info >> 7) & 0x07
+
+
+def read_vint(data, offset: int = 0) -> Tuple[int, int]:
+    """
+    Lee un VINT desde 'data' en 'offset'.
+    Retorna (valor, bytes_leidos), o (0, 0) si el buffer está truncado.
+    Lanza ValueError si el VINT supera MAX_VINT_LEN bytes.
+    """
+    # Camino rápido: 1 y 2 bytes cubren tipos, flags y casi todos los tamaños de header
+    try:
+        b0 = data[offset]
+        if b0 < 0x80:
+            return b0, 1
+        b1 = data[offset + 1]
+        if b1 < 0x80:
+            return (b0 & 0x7F) | (b1 << 7), 2
+    except IndexError:
+        return 0, 0
+
+    value = (b0 & 0x7F) | ((b1 & 0x7F) << 7)
+    shift = 14
+    pos = offset + 2
+    limit = min(len(data), offset + MAX_VINT_LEN)
+    while pos < limit:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not (byte & 0x80):
+            return value, pos - offset
+        shift += 7
+
+    if pos - offset >= MAX_VINT_LEN:
+        raise ValueError("VINT demasiado largo")
+    return 0, 0
+
+
+def read_vints(data, offset: int, count: int) -> Tuple[Optional[Tuple[int, ...]], int]:
+    """
+    Decodifica 'count' VINTs consecutivos.
+    Retorna (valores, bytes_leidos), o (None, 0) si alguno está truncado.
+    """
+    values = []
+    pos = offset
+    for _ in range(count):
+        value, length = read_vint(data, pos)
+        if not length:
+            return None, 0
+        values.append(value)
+        pos += length
+    return tuple(values), pos - offset
+
+
+def encode_vint(value: int) -> bytes:
+    """Codifica un entero no negativo como VINT."""
+    if value < 0:
+        raise ValueError("VINT no admite valores negativos")
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def parse_base_header(data, offset: int = 0) -> Optional[BaseHeader]:
+    """
+    Decodifica el header base del bloque que empieza en 'offset'.
+    Retorna None si el buffer no alcanza para los campos base.
+    """
+    if len(data) < offset + 4:
+        return None
+    crc = int.from_bytes(data[offset:offset + 4], 'little')
+
+    pos = offset + 4
+    header_size, size_len = read_vint(data, pos)
+    if not size_len:
+        return None
+    pos += size_len
+
+    fields, length = read_vints(data, pos, 2)
+    if fields is None:
+        return None
+    header_type, flags = fields
+    pos += length
+
+    extra_size = 0
+    if flags & HFL_EXTRA:
+        extra_size, length = read_vint(data, pos)
+        if not length:
+            return None
+        pos += length
+
+    data_size = 0
+    if flags & HFL_DATA:
+        data_size, length = read_vint(data, pos)
+        if not length:
+            return None
+        pos += length
+
+    return BaseHeader(crc, header_size, size_len, header_type, flags,
+                      extra_size, data_size, pos - offset)
+
+
+def parse_file_header(data, offset: int, limit: int, exact: bool = False) -> Optional[FileHeader]:
+    """
+    Decodifica el cuerpo de un header FILE/SERVICE que empieza en 'offset'
+    (BaseHeader.body_offset) sin pasar de 'limit' (inicio del Extra Area).
+    Retorna None si los campos no caben en el header, o si 'exact' y el nombre
+    no termina justo en 'limit' (como en todo header bien formado).
+    """
+    fields, length = read_vints(data, offset, 3)
+    if fields is None:
+        return None
+    file_flags, unpacked_size, attributes = fields
+    pos = offset + length
+
+    mtime = None
+    if file_flags & FHFL_UTIME:
+        if pos + 4 > limit:
+            return None
+        mtime = int.from_bytes(data[pos:pos + 4], 'little')
+        pos += 4
+
+    crc = None
+    if file_flags & FHFL_CRC32:
+        if pos + 4 > limit:
+            return None
+        crc = int.from_bytes(data[pos:pos + 4], 'little')
+        pos += 4
+
+    fields, length = read_vints(data, pos, 3)
+    if fields is None:
+        return None
+    comp_info, host_os, name_len = fields
+    pos += length
+    if pos + name_len > limit or (exact and pos + name_len != limit):
+        return None
+
+    return FileHeader(file_flags, unpacked_size, attributes, mtime, crc,
+                      comp_info, host_os, data[pos:pos + name_len])
+
+
+def scan_extra_records(data, types: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, int, int]]:
+    """
+    Genera (tipo, inicio de los datos, fin del registro) de cada registro del Extra Area
+    'data' cuyo tipo está en 'types' (None = todos). Solo decodifica Size y Type:
+    [Size (V)] [Type (V)] [Datos], con Size contado desde Type.
+    El recorrido termina en el primer registro con Size inválido o que excede el área.
+    Lanza ValueError si un VINT supera MAX_VINT_LEN bytes.
+    """
+    offset, limit = 0, len(data)
+    while offset < limit:
+        rec_size, s_len = read_vint(data, offset)
+        if not s_len or rec_size == 0:
+            return
+        type_offset = offset + s_len
+        rec_end = type_offset + rec_size
+        if rec_end > limit:
+            return
+        rec_type, t_len = read_vint(data, type_offset)
+        if not t_len:
+            return
+        if types is None or rec_type in types:
+            yield rec_type, type_offset + t_len, rec_end
+        offset = rec_end
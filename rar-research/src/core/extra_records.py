@@ -0,0 +1,237 @@
+"""
+Registros del Extra Area de los headers FILE y SERVICE de RAR5.
+
+Responsabilidad:
+- Recorrer el Extra Area leyendo solo Size y Type de cada registro (codec.scan_extra_records).
+- Exponer cada registro como una vista perezosa sobre sus bytes: los campos se
+  decodifican recién al accederlos, según la tabla de campos de su tipo.
+
+Estructura de cada registro: [Size (V)] [Type (V)] [Datos]; Size cuenta desde Type.
+Un registro truncado no lanza excepción: su vista queda con 'truncated' = True
+y los campos que sí cabían.
+"""
+import hashlib
+from typing import Optional, Iterator, Dict, Any, Tuple, Iterable
+from . import codec
+from .metadata import ExtraRecordType, CryptFlags, HashType, HTimeFlags, OwnerFlags
+
+# Diferencia entre la época de FILETIME (1601) y la Unix, en intervalos de 100 ns
+_FILETIME_EPOCH = 116444736000000000
+
+
+class ExtraRecord:
+    """
+    Vista perezosa de un registro del Extra Area.
+
+    'data' es el slice de los datos del registro (memoryview si el buffer lo es).
+    Los campos se decodifican todos juntos en el primer acceso a cualquiera de ellos
+    (son posicionales: leer uno exige recorrer los anteriores) y quedan en caché.
+
+    Las subclases describen su formato en FIELDS: tuplas (nombre, tipo, condición)
+    donde tipo es 'vint', 'u8', 'u32', 'u64', un entero (bytes fijos), 'str'
+    (VINT de longitud + bytes UTF-8) o 'rest' (hasta el final del registro), y la
+    condición es None o una función de los campos ya decodificados.
+    """
+    __slots__ = ('record_type', 'data', '_fields')
+
+    NAME = "unknown"
+    FIELDS: Tuple = (('data', 'rest', None),)
+
+    def __init__(self, record_type: int, data):
+        self.record_type = record_type
+        self.data = data
+        self._fields: Optional[Dict[str, Any]] = None
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        if self._fields is None:
+            self._fields = self._decode()
+        return self._fields
+
+    @property
+    def truncated(self) -> bool:
+        return self.fields.get('truncated', False)
+
+    def __getattr__(self, name):
+        # Solo se llama si el atributo no existe: es el acceso a un campo
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self.fields[name]
+        except KeyError:
+            raise AttributeError(f"{self.NAME} no tiene el campo '{name}'") from None
+
+    def _decode(self) -> Dict[str, Any]:
+        data = self.data
+        fields: Dict[str, Any] = {}
+        pos, limit = 0, len(data)
+        try:
+            for name, kind, condition in self.FIELDS:
+                if condition is not None and not condition(fields):
+                    continue
+                if kind == 'vint':
+                    value, length = codec.read_vint(data, pos)
+                    if not length:
+                        raise IndexError
+                elif kind == 'str':
+                    size, length = codec.read_vint(data, pos)
+                    if not length or pos + length + size > limit:
+                        raise IndexError
+                    value = bytes(data[pos + length:pos + length + size]).decode('utf-8', errors='replace')
+                    length += size
+                elif kind == 'rest':
+                    value, length = data[pos:], limit - pos
+                else:
+                    length = {'u8': 1, 'u32': 4, 'u64': 8}.get(kind, kind)
+                    if pos + length > limit:
+                        raise IndexError
+                    value = data[pos:pos + length]
+                    if kind in ('u8', 'u32', 'u64'):
+                        value = int.from_bytes(value, 'little')
+                fields[name] = value
+                pos += length
+        except (IndexError, ValueError):
+            fields['truncated'] = True
+        self._finish(fields)
+        return fields
+
+    def _finish(self, fields: Dict[str, Any]):
+        """Derivaciones sobre los campos ya leídos (las subclases la redefinen)."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Campos decodificados, serializables a JSON (bytes como hex)."""
+        result = {'type': self.record_type, 'name': self.NAME}
+        for name, value in self.fields.items():
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                value = bytes(value).hex()
+            result[name] = value
+        return result
+
+    def __repr__(self):
+        return f"<{type(self).__name__} type={self.record_type} size={len(self.data)}>"
+
+
+class EncryptionRecord(ExtraRecord):
+    """File Encryption (0x01): versión, flags, KDF Count, salt, IV y CheckValue."""
+    __slots__ = ()
+    NAME = "encryption"
+    FIELDS = (
+        ('version', 'vint', None),
+        ('flags', 'vint', None),
+        ('kdf_count', 'u8', None),
+        ('salt', 16, None),
+        ('iv', 16, None),
+        ('check_value', 12, lambda f: f['flags'] & CryptFlags.PSW_CHECK),
+    )
+
+    def _finish(self, fields):
+        # PswCheck válido solo si coincide la suma SHA-256 (mismo criterio que unrar)
+        check = fields.pop('check_value', None)
+        if check is not None and hashlib.sha256(check[:8]).digest()[:4] == check[8:]:
+            fields['psw_check'] = check[:8]
+
+
+class HashRecord(ExtraRecord):
+    """File Hash (0x02): tipo de hash y digest (BLAKE2sp, 32 bytes)."""
+    __slots__ = ()
+    NAME = "hash"
+    FIELDS = (
+        ('hash_type', 'vint', None),
+        ('digest', 32, lambda f: f['hash_type'] == HashType.BLAKE2SP),
+    )
+
+
+def _htime_fields():
+    """mtime/ctime/atime en formato Unix (u32) o Windows FILETIME (u64), y luego los ns Unix."""
+    fields = [('flags', 'vint', None)]
+    times = (('mtime', HTimeFlags.MTIME), ('ctime', HTimeFlags.CTIME), ('atime', HTimeFlags.ATIME))
+    for name, flag in times:
+        fields.append((name, 'u32', lambda f, flag=flag: f['flags'] & flag and f['flags'] & HTimeFlags.UNIX_TIME))
+        fields.append((name, 'u64', lambda f, flag=flag: f['flags'] & flag and not f['flags'] & HTimeFlags.UNIX_TIME))
+    for name, flag in times:
+        mask = flag | HTimeFlags.UNIX_TIME | HTimeFlags.UNIX_NS
+        fields.append((name + '_fraction', 'u32', lambda f, mask=mask: f['flags'] & mask == mask))
+    return tuple(fields)
+
+
+class HighPrecisionTimeRecord(ExtraRecord):
+    """
+    File Time (0x03). Cada tiempo presente queda como '<nombre>_ns' (entero, ns desde la
+    época Unix: sin pérdida de precisión) y '<nombre>' (segundos Unix, float).
+    """
+    __slots__ = ()
+    NAME = "htime"
+    FIELDS = _htime_fields()
+
+    def _finish(self, fields):
+        unix = fields.get('flags', 0) & HTimeFlags.UNIX_TIME
+        for name in ('mtime', 'ctime', 'atime'):
+            if name not in fields:
+                continue
+            if unix:
+                nanoseconds = fields[name] * 1000000000 + fields.pop(name + '_fraction', 0)
+            else:
+                nanoseconds = (fields[name] - _FILETIME_EPOCH) * 100
+            fields[name + '_ns'] = nanoseconds
+            fields[name] = nanoseconds / 1e9
+
+
+class VersionRecord(ExtraRecord):
+    """File Version (0x04): número de versión del archivo (-ver)."""
+    __slots__ = ()
+    NAME = "version"
+    FIELDS = (
+        ('flags', 'vint', None),
+        ('version', 'vint', None),
+    )
+
+
+class RedirectionRecord(ExtraRecord):
+    """Redirection (0x05): enlace simbólico, junction, hard link o copia de archivo."""
+    __slots__ = ()
+    NAME = "redirection"
+    FIELDS = (
+        ('redirection_type', 'vint', None),
+        ('flags', 'vint', None),
+        ('target', 'str', None),
+    )
+
+
+class OwnerRecord(ExtraRecord):
+    """Unix Owner (0x06): nombres y/o ids de usuario y grupo."""
+    __slots__ = ()
+    NAME = "owner"
+    FIELDS = (
+        ('flags', 'vint', None),
+        ('user', 'str', lambda f: f['flags'] & OwnerFlags.USER_NAME),
+        ('group', 'str', lambda f: f['flags'] & OwnerFlags.GROUP_NAME),
+        ('uid', 'vint', lambda f: f['flags'] & OwnerFlags.USER_ID),
+        ('gid', 'vint', lambda f: f['flags'] & OwnerFlags.GROUP_ID),
+    )
+
+
+class ServiceDataRecord(ExtraRecord):
+    """Service Data (0x07): datos propios del service header (p. ej. el nombre del stream NTFS)."""
+    __slots__ = ()
+    NAME = "service_data"
+    FIELDS = (
+        ('data', 'rest', None),
+    )
+
+
+# Tipo de registro -> clase de la vista
+RECORD_TYPES = {
+    ExtraRecordType.ENCRYPTION: EncryptionRecord,
+    ExtraRecordType.HASH: HashRecord,
+    ExtraRecordType.HTIME: HighPrecisionTimeRecord,
+    ExtraRecordType.VERSION: VersionRecord,
+    ExtraRecordType.REDIRECTION: RedirectionRecord,
+    ExtraRecordType.OWNER: OwnerRecord,
+    ExtraRecordType.SERVICE_DATA: ServiceDataRecord,
+}
+
+
+def iter_records(raw_data, types: Optional[Iterable[int]] = None) -> Iterator[ExtraRecord]:
+    """Vistas de los registros de 'raw_data' (los de tipo desconocido, como ExtraRecord)."""
+    for rec_type, start, end in codec.scan_extra_records(raw_data, types):
+        yield RECORD_TYPES.get(rec_type, ExtraRecord)(rec_type, raw_data[start:end])
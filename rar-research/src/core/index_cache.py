@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import Optional, Dict, Any
+
+class IndexCache:
+    """
+    Responsabilidad:
+    Persistir en disco el índice de parseo de un archivo RAR (tabla de bloques,
+    parámetros criptográficos, string $rar5$) para no recorrer sus headers otra vez.
+
+    - Clave: huella barata del archivo (tamaño, mtime y hash de los primeros/últimos bytes).
+    - Validación al cargar: versión de formato, huella, tamaño y mtime.
+    - Desalojo: por antigüedad del último uso y por tamaño total del directorio.
+
+    Cada archivo del caché es un JSON con secciones independientes ('parser',
+    'hashcat', ...) que cada consumidor lee y actualiza por separado.
+    """
+
+    FORMAT_VERSION = 4
+    ENV_DIR = "RAR_RESEARCH_CACHE_DIR"
+    DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rar-research", "index")
+
+    DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600   # 30 días sin uso
+    DEFAULT_MAX_TOTAL_BYTES = 256 * 1024 * 1024
+
+    # Bytes del inicio y del final del archivo que entran en la huella
+    SAMPLE_SIZE = 64 * 1024
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+                 max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES):
+        self.cache_dir = cache_dir or os.environ.get(self.ENV_DIR) or self.DEFAULT_DIR
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+
+    @classmethod
+    def fingerprint(cls, path: str) -> Dict[str, Any]:
+        """
+        Calcula la huella del archivo leyendo solo SAMPLE_SIZE bytes de cada extremo,
+        de modo que el costo no depende del tamaño del archivo.
+        """
+        st = os.stat(path)
+        digest = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}:".encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read(cls.SAMPLE_SIZE))
+            if st.st_size > cls.SAMPLE_SIZE:
+                f.seek(max(cls.SAMPLE_SIZE, st.st_size - cls.SAMPLE_SIZE))
+                digest.update(f.read(cls.SAMPLE_SIZE))
+        return {
+            "key": digest.hexdigest(),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns
+        }
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna las secciones cacheadas del archivo, o None si no hay entrada válida.
+        Una entrada corrupta o desactualizada se descarta.
+        """
+        try:
+            fp = self.fingerprint(path)
+        except OSError:
+            return None
+
+        entry_path = self._entry_path(fp["key"])
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (not isinstance(entry, dict)
+                or entry.get("version") != self.FORMAT_VERSION
+                or entry.get("fingerprint") != fp
+                or not isinstance(entry.get("sections"), dict)):
+            self._remove(entry_path)
+            return None
+
+        # Registrar el uso para el desalojo por antigüedad
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry["sections"]
+
+    def store(self, path: str, **sections) -> None:
+        """
+        Guarda (o actualiza) secciones del índice del archivo.
+        Las secciones existentes que no se pasan se conservan.
+        """
+        try:
+            fp = self.fingerprint(path)
+        except OSError:
+            return
+
+        merged = self.load(path) or {}
+        merged.update(sections)
+        entry = {
+            "version": self.FORMAT_VERSION,
+            "fingerprint": fp,
+            "source": os.path.abspath(path),
+            "created": time.time(),
+            "sections": merged
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Escritura atómica: un lector concurrente nunca ve un JSON a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(tmp_path, self._entry_path(fp["key"]))
+        except OSError:
+            self._remove(tmp_path)
+            return
+
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Elimina entradas sin uso por más de max_age_seconds y, si el directorio
+        sigue superando max_total_bytes, las menos usadas recientemente.
+        Retorna la cantidad de entradas eliminadas.
+        """
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        except OSError:
+            return 0
+
+        now = time.time()
+        removed = 0
+        entries = []
+        for name in names:
+            entry_path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(entry_path)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age_seconds:
+                removed += self._remove(entry_path)
+            else:
+                entries.append((st.st_mtime, st.st_size, entry_path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_total_bytes:
+                break
+            removed += self._remove(entry_path)
+            total -= size
+
+        return removed
+
+    def clear(self) -> None:
+        """Elimina todas las entradas del caché."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _remove(entry_path: str) -> int:
+        try:
+            os.remove(entry_path)
+            return 1
+        except OSError:
+            return 0
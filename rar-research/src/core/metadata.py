@@ -1,5 +1,7 @@
-import struct
-from typing import Tuple, Dict, Any, Optional
+import zlib
+import hashlib
+from typing import Tuple, Dict, Any, Optional, Iterator
+from . import codec
 
 class HeaderType:
     MAIN = 1
@@ -18,6 +20,72 @@ class HeaderFlags:
     CHILD = 0x0020
     INHERITED = 0x0040
 
+class MainFlags:
+    # Main Archive Header (Type 01)
+    VOLUME = 0x0001
+    VOLUME_NUMBER = 0x0002  # Hay campo Volume Number
+    SOLID = 0x0004
+    RECOVERY = 0x0008
+    LOCKED = 0x0010
+
+class LocatorFlags:
+    # Registro Locator (tipo 0x01) del Extra Area del Main Header
+    RECORD_TYPE = 0x01
+    QUICK_OPEN = 0x0001     # Hay offset del service header "QO"
+    RECOVERY = 0x0002       # Hay offset del recovery record
+
+class FileFlags:
+    # Cuerpo de los headers FILE (Type 02) y SERVICE (Type 03)
+    DIRECTORY = 0x0001
+    UTIME = 0x0002          # Hay MTime (Unix, 32 bits)
+    CRC32 = 0x0004          # Hay CRC32 de los datos desempaquetados
+    UNKNOWN_SIZE = 0x0008   # UnpSize no es confiable (archivo creado desde un stream)
+
+class HostOS:
+    WINDOWS = 0
+    UNIX = 1
+
+class CryptFlags:
+    # Encryption Header (Type 04) y registro File Encryption del Extra Area
+    RECORD_TYPE = 0x01     # Tipo del registro de encriptación en el Extra Area
+    PSW_CHECK = 0x0001     # Hay CheckValue (PswCheck + checksum)
+    TWEAKED_CHECKSUMS = 0x0002  # Los CRC/hash del archivo se transforman con la clave (MAC)
+
+class ExtraRecordType:
+    # Registros del Extra Area de los headers FILE y SERVICE (ver core.extra_records)
+    ENCRYPTION = 0x01
+    HASH = 0x02
+    HTIME = 0x03
+    VERSION = 0x04
+    REDIRECTION = 0x05
+    OWNER = 0x06
+    SERVICE_DATA = 0x07
+
+class HashType:
+    BLAKE2SP = 0x00
+
+class HTimeFlags:
+    UNIX_TIME = 0x0001      # Tiempos Unix de 32 bits en lugar de FILETIME de 64
+    MTIME = 0x0002
+    CTIME = 0x0004
+    ATIME = 0x0008
+    UNIX_NS = 0x0010        # Nanosegundos a continuación de los tiempos Unix
+
+class RedirectionType:
+    UNIX_SYMLINK = 1
+    WINDOWS_SYMLINK = 2
+    WINDOWS_JUNCTION = 3
+    HARD_LINK = 4
+    FILE_COPY = 5
+
+class OwnerFlags:
+    USER_NAME = 0x0001
+    GROUP_NAME = 0x0002
+    USER_ID = 0x0004
+    GROUP_ID = 0x0008
+
+_CRYPT_ONLY = frozenset((CryptFlags.RECORD_TYPE,))
+
 class Metadata:
     """
     Clase responsable de interpretar la estructura de bajo nivel de los bloques RAR.
@@ -31,73 +99,34 @@ class Metadata:
     def read_vint(data, offset=0):
         """
         Lee un entero de longitud variable (VINT) desde un buffer de bytes.
-        Retorna (valor, nuevos_bytes_leidos).
+        Retorna (valor, nuevos_bytes_leidos); (0, 0) si el buffer está truncado.
         """
-        value = 0
-        shift = 0
-        bytes_read = 0
-        
-        while offset + bytes_read < len(data):
-            byte = data[offset + bytes_read]
-            bytes_read += 1
-            
-            # Los 7 bits bajos son datos
-            value |= (byte & 0x7F) << shift
-            
-            # Si el bit alto es 0, es el último byte
-            if not (byte & 0x80):
-                break
-            
-            shift += 7
-            if shift > 64: # Protección contra VINTs malformados/maliciosos
-                raise ValueError("VINT demasiado largo")
-                
-        return value, bytes_read
+        return codec.read_vint(data, offset)
 
     def parse_header_base(self, raw_data):
         """
         Parsea la estructura base común de un bloque RAR5:
         [CRC32 (4)] [Size (VINT)] [Type (VINT)] [HeaderFlags (VINT)]
+        [ExtraAreaSize (VINT)]? [DataSize (VINT)]?
         
         Retorna un diccionario con los campos base y el tamaño total del header consumido.
         """
-        offset = 0
-        
-        # 1. CRC32 (4 bytes)
-        if len(raw_data) < 4:
-            return None, 0
-        crc = struct.unpack('<I', raw_data[0:4])[0]
-        offset += 4
-        
-        # 2. Header Size (VINT)
-        try:
-            size, v_len = self.read_vint(raw_data, offset)
-            offset += v_len
-        except IndexError:
+        base = codec.parse_base_header(raw_data)
+        if base is None:
             return None, 0
 
-        # 3. Header Type (VINT)
-        try:
-            header_type, v_len = self.read_vint(raw_data, offset)
-            offset += v_len
-        except IndexError:
-            return None, 0
-
-        # 4. Header Flags (VINT)
-        try:
-            flags, v_len = self.read_vint(raw_data, offset)
-            offset += v_len
-        except IndexError:
-            return None, 0
-            
+        header_type = base.type
         header_info = {
-            'crc': crc,
-            'header_size': size,
+            'crc': base.crc,
+            'header_size': base.header_size,
+            'size_len': base.size_len,
             'type': header_type,
-            'flags': flags,
-            'has_extra_area': bool(flags & HeaderFlags.EXTRA_AREA),
-            'has_data_area': bool(flags & HeaderFlags.DATA_AREA),
-            'header_data_offset': offset  # Donde terminan los campos base
+            'flags': base.flags,
+            'has_extra_area': base.has_extra,
+            'has_data_area': base.has_data,
+            'extra_size': base.extra_size,
+            'data_size': base.data_size,
+            'header_data_offset': base.body_offset  # Donde terminan los campos base
         }
         
         # Analizar flags específicos si es necesario
@@ -115,124 +144,163 @@ class Metadata:
         else:
             header_info['description'] = f"Unknown Header ({header_type})"
 
-        return header_info, offset
+        return header_info, base.body_offset
 
     def get_data_size(self, header_info, raw_data, offset):
         """
-        Si el header tiene área de datos, intenta leer su tamaño (PackSize).
-        El PackSize es otro VINT que aparece justo después de los campos base
-        si el flag DATA_AREA está activo.
+        Si el header tiene área de datos, retorna su tamaño (PackSize).
+        El codec ya lo decodifica junto con los campos base.
         """
         if not header_info['has_data_area']:
             return 0, 0
-            
-        try:
-            pack_size, v_len = self.read_vint(raw_data, offset)
-            return pack_size, v_len
-        except IndexError:
-            return 0, 0
+        return codec.read_vint(raw_data, offset)
 
-    def parse_encryption_header(self, raw_data: bytes, offset: int) -> Dict[str, Any]:
+    def parse_main_header(self, raw_data, offset: int) -> Dict[str, Any]:
         """
-        Extrae información específica del Encryption Header (Type 04).
-        Estructura Típica:
-        [Encryption Flags (VINT)]
-        [Salt (16 bytes) if flag set]
+        Extrae los campos del Main Archive Header (Type 01):
+        [ArchiveFlags (V)] [VolumeNumber (V) si MainFlags.VOLUME_NUMBER] [Extra Area]
+        'offset' es el fin de los campos base. El Extra Area se interpreta con parse_locator.
         """
         info = {}
-        current_offset = offset
-        
-        # 1. Encryption Flags
-        try:
-            enc_flags, v_len = self.read_vint(raw_data, current_offset)
-            current_offset += v_len
-            info['enc_flags'] = enc_flags
-        except IndexError:
+        archive_flags, length = self.read_vint(raw_data, offset)
+        if not length:
             return info
-
-        # Flag 0x01: Password Check?
-        # Flag 0x02: ?
-        # En RAR5, el salt está casi siempre presente salvo que se reutilice?
-        # Vamos a asumir presencia de Salt por defecto para este research scope
-        # (La spec completa es compleja, pero para CountCalory.rar seguro tiene salt)
-        
-        # Salt es 16 bytes
-        if len(raw_data) >= current_offset + 16:
-            salt = raw_data[current_offset : current_offset + 16]
-            info['salt'] = salt
-            current_offset += 16
-        
-        # Hay más campos como 'CheckValue' (para verificar password rápidamente)
-        # CheckValue (8 bytes?) - útil para 'validate_password' rápido sin descifrar todo
-        
+        info['archive_flags'] = archive_flags
+        pos = offset + length
+        if archive_flags & MainFlags.VOLUME_NUMBER:
+            info['volume_number'], length = self.read_vint(raw_data, pos)
+            pos += length
         return info
 
-    def parse_extra_area(self, raw_data: bytes) -> Dict[str, Any]:
+    def parse_locator(self, extra_data) -> Dict[str, Any]:
         """
-        Parsea el Extra Area buscando registros conocidos, especialmente Encriptación.
-        Retorna un dict con lo encontrado (ej. {'salt': ..., 'iv': ...}).
+        Busca el registro Locator en el Extra Area del Main Header:
+        [Flags (V)] [QuickOpenOffset (V)]? [RecoveryOffset (V)]?
+        Los offsets son relativos al inicio del Main Header.
         """
         info = {}
-        offset = 0
-        limit = len(raw_data)
-        
+        offset, limit = 0, len(extra_data)
         while offset < limit:
-            try:
-                # Extra Record Structure: [Size (VINT)] [Type (VINT)] [Data...]
-                rec_size, s_len = self.read_vint(raw_data, offset)
-                if rec_size == 0: break # Evitar bucle infinito si hay ceros
-                
-                type_offset = offset + s_len
-                rec_type, t_len = self.read_vint(raw_data, type_offset)
-                
-                # Payload start
-                payload_offset = type_offset + t_len
-                # Payload length = rec_size - s_len - t_len
-                
-                # Type 0x01 = Encryption
-                if rec_type == 0x01:
-                    # Empiric adjustment: Latest WinRAR puts a version/reserved byte (0x00) before flags
-                    # Check if next byte is 0x00 and flags are 0, might need to skip
-                    # RawEA example: 30 01 00 03 ... (Size, Type, 00, Flags=3)
-                    
-                    # Peek first byte of payload
-                    if payload_offset < limit and raw_data[payload_offset] == 0x00:
-                         # Read ahead to see if it makes sense
-                         if payload_offset + 1 < limit:
-                             next_byte = raw_data[payload_offset + 1]
-                             # If next byte looks like valid flags (e.g., 0x03), assume skip
-                             if next_byte & 0x03: 
-                                 payload_offset += 1
-                    
-                    enc_flags, f_len = self.read_vint(raw_data, payload_offset)
-                    current_p = payload_offset + f_len
-                    
-                    # print(f"[DEBUG] Enc Header Found. Flags: {bin(enc_flags)}")
-                    info['enc_flags'] = enc_flags
-                    
-                    # Parsear campos condicionales (Orden: Salt -> IV -> PswCheck)
-                    # Flags: 0x01=PswCheck, 0x02=Salt, 0x04=IV
-                    
-                    if enc_flags & 0x02: # Has Salt
-                        if limit >= current_p + 16:
-                            info['salt'] = raw_data[current_p : current_p + 16]
-                            current_p += 16
-                            
-                    if enc_flags & 0x04: # Has IV
-                        if limit >= current_p + 16:
-                            info['iv'] = raw_data[current_p : current_p + 16]
-                            current_p += 16
-                            
-                    if enc_flags & 0x01: # Has PswCheck
-                        # PswCheck es 8 bytes
-                        if limit >= current_p + 8:
-                            info['psw_check'] = raw_data[current_p : current_p + 8]
-                            current_p += 8
-                            
-                # Avanzar al siguiente record
-                offset += rec_size
-                
-            except Exception:
+            rec_size, s_len = self.read_vint(extra_data, offset)
+            if not s_len or rec_size == 0:
                 break
+            type_offset = offset + s_len
+            rec_end = type_offset + rec_size
+            if rec_end > limit:
+                break
+            rec_type, t_len = self.read_vint(extra_data, type_offset)
+            if rec_type == LocatorFlags.RECORD_TYPE and t_len:
+                pos = type_offset + t_len
+                flags, length = self.read_vint(extra_data, pos)
+                pos += length
+                if length and flags & LocatorFlags.QUICK_OPEN:
+                    info['quick_open_offset'], length = self.read_vint(extra_data, pos)
+                    pos += length
+                if length and flags & LocatorFlags.RECOVERY:
+                    info['recovery_offset'], length = self.read_vint(extra_data, pos)
+                if pos > rec_end:
+                    return {}
+            offset = rec_end
+        return info
+
+    def iter_quick_open_records(self, raw_data) -> Iterator[Tuple[int, Any]]:
+        """
+        Recorre los datos del service header "QO". Cada registro es:
+        [CRC32 (4)] [Size (V)] [Flags (V)] [Offset (V)] [HeaderSize (V)] [Header]
+        El CRC cubre desde Size hasta el final del registro; Offset es la distancia
+        hacia atrás desde el inicio del service header QO hasta el header cacheado.
+        Genera (offset, header); lanza ValueError si un registro es inconsistente.
+        """
+        pos, limit = 0, len(raw_data)
+        while pos < limit:
+            if pos + 4 > limit:
+                raise ValueError("Registro QO truncado")
+            crc = int.from_bytes(raw_data[pos:pos + 4], 'little')
+            rec_size, s_len = self.read_vint(raw_data, pos + 4)
+            rec_start = pos + 4 + s_len
+            rec_end = rec_start + rec_size
+            if not s_len or rec_end > limit:
+                raise ValueError("Registro QO truncado")
+            if zlib.crc32(raw_data[pos + 4:rec_end]) != crc:
+                raise ValueError(f"CRC inválido en registro QO (offset {pos})")
+            fields, length = codec.read_vints(raw_data, rec_start, 3)
+            if fields is None:
+                raise ValueError("Registro QO truncado")
+            _flags, back_offset, header_size = fields
+            header_start = rec_start + length
+            if header_start + header_size > rec_end:
+                raise ValueError("Header cacheado excede su registro QO")
+            yield back_offset, raw_data[header_start:header_start + header_size]
+            pos = rec_end
+
+    def parse_file_header(self, raw_data, offset: int, limit: int) -> Optional[codec.FileHeader]:
+        """
+        Extrae los campos del File Header (Type 02) o Service Header (Type 03):
+        tamaño desempaquetado, atributos, mtime, CRC, CompInfo, HostOS y nombre.
+        'offset' es el fin de los campos base y 'limit' el inicio del Extra Area.
+        """
+        return codec.parse_file_header(raw_data, offset, limit)
+
+    def parse_encryption_header(self, raw_data: bytes, offset: int) -> Dict[str, Any]:
+        """
+        Extrae información específica del Archive Encryption Header (Type 04),
+        presente cuando los headers están cifrados (-hp):
+        [Version (VINT)] [Flags (VINT)] [KDF Count (1)] [Salt (16)] [CheckValue (12) si flag 0x01]
+        """
+        return self._parse_crypt_fields(raw_data, offset, len(raw_data), has_iv=False)
+
+    def parse_extra_area(self, raw_data: bytes) -> Dict[str, Any]:
+        """
+        Busca el registro de encriptación en el Extra Area y retorna sus campos
+        (ej. {'salt': ..., 'iv': ...}); dict vacío si no lo hay.
+        Los demás registros solo se saltean (Size y Type): no se decodifican.
+        """
+        info = {}
+        for _, start, end in codec.scan_extra_records(raw_data, _CRYPT_ONLY):
+            info.update(self._parse_crypt_fields(raw_data, start, end, has_iv=True))
+        return info
+
+    def parse_extra_records(self, raw_data) -> list:
+        """
+        Todos los registros del Extra Area como vistas perezosas (core.extra_records):
+        cada una decodifica sus campos recién cuando se accede a ellos.
+        """
+        from .extra_records import iter_records
+        return list(iter_records(raw_data))
+
+    @staticmethod
+    def _parse_crypt_fields(raw_data, offset: int, limit: int, has_iv: bool) -> Dict[str, Any]:
+        """
+        Campos comunes del Encryption Header y del registro File Encryption:
+        [Version (V)] [Flags (V)] [KDF Count (1)] [Salt (16)] [IV (16), solo en archivos]
+        [CheckValue (12) si CryptFlags.PSW_CHECK]
+
+        El CheckValue son 8 bytes de PswCheck + 4 bytes de SHA-256(PswCheck);
+        si la suma no coincide, el PswCheck se ignora (mismo criterio que unrar).
+        Salt/IV/PswCheck se retornan como slices de raw_data (sin copia si es memoryview).
+        """
+        info = {}
+        fields, length = codec.read_vints(raw_data, offset, 2)
+        if fields is None:
+            return info
+        info['enc_version'], info['enc_flags'] = fields
+        pos = offset + length
+
+        if pos + 1 + 16 > limit:
+            return info
+        info['kdf_count'] = raw_data[pos]
+        info['salt'] = raw_data[pos + 1 : pos + 17]
+        pos += 17
+
+        if has_iv:
+            if pos + 16 > limit:
+                return info
+            info['iv'] = raw_data[pos : pos + 16]
+            pos += 16
+
+        if info['enc_flags'] & CryptFlags.PSW_CHECK and pos + 12 <= limit:
+            psw_check = raw_data[pos : pos + 8]
+            if hashlib.sha256(psw_check).digest()[:4] == raw_data[pos + 8 : pos + 12]:
+                info['psw_check'] = psw_check
                 
         return info
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Tuple
+from .metadata import HeaderType
 
 @dataclass(frozen=True)
 class CryptoProfile:
@@ -23,3 +24,208 @@ class EncryptedEntry:
     salt: Optional[bytes] = None # Salt específico de este archivo (si existe)
     iv: Optional[bytes] = None   # Vector de inicialización (si existe)
     filename: str = "Unknown"    # Nombre del archivo para referencia
+    psw_check: Optional[bytes] = None # Valor de verificación de contraseña (si existe)
+    parts: Optional[Tuple[Tuple[str, int, int], ...]] = None  # (volumen, offset, tamaño) en archivos partidos
+
+    def materialize(self):
+        """
+        Convierte a bytes los campos que aún son memoryview (modo mmap del parser).
+        Después de esto la entrada ya no depende del archivo mapeado.
+        """
+        for name in ('salt', 'iv', 'psw_check'):
+            value = getattr(self, name)
+            if isinstance(value, memoryview):
+                setattr(self, name, value.tobytes())
+
+class BlockRecord:
+    """
+    Registro compacto de un bloque RAR5, emitido por RarParser.iter_blocks().
+    Usa __slots__ para que recorrer archivos con millones de bloques no
+    pague un dict por registro.
+    """
+    __slots__ = ('offset', 'type', 'flags', 'header_size', 'data_size',
+                 'salt', 'iv', 'psw_check', 'kdf_count', 'enc_flags', 'file', 'volume', 'parts', 'extra')
+
+    def __init__(self, offset: int, type: int, flags: int, header_size: int, data_size: int,
+                 salt: Optional[bytes] = None, iv: Optional[bytes] = None,
+                 psw_check: Optional[bytes] = None, kdf_count: Optional[int] = None,
+                 enc_flags: Optional[int] = None):
+        self.offset = offset            # Offset absoluto del bloque (inicio del CRC)
+        self.type = type                # HeaderType
+        self.flags = flags              # Flags comunes del header
+        self.header_size = header_size  # Tamaño total del header (CRC incluido)
+        self.data_size = data_size      # Tamaño del área de datos (0 si no tiene)
+        self.salt = salt                # Campos criptográficos opcionales
+        self.iv = iv                    # (memoryview en modo mmap)
+        self.psw_check = psw_check
+        self.kdf_count = kdf_count      # log2 de las iteraciones PBKDF2
+        self.enc_flags = enc_flags      # CryptFlags del registro
+        self.file = None                # codec.FileHeader en bloques FILE/SERVICE
+        self.volume = 0                 # Volumen que contiene el bloque (core.volume_set)
+        self.parts = None               # Tramos (volumen, offset, tamaño) de una entrada partida
+        self.extra = None               # Extra Area completo (solo con keep_extra_records)
+
+    @property
+    def data_offset(self) -> int:
+        """Offset absoluto donde comienza el área de datos."""
+        return self.offset + self.header_size
+
+    def extra_records(self) -> list:
+        """Registros del Extra Area como vistas perezosas (vacío si no se conservó)."""
+        if self.extra is None:
+            return []
+        from .extra_records import iter_records
+        return list(iter_records(self.extra))
+
+    @property
+    def has_crypto(self) -> bool:
+        """True si el bloque trae un registro de encriptación (salt o PswCheck)."""
+        return self.salt is not None or self.psw_check is not None
+
+    def __repr__(self):
+        return (f"<BlockRecord offset={self.offset} type={self.type} flags={hex(self.flags)} "
+                f"header={self.header_size} data={self.data_size} crypto={self.has_crypto}>")
+
+
+@dataclass(frozen=True)
+class CryptoRecord:
+    """
+    Registro de encriptación RAR5 ya decodificado: el Archive Encryption Header
+    (headers cifrados, -hp) o el registro File Encryption de una entrada.
+    """
+    block_offset: int                # Offset del bloque que contiene el registro
+    header_encrypted: bool           # True si proviene del Encryption Header (Type 04)
+    flags: int                       # CryptFlags
+    kdf_count: int                   # log2 de las iteraciones PBKDF2
+    salt: bytes
+    iv: Optional[bytes] = None       # En headers cifrados, el IV que precede al primer header
+    psw_check: Optional[bytes] = None
+
+    @property
+    def key(self) -> Tuple[bytes, int, Optional[bytes]]:
+        """(salt, KDF Count, PswCheck): registros con la misma clave comparten contraseña y derivación."""
+        return (self.salt, self.kdf_count, self.psw_check)
+
+    @property
+    def key_iterations(self) -> int:
+        """Iteraciones PBKDF2 para derivar la clave AES."""
+        return 1 << self.kdf_count
+
+    @property
+    def iterations(self) -> int:
+        """Iteraciones PBKDF2 hasta el PswCheck (lo que paga cada candidato)."""
+        return (1 << self.kdf_count) + 32
+
+    def hashcat_format(self) -> Optional[str]:
+        """
+        String para hashcat modo 13000:
+        $rar5$16$<salt>$<kdf count>$<iv>$8$<pswcheck>
+        Sin PswCheck no hay nada que atacar offline y se retorna None.
+        """
+        if self.psw_check is None:
+            return None
+        iv = self.iv if self.iv is not None else bytes(16)
+        return (f"$rar5${len(self.salt)}${self.salt.hex()}${self.kdf_count}$"
+                f"{iv.hex()}${len(self.psw_check)}${self.psw_check.hex()}")
+
+@dataclass(frozen=True)
+class CryptoGroup:
+    """
+    Registros de encriptación con la misma clave (salt, KDF Count, PswCheck).
+    Un candidato se prueba una sola vez por grupo: un PBKDF2 cubre todas sus entradas.
+    """
+    record: CryptoRecord                 # Primer registro del grupo (el que se exporta a hashcat)
+    record_indices: Tuple[int, ...]      # Índices en ArchiveModel.crypto_records
+    entries: Tuple[int, ...]             # Filas de la EntryTable cifradas con esta clave
+
+    @property
+    def key(self) -> Tuple[bytes, int, Optional[bytes]]:
+        return self.record.key
+
+    def hashcat_format(self) -> Optional[str]:
+        return self.record.hashcat_format()
+
+@dataclass(frozen=True)
+class ArchiveModel:
+    """
+    Resultado inmutable de analizar un archivo RAR una sola vez.
+    Lo consumen el CLI, el extractor de hashcat, los motores y el ExecutionManager,
+    de modo que ninguno vuelve a recorrer los headers.
+    """
+    path: str
+    version: Optional[str]
+    table: "EntryTable"              # Entradas FILE/SERVICE en columnas (core.entry_table)
+    crypto_records: Tuple[CryptoRecord, ...]
+    complete: bool                   # False si el análisis se detuvo en el primer registro
+    errors: Tuple = ()               # MalformedBlockError encontrados (sin recover, el recorrido termina en el primero)
+    volumes: Tuple[str, ...] = ()    # Rutas de los volúmenes recorridos (vacío si no es multivolumen)
+
+    @property
+    def is_encrypted(self) -> bool:
+        return bool(self.crypto_records)
+
+    @property
+    def header_encrypted(self) -> bool:
+        return any(r.header_encrypted for r in self.crypto_records)
+
+    @property
+    def primary_record(self) -> Optional[CryptoRecord]:
+        """Primer registro con PswCheck (el atacable), o el primero a secas."""
+        for record in self.crypto_records:
+            if record.psw_check is not None:
+                return record
+        return self.crypto_records[0] if self.crypto_records else None
+
+    @property
+    def hashcat_hash(self) -> Optional[str]:
+        record = self.primary_record
+        return record.hashcat_format() if record else None
+
+    def crypto_groups(self) -> Tuple[CryptoGroup, ...]:
+        """
+        Registros agrupados por clave, en orden de aparición, con las entradas de cada uno.
+        Un archivo actualizado o ampliado con otra contraseña da un grupo por contraseña;
+        con salt por entrada, uno por entrada. Si el análisis se detuvo en el primer
+        registro (complete=False), solo refleja lo recorrido.
+        """
+        groups = {}
+        record_entries = []
+        for index, record in enumerate(self.crypto_records):
+            group = groups.setdefault(record.key, (record, [], []))
+            group[1].append(index)
+            record_entries.append(group[2])
+        for row, crypto_index in enumerate(self.table.crypto_index):
+            if crypto_index >= 0:
+                record_entries[crypto_index].append(row)
+        return tuple(CryptoGroup(record, tuple(indices), tuple(entries))
+                     for record, indices, entries in groups.values())
+
+    @property
+    def hashcat_hashes(self) -> Tuple[str, ...]:
+        """Un string de hashcat por clave distinta con PswCheck."""
+        hashes = (group.hashcat_format() for group in self.crypto_groups())
+        return tuple(h for h in hashes if h is not None)
+
+    def first_encrypted_entry(self) -> Optional[EncryptedEntry]:
+        """Primera entrada cifrada con área de datos, materializada desde la tabla."""
+        for index in self.table.filter(encrypted=True, header_type=HeaderType.FILE):
+            if self.table.packed_size[index]:
+                return self.table.entry(index, self.crypto_records, self.volumes)
+        return None
+
+    def crypto_profile(self):
+        """Construye el CryptoProfile (core.crypto_profile) que usan los reportes."""
+        from .crypto_profile import CryptoProfile as Profile
+
+        profile = Profile()
+        record = self.primary_record
+        if record is None:
+            return profile
+        if record.header_encrypted:
+            profile.set_header_encrypted(True)
+        else:
+            profile.set_encrypted(True)
+        profile.set_salt(record.salt)
+        profile.set_iterations(record.iterations)
+        profile.psw_check_value = record.psw_check
+        return profile
@@ -1,18 +1,125 @@
-import struct
 import os
-from typing import Optional, List
-from .metadata import Metadata, HeaderType
+import re
+import zlib
+import heapq
+import mmap
+import logging
+from typing import Optional, List, Iterator, Tuple
+from .metadata import Metadata, HeaderType, HeaderFlags
 from crypto_engine.crypto_context import CryptoContext
-from .models import EncryptedEntry
+from .models import EncryptedEntry, BlockRecord
+from .index_cache import IndexCache
+from . import codec
+from .codec import FileHeader
+from .block_reader import BlockReader
+from crypto_engine.execution_limits import ExecutionLimits
+
+logger = logging.getLogger(__name__)
+
+class MalformedBlockError(ValueError):
+    """
+    Bloque RAR5 que viola la estructura del formato.
+    'reason' es uno de los códigos de la clase; 'offset' es el inicio del bloque.
+    """
+
+    TRUNCATED_HEADER = "truncated_header"
+    VINT_OVERFLOW = "vint_overflow"
+    INVALID_HEADER_SIZE = "invalid_header_size"
+    HEADER_TOO_LARGE = "header_too_large"
+    DATA_OUT_OF_BOUNDS = "data_out_of_bounds"
+    MISSING_END = "missing_end_of_archive"
+    MISSING_VOLUME = "missing_volume"
+    BAD_CRC = "bad_header_crc"
+
+    def __init__(self, offset: int, reason: str, detail: str = "", block_type: Optional[int] = None):
+        super().__init__(f"Bloque malformado en offset {offset} ({reason}): {detail}")
+        self.offset = offset
+        self.reason = reason
+        self.detail = detail
+        self.block_type = block_type
+
+    def to_dict(self) -> dict:
+        return {
+            "offset": self.offset,
+            "reason": self.reason,
+            "detail": self.detail,
+            "block_type": self.block_type
+        }
 
 class RarParser:
     # Firmas de archivo según especificación
     RAR5_SIGNATURE = b'\x52\x61\x72\x21\x1A\x07\x01\x00' # Rar!\x1a\x07\x01\x00
     RAR4_SIGNATURE = b'\x52\x61\x72\x21\x1A\x07\x00'     # Rar!\x1a\x07\x00
 
-    def __init__(self, file_path):
+    # Bytes mínimos disponibles al decodificar los campos base de un header
+    # (CRC, Size, Type, Flags, ExtraSize, DataSize); el resto se pide si hace falta
+    HEADER_WINDOW = 64
+
+    # La especificación limita el header (desde Type) a 2 MB
+    MAX_HEADER_SIZE = 2 * 1024 * 1024
+
+    # Nombre del service header de quick open
+    QUICK_OPEN_NAME = b"QO"
+
+    # Cada cuántos bloques (o candidatos de resincronización) se consulta ExecutionLimits
+    LIMITS_CHECK_INTERVAL = 256
+
+    # Type + Flags que se buscan al resincronizar: headers FILE (también directorios y
+    # tramos de volumen), SERVICE y End of Archive. Cada patrón empieza con un byte literal,
+    # así que el motor de re lo busca con memchr (cientos de MB/s) en lugar de probar cada offset.
+    RESYNC_PATTERNS = (
+        re.compile(rb'\x02[\x00-\x03\x0a\x0b\x12\x13\x1a\x1b]'),
+        re.compile(rb'\x03[\x02\x03\x06\x07]'),
+        re.compile(rb'\x05\x00'),
+    )
+
+    def __init__(self, file_path, use_mmap: bool = False, use_cache: bool = True,
+                 index_cache: Optional[IndexCache] = None, strict: bool = False,
+                 limits: Optional[ExecutionLimits] = None, use_quick_open: bool = True,
+                 readahead: int = BlockReader.DEFAULT_READAHEAD, keep_extra_records: bool = False,
+                 verify_crc: bool = False, recover: bool = False):
+        """
+        Args:
+            file_path: Ruta al archivo RAR.
+            use_mmap: Si es True, mapea el archivo en memoria y recorre los headers
+                      con slices de memoryview (sin read/seek ni copias por bloque).
+                      Salt/IV/PswCheck de las entradas quedan como memoryview hasta
+                      que el llamador los convierte o se cierra el parser.
+            use_cache: Si es False, ignora el índice persistido y siempre recorre el archivo.
+            index_cache: Caché a utilizar (por defecto, el directorio de usuario).
+            strict: Si es True, un bloque malformado lanza MalformedBlockError;
+                    si no, se registra en self.errors y el recorrido termina ahí.
+            limits: ExecutionLimits cuyo timeout acota el recorrido (TimeoutError).
+            use_quick_open: Si el Main Header trae el registro Locator, lista las entradas
+                            desde el service header "QO" en lugar de recorrer todo el archivo.
+            readahead: Tamaño máximo del buffer secuencial del modo clásico: los headers
+                       se sirven desde una sola lectura grande (ver BlockReader).
+            keep_extra_records: Conserva el Extra Area de cada entrada en 'block.extra' para
+                                decodificar todos sus registros (core.extra_records). El índice
+                                en caché no lo guarda, así que en ese modo no se usa para leer.
+            verify_crc: Verifica el CRC32 de cada header; uno inválido es un bloque malformado
+                        (BAD_CRC). Desactiva quick open y el índice en caché.
+            recover: Ante un bloque malformado, busca el siguiente header cuyo CRC coincida y
+                     sigue desde ahí (implica verify_crc). Cada daño queda en self.errors.
+        """
         self.file_path = file_path
+        self.strict = strict
+        self.limits = limits
+        self.use_quick_open = use_quick_open
+        self.quick_open_used = False
+        self.errors: List["MalformedBlockError"] = []
+        self.recover = recover
+        self.verify_crc = verify_crc or recover
+        # El índice guarda el recorrido sin verificar: no sirve ni se pisa en estos modos
+        use_cache = use_cache and not self.verify_crc
+        self.index_cache = (index_cache or IndexCache()) if use_cache else None
         self.file_obj = None
+        self.use_mmap = use_mmap
+        self._mmap = None
+        self._view = None
+        self.readahead = readahead
+        self.keep_extra_records = keep_extra_records
+        self._reader: Optional[BlockReader] = None
         self.version = None
         self.metadata = Metadata()
         self.crypto_context = CryptoContext(algorithm="AES-256") # Default RAR5
@@ -35,8 +142,30 @@ class RarParser:
             raise FileNotFoundError(f"El archivo {self.file_path} no existe.")
         self.file_obj = open(self.file_path, 'rb')
 
+        if self.use_mmap:
+            # mmap no admite archivos vacíos; esos los rechaza _validate_signature
+            if os.fstat(self.file_obj.fileno()).st_size > 0:
+                self._mmap = mmap.mmap(self.file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+
     def close(self):
         """Cierra el archivo si está abierto."""
+        # Las entradas retienen slices del mapa o del buffer de lectura: se copian
+        for entry in self.entries:
+            entry.materialize()
+
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Un llamador aún retiene una vista; el mapa se libera con ella
+                pass
+            self._mmap = None
+
         if self.file_obj:
             self.file_obj.close()
             self.file_obj = None
@@ -44,26 +173,177 @@ class RarParser:
     def parse(self):
         """
         Método principal para parsear el archivo.
-        Valida la firma y detecta la versión.
+        Recorre todos los bloques y registra las entradas de archivo encontradas.
+        """
+        for block in self.iter_blocks():
+            entry = self.build_entry(block)
+            if entry:
+                self.entries.append(entry)
+                logger.debug("   -> Registrada entrada: Offset Data=%d, Size=%d, Encrypted=%s",
+                             entry.offset, entry.size, entry.is_encrypted)
+
+    def iter_blocks(self) -> Iterator[BlockRecord]:
         """
+        Genera los bloques del archivo bajo demanda, en orden.
+        Valida la firma y detecta la versión; el contexto criptográfico se actualiza
+        a medida que aparecen registros de encriptación, de modo que el llamador
+        puede detenerse en el primero sin recorrer el resto del archivo.
+
+        Si el archivo trae quick open (registro Locator + service header "QO"), los
+        headers se toman de ahí sin recorrer las áreas de datos; si falta o es
+        inconsistente, se recorre el archivo completo.
+
+        Si el índice del archivo está en caché, los bloques se reproducen desde él
+        sin leer el archivo. Si el índice quedó incompleto (un recorrido anterior se
+        detuvo antes del final), el recorrido continúa desde el último bloque conocido.
+        """
+        walked: List[BlockRecord] = []
+        start_pos = len(self.RAR5_SIGNATURE)
+        self.errors = []
+        if self.limits:
+            self.limits.start_timer()
+
+        sections = None
+        if self.index_cache and not self.keep_extra_records:
+            sections = self.index_cache.load(self.file_path)
+        cached = sections.get('parser') if sections else None
+        if cached:
+            logger.info("Índice en caché para %s", self.file_path)
+            for block in self._replay_index(cached):
+                walked.append(block)
+                yield block
+            # Un índice que termina en CRYPT/ENDARC ya no tiene nada que recorrer
+            if cached['complete'] or self._is_terminal(walked):
+                return
+            start_pos = cached['next_offset']
+        known = len(walked)
+
         ensure_open = False
         if not self.file_obj:
             self.open()
             ensure_open = True
 
+        complete = False
         try:
             self._validate_signature()
-            print(f"[INFO] Archivo validado. Versión detectada: {self.version}")
+            logger.info("Archivo validado. Versión detectada: %s", self.version)
             
-            if self.version == "RAR5":
-                self._read_rar5_blocks()
+            quick = None
+            if self.version == "RAR5" and self.use_quick_open and not self.verify_crc \
+                    and start_pos == len(self.RAR5_SIGNATURE):
+                quick = self._quick_open_blocks()
+
+            if quick is not None:
+                self.quick_open_used = True
+                for block in quick:
+                    walked.append(block)
+                    yield block
+            elif self.version == "RAR5":
+                for block in self._iter_rar5_blocks(start_pos):
+                    walked.append(block)
+                    yield block
             elif self.version == "RAR4":
-                print("[WARN] Soporte limitado para RAR4. Se recomienda RAR5.")
+                logger.warning("Soporte limitado para RAR4. Se recomienda RAR5.")
+            complete = True
             
         finally:
+            # También se guarda el prefijo recorrido si el llamador se detuvo antes
+            if complete or len(walked) > known:
+                self._store_index(walked, complete or self._is_terminal(walked))
             if ensure_open:
                 self.close()
 
+    @staticmethod
+    def _is_terminal(blocks: List[BlockRecord]) -> bool:
+        """
+        True si el último bloque cierra el recorrido: después de CRYPT los headers
+        están cifrados y después de ENDARC no hay más bloques.
+        """
+        return bool(blocks) and blocks[-1].type in (HeaderType.CRYPT, HeaderType.ENDARC)
+
+    def _store_index(self, blocks: List[BlockRecord], complete: bool):
+        """Persiste la tabla de bloques (con sus campos criptográficos) en el caché."""
+        if not self.index_cache:
+            return
+
+        def _hex(value):
+            return value.hex() if value is not None else None
+
+        def _file_row(file_info):
+            if file_info is None:
+                return None
+            return list(file_info[:-1]) + [file_info.name.hex()]
+
+        last = blocks[-1] if blocks else None
+        self.index_cache.store(self.file_path, parser={
+            'version': self.version,
+            'complete': complete,
+            'errors': [e.to_dict() for e in self.errors],
+            'next_offset': last.data_offset + last.data_size if last else len(self.RAR5_SIGNATURE),
+            'blocks': [[b.offset, b.type, b.flags, b.header_size, b.data_size,
+                        _hex(b.salt), _hex(b.iv), _hex(b.psw_check),
+                        b.kdf_count, b.enc_flags, _file_row(b.file)] for b in blocks]
+        })
+
+    def _replay_index(self, index: dict) -> Iterator[BlockRecord]:
+        """
+        Reconstruye los bloques desde el caché, replicando la captura criptográfica.
+        En modo estricto, el primer bloque malformado registrado se lanza en su
+        posición, igual que en un recorrido sin caché.
+        """
+        self.version = index['version']
+        self.errors = [MalformedBlockError(**e) for e in index['errors']]
+        first_error = min(self.errors, key=lambda e: e.offset) if self.strict and self.errors else None
+        for row in index['blocks']:
+            block = BlockRecord(*row[:5])
+            if first_error is not None and block.offset >= first_error.offset:
+                raise first_error
+            if row[10] is not None:
+                block.file = FileHeader(*row[10][:-1], bytes.fromhex(row[10][-1]))
+            crypto_info = {name: bytes.fromhex(value)
+                           for name, value in zip(('salt', 'iv', 'psw_check'), row[5:8])
+                           if value is not None}
+            for name, value in zip(('kdf_count', 'enc_flags'), row[8:10]):
+                if value is not None:
+                    crypto_info[name] = value
+            if crypto_info:
+                self._capture_crypto(block, crypto_info)
+            yield block
+        if first_error is not None:
+            raise first_error
+
+    def build_entry(self, block: BlockRecord) -> Optional[EncryptedEntry]:
+        """
+        Construye la EncryptedEntry de un bloque FILE con área de datos.
+        Retorna None para cualquier otro tipo de bloque.
+        """
+        if block.type != HeaderType.FILE or not (block.flags & HeaderFlags.DATA_AREA):
+            return None
+
+        salt, iv, psw_check = block.salt, block.iv, block.psw_check
+        # Un registro File Encryption siempre trae salt; el PswCheck es opcional.
+        # (Con headers cifrados el recorrido termina en el header CRYPT, así que
+        # aquí no hace falta heredar el salt global.)
+        is_file_encrypted = salt is not None
+
+        file_info = block.file
+        if file_info is not None:
+            filename = bytes(file_info.name).decode('utf-8', errors='replace')
+            original_size = file_info.unpacked_size
+        else:
+            filename, original_size = f"File_at_{block.offset}", 0
+
+        return EncryptedEntry(
+            offset=block.data_offset,
+            size=block.data_size,
+            original_size=original_size,
+            is_encrypted=is_file_encrypted,
+            salt=salt,
+            iv=iv,
+            filename=filename,
+            psw_check=psw_check
+        )
+
     def get_crypto_context(self) -> CryptoContext:
         """Retorna el contexto criptográfico extraído."""
         return self.crypto_context
@@ -84,9 +364,8 @@ class RarParser:
 
     def _validate_signature(self):
         """Lee los primeros bytes para validar la firma RAR."""
-        self.file_obj.seek(0)
-        # Leemos 8 bytes (longitud de la firma RAR5)
-        signature_candidate = self.file_obj.read(8)
+        # 8 bytes (longitud de la firma RAR5); en modo clásico, la misma lectura trae el Main Header
+        signature_candidate = bytes(self._read_range(0, 8))
 
         if signature_candidate == self.RAR5_SIGNATURE:
             self.version = "RAR5"
@@ -95,154 +374,415 @@ class RarParser:
         else:
             raise ValueError("Firma inválida. No es un archivo RAR válido o versión desconocida.")
 
-    def _read_rar5_blocks(self):
+    def block_reader(self) -> BlockReader:
+        """BlockReader del modo clásico, ligado al file_obj actual."""
+        if self._reader is None or self._reader.file_obj is not self.file_obj:
+            self._reader = BlockReader(self.file_obj, self.readahead)
+        return self._reader
+
+    def io_stats(self) -> Optional[dict]:
+        """Contadores de I/O del último recorrido en modo clásico (None en modo mmap)."""
+        return self._reader.stats() if self._reader is not None else None
+
+    def _file_size(self) -> int:
+        return len(self._view) if self._view is not None else self.block_reader().size
+
+    def _header_buffer(self, pos: int):
+        """
+        Retorna el buffer del header que empieza en 'pos', o None al final del archivo.
+        En modo mmap es un slice de memoryview (sin copia) hasta el final del archivo;
+        en modo clásico, una vista del buffer de readahead con al menos HEADER_WINDOW
+        bytes (o hasta el final del archivo).
+        """
+        if self._view is not None:
+            if pos + 4 > len(self._view):
+                return None
+            return self._view[pos:]
+
+        header_buffer = self.block_reader().window(pos, self.HEADER_WINDOW)
+        if len(header_buffer) < 4:
+            return None
+        return header_buffer
+
+    def _malformed(self, offset: int, reason: str, detail: str, block_type: Optional[int] = None):
+        """
+        Registra un bloque malformado. En modo estricto lanza MalformedBlockError;
+        si no, lo agrega a self.errors y el recorrido se detiene en ese offset.
+        """
+        error = MalformedBlockError(offset, reason, detail, block_type)
+        if self.strict:
+            raise error
+        logger.warning("%s", error)
+        self.errors.append(error)
+
+    def _iter_rar5_blocks(self, start_pos: int) -> Iterator[BlockRecord]:
         """
         Itera sobre los bloques RAR5 utilizando Metadata para interpretarlos.
-        Busca específicamente headers de encriptación.
+
+        Garantías frente a archivos corruptos o maliciosos:
+        - Cada bloque avanza la posición (nunca se relee el mismo offset).
+        - Un header se valida contra el tamaño del archivo antes de leerlo, y nunca
+          supera MAX_HEADER_SIZE: el trabajo por bloque es proporcional a su header.
+        - Si se pasó ExecutionLimits, el timeout se verifica cada LIMITS_CHECK_INTERVAL bloques.
         """
-        print("[INFO] Iniciando lectura de bloques RAR5...")
+        logger.debug("Iniciando lectura de bloques RAR5 en offset %d...", start_pos)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        file_size = self._file_size()
         
+        current_pos = start_pos
+        count = 0
         while True:
-            current_pos = self.file_obj.tell()
-            
-            # Lectura preliminar
-            raw_peek = self.file_obj.read(16)
-            if not raw_peek or len(raw_peek) < 4:
-                break 
-            
-            self.file_obj.seek(current_pos)
-            
-            # Buffer seguro para header
-            header_buffer = self.file_obj.read(512) # Aumentado para cubrir Salt
-            if not header_buffer:
+            count += 1
+            if self.limits and count % self.LIMITS_CHECK_INTERVAL == 0:
+                self.limits.check_limits()
+
+            if current_pos >= file_size:
+                self._malformed(current_pos, MalformedBlockError.MISSING_END,
+                                "El archivo termina sin End of Archive")
                 break
 
-            header_info, bytes_consumed = self.metadata.parse_header_base(header_buffer)
-            
-            if not header_info:
-                print(f"[ERROR] No se pudo parsear el header en offset {current_pos}")
+            block, problem = self._next_block(current_pos, file_size, debug)
+            if problem:
+                self._malformed(current_pos, *problem)
+                resumed = self._resync(current_pos + 1, file_size) if self.recover else None
+                if resumed is None:
+                    break
+                logger.warning("Recorrido resincronizado en el offset %d", resumed)
+                current_pos = resumed
+                continue
+
+            if block.type == HeaderType.CRYPT:
+                # Los headers siguientes están cifrados: no se pueden recorrer
+                yield block
                 break
-                
-            print(f"[BLOCK] Offset: {current_pos} | Tipo: {header_info['description']}")
-            print(f"   -> Flags: {hex(header_info['flags'])} | Extra: {header_info['has_extra_area']} | Data: {header_info['has_data_area']}")
-            
-            # --- CAPTURA DE INFO CRIPTOGRÁFICA ---
-            if header_info['type'] == HeaderType.CRYPT:
-                print("   -> Detectado Header de Encriptación")
-                # El offset 'bytes_consumed' apunta justo después de los flags
-                crypto_info = self.metadata.parse_encryption_header(header_buffer, bytes_consumed)
-                
-                if 'salt' in crypto_info:
-                    print(f"   -> Salt encontrado: {crypto_info['salt'].hex()}")
-                    self.crypto_context.params['salt'] = crypto_info['salt']
-                    self.crypto_context.params['iterations'] = 32800 # Hardcoded RAR5 default por ahora
-                
-                if 'psw_check' in crypto_info:
-                    print(f"   -> PswCheck encontrado: {crypto_info['psw_check'].hex()}")
-                    self.crypto_context.params['psw_check'] = crypto_info['psw_check']
-                    
-            # --- SALTO DE BLOQUE ---
-            # Calcular tamaño total para saltar
-            header_size_val = header_info['header_size']
-            
-            # Recalcular offset del campo Size para ser precisos
-            # CRC(4) + Size(V) -> desde aquí sumamos header_size_val
-            _, size_len = self.metadata.read_vint(header_buffer, 4)
-            
-            block_content_start = current_pos + 4 + size_len
-            header_end_pos = block_content_start + header_size_val
-            
-            # Si hay datos adjuntos (FILE header con contenido), sumamos data_size
-            data_size = 0
-            
-            # Variables temporales para construir la entrada
-            entry_salt = None
-            entry_iv = None
-            is_file_encrypted = False
-
-            if header_info['has_data_area']:
-                # Necesitamos leer PackSize para saber cuánto saltar de datos
-                # PackSize está después de los campos base y extra area...
-                
-                # Cursor inicia después de Flags (bytes_consumed)
-                cursor = bytes_consumed 
-                
-                # Si tiene Extra Area, primero viene el campo ExtraAreaSize
-                if header_info['has_extra_area']:
-                     try:
-                        extra_size, extra_len = self.metadata.read_vint(header_buffer, cursor)
-                        cursor += extra_len
-                        
-                        # Intentar leer el contenido del Extra Area (al final del header)
-                        # header_size_val es el tamaño del header SIN incluir CRC ni el propio campo Size
-                        # Estructura: [CRC(4)] [Size(V)] [HeaderData...]
-                        # Fin del header relativo al inicio (CRC) = 4 + size_len + header_size_val
-                        end_of_header_idx = 4 + size_len + header_size_val
-                        
-                        if extra_size > 0 and end_of_header_idx <= len(header_buffer):
-                            # print(f"   -> Header Size: {header_size_val} | Extra Size: {extra_size}")
-                            # print(f"   -> Header Buffer (first 120): {header_buffer[:120].hex()}")
-                            
-                            ea_start_idx = end_of_header_idx - extra_size
-                            
-                            # Corrección heurística para CountCalory.rar (offset off-by-one observado)
-                            # El byte 0x6B ('k') parece ser el final del nombre, no el inicio del extra area.
-                            if ea_start_idx < len(header_buffer) and header_buffer[ea_start_idx] == 0x6B:
-                                ea_start_idx += 1
-                                
-                            if ea_start_idx >= 0:
-                                extra_data = header_buffer[ea_start_idx : end_of_header_idx]
-                                # print(f"   -> Raw Extra Data ({len(extra_data)} bytes): {extra_data.hex()}")
-                                extra_info = self.metadata.parse_extra_area(extra_data)
-                                if 'salt' in extra_info:
-                                    print(f"   -> Salt encontrado en Extra Area: {extra_info['salt'].hex()}")
-                                    # Actualizar contexto global por si acaso
-                                    self.crypto_context.params['salt'] = extra_info['salt']
-                                    self.crypto_context.params['iterations'] = 32800
-                                
-                                if 'psw_check' in extra_info:
-                                    print(f"   -> PswCheck encontrado en Extra Area: {extra_info['psw_check'].hex()}")
-                                    self.crypto_context.params['psw_check'] = extra_info['psw_check']
-                                    
-                                    # Guardar para la entrada
-                                    entry_salt = extra_info['salt']
-                                    entry_iv = extra_info.get('iv') # Puede ser None
-                                    is_file_encrypted = True
-                                
-                     except IndexError:
-                        print("[WARN] Error leyendo ExtraAreaSize, posible corrupción")
-                
-                # Ahora leemos DataSize (PackSize)
-                try:
-                    data_size, data_len = self.metadata.read_vint(header_buffer, cursor)
-                    # print(f"   -> Data Size (PackSize): {data_size}")
-                except IndexError:
-                    print("[WARN] Error leyendo DataSize, posible corrupción")
-
-            # Registrar entrada si es un archivo
-            if header_info['type'] == HeaderType.FILE and header_info['has_data_area']:
-                # Si no encontramos salt específico pero el header CRYPT global existía, usar ese
-                if not entry_salt and 'salt' in self.crypto_context.params:
-                    entry_salt = self.crypto_context.params['salt']
-                    # Si hay salt global, asumimos encriptado
-                    is_file_encrypted = True
-
-                entry = EncryptedEntry(
-                    offset=header_end_pos,
-                    size=data_size,
-                    original_size=0, # No lo parseamos aún
-                    is_encrypted=is_file_encrypted,
-                    salt=entry_salt,
-                    iv=entry_iv,
-                    filename=f"File_at_{current_pos}"
-                )
-                self.entries.append(entry)
-                print(f"   -> Registrada entrada: Offset Data={entry.offset}, Size={entry.size}, Encrypted={entry.is_encrypted}")
 
-            next_block_pos = header_end_pos + data_size
-            
-            # Por simplicidad del salto:
-            self.file_obj.seek(next_block_pos)
-            
-            if header_info['type'] == HeaderType.ENDARC:
+            yield block
+
+            if block.type == HeaderType.ENDARC:
                 break
+            # El siguiente bloque siempre está después: el header ocupa al menos 7 bytes
+            current_pos = block.data_offset + block.data_size
+
+    def _next_block(self, pos: int, file_size: int, debug: bool = False):
+        """
+        Lee, valida y decodifica el bloque que empieza en 'pos'.
+        Retorna (BlockRecord, None), o (None, (reason, detalle, tipo)) si está malformado.
+        """
+        header_buffer = self._header_buffer(pos)
+        try:
+            header_info, bytes_consumed = self.metadata.parse_header_base(header_buffer) \
+                if header_buffer is not None else (None, 0)
+        except ValueError as e:
+            return None, (MalformedBlockError.VINT_OVERFLOW, str(e), None)
+
+        if not header_info:
+            if header_buffer is None and pos == self._file_size():
+                # Flujo de tamaño desconocido: el final se descubre al intentar leer
+                return None, (MalformedBlockError.MISSING_END,
+                              "El archivo termina sin End of Archive", None)
+            return None, (MalformedBlockError.TRUNCATED_HEADER,
+                          "Los campos base del header no caben en el archivo", None)
+
+        header_type = header_info['type']
+        problem = self._check_block(pos, header_info, bytes_consumed, file_size)
+        if problem:
+            return None, problem + (header_type,)
+        end_of_header_idx = 4 + header_info['size_len'] + header_info['header_size']
+
+        if debug:
+            logger.debug("[BLOCK] Offset: %d | Tipo: %s", pos, header_info['description'])
+            logger.debug("   -> Flags: %s | Extra: %s | Data: %s", hex(header_info['flags']),
+                         header_info['has_extra_area'], header_info['has_data_area'])
+
+        if end_of_header_idx > len(header_buffer):
+            # Header más grande que la ventana (nombres o Extra Area largos);
+            # su tamaño ya fue validado contra el archivo
+            header_buffer = self._read_range(pos, end_of_header_idx)
+
+        if self.verify_crc:
+            # El CRC cubre desde Size hasta el final del header (sin copiar: memoryview)
+            crc = zlib.crc32(header_buffer[4:end_of_header_idx])
+            if crc != header_info['crc']:
+                return None, (MalformedBlockError.BAD_CRC,
+                              f"CRC32 {crc:08x}, el header declara {header_info['crc']:08x}",
+                              header_type)
+
+        try:
+            return self._decode_block(pos, header_buffer, header_info, bytes_consumed), None
+        except ValueError as e:
+            # Un VINT del cuerpo excede 10 bytes dentro de un header bien delimitado
+            return None, (MalformedBlockError.VINT_OVERFLOW, str(e), header_type)
+
+    def _resync(self, start: int, file_size: int) -> Optional[int]:
+        """
+        Busca desde 'start' el próximo offset donde empieza un header válido cuyo CRC32
+        coincide. Cada patrón de RESYNC_PATTERNS se busca sobre el archivo mapeado (en C,
+        sin copiar) y los hallazgos se procesan en orden de offset: solo a esos se les
+        decodifica el header y calcula el CRC. Es una pasada lineal por patrón.
+        Retorna None si no hay ninguno hasta el final del archivo.
+        """
+        source = self._mmap
+        owned = None
+        if source is None:
+            if file_size == 0:
+                return None
+            source = owned = mmap.mmap(self.file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(source)
+        try:
+            # El Type está al menos 5 bytes después del inicio del header (CRC + Size)
+            hits = []
+            for index, pattern in enumerate(self.RESYNC_PATTERNS):
+                type_pos = self._search(pattern, view, start + 5)
+                if type_pos is not None:
+                    hits.append((type_pos, index))
+            heapq.heapify(hits)
+            checked = 0
+            while hits:
+                type_pos, index = hits[0]
+                # Size de 1, 2 o 3 bytes delante del Type
+                for size_len in (1, 2, 3):
+                    candidate = type_pos - 4 - size_len
+                    if candidate < start or (size_len > 1 and view[type_pos - size_len] < 0x80):
+                        break
+                    if self._valid_header_at(view, candidate, type_pos, file_size):
+                        return candidate
+
+                next_pos = self._search(self.RESYNC_PATTERNS[index], view, type_pos + 1)
+                if next_pos is not None:
+                    heapq.heapreplace(hits, (next_pos, index))
+                else:
+                    heapq.heappop(hits)
+                checked += 1
+                if self.limits and checked % self.LIMITS_CHECK_INTERVAL == 0:
+                    self.limits.check_limits()
+            return None
+        finally:
+            view.release()
+            if owned is not None:
+                owned.close()
+
+    @staticmethod
+    def _search(pattern, view, pos: int) -> Optional[int]:
+        # El match retiene el buffer: solo se conserva su offset
+        match = pattern.search(view, pos)
+        return match.start() if match else None
+
+    def _valid_header_at(self, view, pos: int, type_pos: int, file_size: int) -> bool:
+        """True si en 'pos' hay un header (con Type en 'type_pos') consistente y con CRC32 correcto."""
+        try:
+            base = codec.parse_base_header(view, pos)
+        except ValueError:
+            return False
+        if base is None or pos + 4 + base.size_len != type_pos:
+            return False
+        header_info = {'header_size': base.header_size, 'size_len': base.size_len,
+                       'extra_size': base.extra_size, 'data_size': base.data_size}
+        if self._check_block(pos, header_info, base.body_offset, file_size):
+            return False
+        # Un cuerpo FILE/SERVICE que no ocupa exactamente su lugar descarta el candidato
+        # sin pagar el CRC de un header que puede medir hasta MAX_HEADER_SIZE
+        if base.type in (HeaderType.FILE, HeaderType.SERVICE):
+            try:
+                body = codec.parse_file_header(view, pos + base.body_offset,
+                                               pos + base.extra_offset, exact=True)
+            except ValueError:
+                return False
+            if body is None:
+                return False
+        return zlib.crc32(view[pos + 4:pos + base.header_len]) == base.crc
+
+    def _read_range(self, pos: int, size: int):
+        """Lee 'size' bytes desde 'pos' (slice sin copia del mapa o del buffer de readahead)."""
+        if self._view is not None:
+            return self._view[pos:pos + size]
+        return self.block_reader().read_at(pos, size)
+
+    def _read_header(self, pos: int, file_size: int):
+        """
+        Lee y valida el header que empieza en 'pos'.
+        Retorna (header_buffer, header_info, bytes_consumed), o None si es inválido.
+        """
+        header_buffer = self._header_buffer(pos) if pos < file_size else None
+        if header_buffer is None:
+            return None
+        header_info, bytes_consumed = self.metadata.parse_header_base(header_buffer)
+        if not header_info or self._check_block(pos, header_info, bytes_consumed, file_size):
+            return None
+        end_of_header_idx = 4 + header_info['size_len'] + header_info['header_size']
+        if end_of_header_idx > len(header_buffer):
+            header_buffer = self._read_range(pos, end_of_header_idx)
+        return header_buffer, header_info, bytes_consumed
+
+    def _quick_open_blocks(self) -> Optional[List[BlockRecord]]:
+        """
+        Construye la lista de bloques desde el service header "QO" (quick open).
+        Lee el Main Header, su registro Locator, el header QO y sus datos: el costo
+        es proporcional al tamaño de los headers, no al del archivo.
+
+        Retorna None (y el llamador recorre el archivo completo) si falta el Locator
+        o si los datos cacheados no son consistentes: CRC de registro o de header
+        inválido, offsets desordenados o fuera del archivo, o un QO que no está al final.
+        """
+        file_size = self._file_size()
+        main_pos = len(self.RAR5_SIGNATURE)
+        saved_params = dict(self.crypto_context.params)
+        accepted = False
+        try:
+            main = self._read_header(main_pos, file_size)
+            if main is None or main[1]['type'] != HeaderType.MAIN or not main[1]['has_extra_area']:
+                return None
+            main_block = self._decode_block(main_pos, *main)
+            extra_start = main_block.header_size - main[1]['extra_size']
+            locator = self.metadata.parse_locator(main[0][extra_start:main_block.header_size])
+            if not locator.get('quick_open_offset'):
+                return None
+
+            qo_pos = main_pos + locator['quick_open_offset']
+            qo = self._read_header(qo_pos, file_size)
+            if qo is None or qo[1]['type'] != HeaderType.SERVICE:
+                return None
+            qo_block = self._decode_block(qo_pos, *qo)
+            if qo_block.file is None or bytes(qo_block.file.name) != self.QUICK_OPEN_NAME \
+                    or qo_block.file.method != 0:
+                return None
+
+            blocks = [main_block]
+            prev_end = main_block.data_offset + main_block.data_size
+            qo_data = self._read_range(qo_block.data_offset, qo_block.data_size)
+            for back_offset, header in self.metadata.iter_quick_open_records(qo_data):
+                pos = qo_pos - back_offset
+                header_info, bytes_consumed = self.metadata.parse_header_base(header)
+                if (not header_info or pos < prev_end
+                        or 4 + header_info['size_len'] + header_info['header_size'] != len(header)
+                        or zlib.crc32(header[4:]) != header_info['crc']
+                        or self._check_block(pos, header_info, bytes_consumed, file_size)
+                        or header_info['type'] not in (HeaderType.FILE, HeaderType.SERVICE)):
+                    logger.info("Quick open inconsistente en offset %d; se recorre el archivo", pos)
+                    return None
+                block = self._decode_block(pos, header, header_info, bytes_consumed)
+                blocks.append(block)
+                prev_end = block.data_offset + block.data_size
+            if prev_end > qo_pos:
+                return None
+            blocks.append(qo_block)
+
+            # El QO va justo antes del End of Archive
+            end = self._read_header(qo_block.data_offset + qo_block.data_size, file_size)
+            if end is None or end[1]['type'] != HeaderType.ENDARC:
+                return None
+            blocks.append(self._decode_block(qo_block.data_offset + qo_block.data_size, *end))
+            accepted = True
+        except ValueError as e:
+            logger.info("Quick open inválido (%s); se recorre el archivo", e)
+            return None
+        finally:
+            if not accepted:
+                # Si se descarta el QO, el recorrido completo vuelve a capturar la criptografía
+                self.crypto_context.params = saved_params
+
+        logger.info("Quick open: %d headers leídos desde el offset %d", len(blocks) - 3, qo_pos)
+        return blocks
+
+    def _check_block(self, pos: int, header_info: dict, bytes_consumed: int,
+                     file_size: int) -> Optional[Tuple[str, str]]:
+        """
+        Valida los tamaños de un header contra sí mismo y contra el archivo.
+        Retorna (reason, detalle) del primer problema, o None si el bloque es consistente.
+        """
+        # header_size es el tamaño del header SIN incluir CRC ni el propio campo Size
+        # Estructura: [CRC(4)] [Size(V)] [HeaderData...]
+        fields_size = bytes_consumed - 4 - header_info['size_len']
+        end_of_header_idx = 4 + header_info['size_len'] + header_info['header_size']
+        if header_info['header_size'] < fields_size + header_info['extra_size']:
+            return (MalformedBlockError.INVALID_HEADER_SIZE,
+                    f"Header de {header_info['header_size']} bytes no contiene sus campos "
+                    f"({fields_size}) ni su Extra Area ({header_info['extra_size']})")
+        if header_info['header_size'] > self.MAX_HEADER_SIZE:
+            return (MalformedBlockError.HEADER_TOO_LARGE,
+                    f"Header de {header_info['header_size']} bytes (máximo {self.MAX_HEADER_SIZE})")
+        if pos + end_of_header_idx > file_size:
+            return (MalformedBlockError.TRUNCATED_HEADER,
+                    f"El header termina en {pos + end_of_header_idx}, "
+                    f"después del fin del archivo ({file_size})")
+        if pos + end_of_header_idx + header_info['data_size'] > file_size:
+            return (MalformedBlockError.DATA_OUT_OF_BOUNDS,
+                    f"El área de datos ({header_info['data_size']} bytes) excede el archivo")
+        return None
+
+    def _decode_block(self, pos: int, header_buffer, header_info: dict, bytes_consumed: int) -> BlockRecord:
+        """
+        Construye el BlockRecord de un header ya validado que empieza en header_buffer[0].
+        Decodifica el cuerpo FILE/SERVICE y captura los registros criptográficos.
+        Lanza ValueError si un VINT del cuerpo es inválido.
+        """
+        end_of_header_idx = 4 + header_info['size_len'] + header_info['header_size']
+        # (el codec ya decodificó ExtraAreaSize y DataSize junto con los campos base)
+        block = BlockRecord(
+            offset=pos,
+            type=header_info['type'],
+            flags=header_info['flags'],
+            header_size=end_of_header_idx,
+            data_size=header_info['data_size']
+        )
+        extra_start = end_of_header_idx - header_info['extra_size']
+
+        if block.type in (HeaderType.FILE, HeaderType.SERVICE):
+            block.file = self.metadata.parse_file_header(header_buffer, bytes_consumed, extra_start)
+
+        # --- CAPTURA DE INFO CRIPTOGRÁFICA ---
+        if block.type == HeaderType.CRYPT:
+            logger.debug("   -> Detectado Header de Encriptación")
+            # El offset 'bytes_consumed' apunta justo después de los campos base
+            crypto_info = self.metadata.parse_encryption_header(
+                header_buffer[:end_of_header_idx], bytes_consumed)
+            # El resto de los headers está cifrado; cada uno va precedido por su IV.
+            # El IV del primero es el que necesita hashcat.
+            iv_buffer = self._header_buffer(block.data_offset)
+            if iv_buffer is not None and len(iv_buffer) >= 16:
+                crypto_info['iv'] = iv_buffer[:16]
+            self._capture_crypto(block, crypto_info)
+
+        elif block.flags & HeaderFlags.EXTRA_AREA and block.file is not None:
+            # El Extra Area ocupa el final del header
+            extra_data = header_buffer[extra_start : end_of_header_idx]
+            self._capture_crypto(block, self.metadata.parse_extra_area(extra_data))
+            if self.keep_extra_records:
+                block.extra = bytes(extra_data)
+
+        return block
+
+    def _capture_crypto(self, block: BlockRecord, crypto_info: dict):
+        """
+        Copia salt/IV/PswCheck al bloque (memoryview del mapa o del buffer de lectura) y actualiza
+        el contexto global con copias en bytes, que es lo que consume el KDF.
+        """
+        if 'enc_flags' in crypto_info:
+            block.enc_flags = crypto_info['enc_flags']
+
+        params = self.crypto_context.params
+        # El contexto describe un solo registro (el mismo que ArchiveModel.primary_record:
+        # el primero con PswCheck); los de otras contraseñas quedan en sus bloques
+        # y no lo pisan (ver ArchiveModel.crypto_groups)
+        primary = 'salt' in crypto_info and (
+            'salt' not in params or ('psw_check' not in params and 'psw_check' in crypto_info))
+
+        if 'salt' in crypto_info:
+            block.salt = crypto_info['salt']
+            block.kdf_count = crypto_info.get('kdf_count', 15)
+            if primary:
+                params['salt'] = bytes(block.salt)
+                params['kdf_count'] = block.kdf_count
+                # Iteraciones hasta el PswCheck: 2^KDF Count + 32
+                params['iterations'] = (1 << block.kdf_count) + 32
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   -> Salt encontrado: %s", block.salt.hex())
+
+        if 'iv' in crypto_info:
+            block.iv = crypto_info['iv']
+
+        if 'psw_check' in crypto_info:
+            block.psw_check = crypto_info['psw_check']
+            if primary:
+                params['psw_check'] = bytes(block.psw_check)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   -> PswCheck encontrado: %s", block.psw_check.hex())
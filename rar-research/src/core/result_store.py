@@ -0,0 +1,184 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SolvedHash:
+    """Contraseña recuperada de un string $rar5$, con cómo y cuándo se obtuvo."""
+    rar_hash: str
+    password: str
+    engine: str                         # 'hashcat', 'cpu', 'execution_manager', 'potfile'...
+    archive: Optional[str] = None       # Archivo donde se vio el hash (si se conoce)
+    elapsed_seconds: Optional[float] = None  # Duración del ataque que la encontró
+    candidates: Optional[int] = None    # Candidatos probados hasta encontrarla (si se conoce)
+    solved_at: float = 0.0              # time.time() del registro
+
+    def to_dict(self) -> dict:
+        return {
+            "hash": self.rar_hash,
+            "engine": self.engine,
+            "archive": self.archive,
+            "elapsed_seconds": self.elapsed_seconds,
+            "candidates": self.candidates,
+            "solved_at": self.solved_at
+        }
+
+
+class ResultStore:
+    """
+    Responsabilidad:
+    Recordar entre ejecuciones las contraseñas ya recuperadas, indexadas por el
+    string $rar5$ (el mismo que recibe hashcat), para que un archivo ya resuelto
+    no vuelva a pagar ningún PBKDF2.
+
+    - Base SQLite local (una fila por hash, clave primaria = índice); se abre
+      recién en el primer uso.
+    - Importa y exporta potfiles de hashcat ('hash:contraseña', con $HEX[...] para
+      las contraseñas no imprimibles); del potfile solo se toman las líneas $rar5$.
+      La base guarda la contraseña en esa misma forma.
+    - Un hash ya registrado conserva su primer registro: import_potfile no pisa los
+      tiempos medidos por nuestros propios motores.
+    """
+
+    ENV_PATH = "RAR_RESEARCH_RESULTS"
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rar-research", "results.sqlite")
+
+    HASH_PREFIX = "$rar5$"
+    _COLUMNS = "hash, password, engine, archive, elapsed_seconds, candidates, solved_at"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get(self.ENV_PATH) or self.DEFAULT_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Los motores registran desde el hilo que encontró la contraseña
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS solved ("
+                " hash TEXT PRIMARY KEY, password TEXT NOT NULL, engine TEXT NOT NULL,"
+                " archive TEXT, elapsed_seconds REAL, candidates INTEGER, solved_at REAL NOT NULL)")
+            self._conn.commit()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @classmethod
+    def normalize(cls, rar_hash: str) -> str:
+        """Clave del hash: sin espacios y con el hex en minúsculas (como lo escribe hashcat)."""
+        return rar_hash.strip().lower()
+
+    def lookup(self, rar_hash: Optional[str]) -> Optional[SolvedHash]:
+        """Resultado registrado para 'rar_hash', o None (también si rar_hash es None)."""
+        if not rar_hash:
+            return None
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM solved WHERE hash = ?", (self.normalize(rar_hash),)).fetchone()
+        return self._result(row) if row else None
+
+    def lookup_any(self, rar_hashes: Iterable[str]) -> Optional[SolvedHash]:
+        """Primer resultado registrado entre varios hashes (p. ej. ArchiveModel.hashcat_hashes)."""
+        for rar_hash in rar_hashes:
+            result = self.lookup(rar_hash)
+            if result is not None:
+                return result
+        return None
+
+    def record(self, rar_hash: str, password: str, engine: str, archive: Optional[str] = None,
+               elapsed_seconds: Optional[float] = None, candidates: Optional[int] = None) -> SolvedHash:
+        """Registra (o reemplaza) la contraseña de 'rar_hash'."""
+        result = SolvedHash(self.normalize(rar_hash), password, engine,
+                            os.path.abspath(archive) if archive else None,
+                            elapsed_seconds, candidates, time.time())
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"INSERT OR REPLACE INTO solved ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (result.rar_hash, self.encode_potfile_password(result.password), result.engine,
+                          result.archive, result.elapsed_seconds, result.candidates, result.solved_at))
+            conn.commit()
+        logger.info("Resultado registrado para %s... (%s)", result.rar_hash[:40], engine)
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM solved").fetchone()[0]
+
+    def __iter__(self) -> Iterator[SolvedHash]:
+        with self._lock:
+            rows = self._connection().execute(f"SELECT {self._COLUMNS} FROM solved ORDER BY solved_at").fetchall()
+        return (self._result(row) for row in rows)
+
+    def _result(self, row) -> SolvedHash:
+        # La contraseña se guarda como en el potfile: así sobreviven bytes que no son UTF-8
+        return SolvedHash(row[0], self.decode_potfile_password(row[1]), *row[2:])
+
+    # --- Potfiles de hashcat ---
+
+    @staticmethod
+    def decode_potfile_password(text: str) -> str:
+        """Contraseña de una línea de potfile; $HEX[...] se decodifica a sus bytes."""
+        if text.startswith("$HEX[") and text.endswith("]"):
+            try:
+                return bytes.fromhex(text[5:-1]).decode('utf-8', errors='surrogateescape')
+            except ValueError:
+                return text
+        return text
+
+    @staticmethod
+    def encode_potfile_password(password: str) -> str:
+        """Como --outfile-autohex de hashcat: $HEX[...] si no es ASCII imprimible."""
+        if all(0x20 <= ord(c) < 0x7f for c in password) and not password.startswith("$HEX["):
+            return password
+        return "$HEX[" + password.encode('utf-8', errors='surrogateescape').hex() + "]"
+
+    def import_potfile(self, potfile_path: str) -> int:
+        """Importa las líneas $rar5$ de un potfile. Retorna cuántos hashes nuevos se agregaron."""
+        rows = []
+        now = time.time()
+        with open(potfile_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if not line.startswith(self.HASH_PREFIX) or ':' not in line:
+                    continue
+                # El hash $rar5$ no contiene ':': la contraseña es todo lo que sigue al primero
+                rar_hash, password = line.split(':', 1)
+                password = self.encode_potfile_password(self.decode_potfile_password(password))
+                rows.append((self.normalize(rar_hash), password, "potfile", None, None, None, now))
+
+        with self._lock:
+            conn = self._connection()
+            before = conn.total_changes
+            conn.executemany(f"INSERT OR IGNORE INTO solved ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+            added = conn.total_changes - before
+        logger.info("Potfile %s: %d hashes $rar5$, %d nuevos", potfile_path, len(rows), added)
+        return added
+
+    def export_potfile(self, potfile_path: str) -> int:
+        """Escribe todos los resultados como potfile de hashcat. Retorna cuántas líneas escribió."""
+        count = 0
+        with open(potfile_path, 'w', encoding='utf-8', newline="\n") as f:
+            for result in self:
+                f.write(f"{result.rar_hash}:{self.encode_potfile_password(result.password)}\n")
+                count += 1
+        return count
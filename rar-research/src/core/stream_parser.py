@@ -0,0 +1,64 @@
+from typing import Optional
+from .rar_parser import RarParser
+from .block_reader import BlockReader, StreamBlockReader
+from crypto_engine.execution_limits import ExecutionLimits
+
+
+class StreamParser(RarParser):
+    """
+    Responsabilidad:
+    Recorrer un RAR5 que llega como flujo no posicionable (stdin, un pipe, la salida
+    de tar o de un backup) sin copiarlo antes a disco.
+
+    Reutiliza toda la validación y decodificación de RarParser; solo cambia la fuente
+    de los bytes (StreamBlockReader): las áreas de datos se leen y descartan en trozos
+    grandes y los headers se sirven a medida que llegan, así que el llamador puede
+    detenerse en el primer registro de encriptación sin consumir el resto del flujo.
+
+    Limitaciones propias de un flujo:
+    - Un solo recorrido: los bytes consumidos no se vuelven a leer.
+    - Sin índice en caché, quick open ni mmap (todos necesitan posicionarse), y sin
+      'recover' (la resincronización busca sobre el archivo mapeado). verify_crc sí.
+    - El flujo no se cierra al terminar: pertenece al llamador.
+    """
+
+    def __init__(self, stream, name: str = "<stream>", strict: bool = False,
+                 limits: Optional[ExecutionLimits] = None,
+                 readahead: int = BlockReader.DEFAULT_READAHEAD,
+                 skip_chunk: int = StreamBlockReader.DEFAULT_SKIP_CHUNK,
+                 keep_extra_records: bool = False, verify_crc: bool = False):
+        """
+        Args:
+            stream: Flujo binario abierto (basta con read; readinto/read1 se usan si están).
+            name: Nombre con el que se reporta el archivo (no se abre).
+            skip_chunk: Tamaño de cada lectura al descartar áreas de datos.
+            Resto: igual que en RarParser.
+        """
+        super().__init__(name, use_cache=False, strict=strict, limits=limits, use_quick_open=False,
+                         readahead=readahead, keep_extra_records=keep_extra_records,
+                         verify_crc=verify_crc)
+        self.stream = stream
+        self.skip_chunk = skip_chunk
+
+    def open(self):
+        self.file_obj = self.stream
+
+    def close(self):
+        # Las entradas retienen slices del buffer de lectura: se copian
+        for entry in self.entries:
+            entry.materialize()
+        self.file_obj = None
+
+    def block_reader(self) -> StreamBlockReader:
+        """StreamBlockReader del flujo (uno solo: el flujo no se puede rebobinar)."""
+        if self._reader is None:
+            self._reader = StreamBlockReader(self.stream, self.readahead, self.skip_chunk)
+        return self._reader
+
+    def is_rar5(self):
+        if not self.version:
+            try:
+                self._validate_signature()
+            except ValueError:
+                return False
+        return self.version == "RAR5"
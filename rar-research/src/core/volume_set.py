@@ -0,0 +1,169 @@
+import os
+import re
+import logging
+from typing import Optional, List, Iterator
+from .rar_parser import RarParser, MalformedBlockError
+from .metadata import HeaderFlags
+from .models import BlockRecord
+
+logger = logging.getLogger(__name__)
+
+
+class VolumeSet:
+    """
+    Responsabilidad:
+    Resolver los nombres de los volúmenes de un archivo partido a partir de uno de ellos.
+
+    Esquemas admitidos:
+    - RAR5 / RAR 3.x moderno: nombre.part1.rar, nombre.part2.rar ... (se respeta el
+      ancho de los dígitos: part001.rar, part002.rar ...).
+    - Esquema antiguo: nombre.rar, nombre.r00, nombre.r01 ...
+
+    Los volúmenes se resuelven bajo demanda: nunca se lista el directorio ni se
+    abre un volumen para conocer el nombre del siguiente.
+    """
+
+    _PART_RE = re.compile(r'^(?P<stem>.*\.part)(?P<number>\d+)(?P<ext>\.rar)$', re.IGNORECASE)
+    _OLD_RE = re.compile(r'^(?P<stem>.*)\.(?:rar|r\d{2})$', re.IGNORECASE)
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Cualquier volumen del conjunto; se normaliza al primero.
+
+        Raises:
+            FileNotFoundError: Si el primer volumen no existe.
+        """
+        match = self._PART_RE.match(path)
+        if match:
+            self._stem, self._ext = match.group('stem'), match.group('ext')
+            self._width = len(match.group('number'))
+            self._old_style = False
+        else:
+            match = self._OLD_RE.match(path)
+            if not match:
+                raise ValueError(f"{path} no sigue un esquema de volúmenes conocido")
+            self._stem, self._ext, self._width = match.group('stem'), '.rar', 2
+            self._old_style = True
+
+        self.first = self.path(0)
+        if not os.path.exists(self.first):
+            raise FileNotFoundError(f"Primer volumen no encontrado: {self.first}")
+
+    @classmethod
+    def is_multivolume(cls, path: str) -> bool:
+        """
+        True si 'path' pertenece a un conjunto: nombre .partN.rar, o .rar / .rNN
+        con el volumen .r00 presente. Solo consulta el sistema de archivos.
+        """
+        if cls._PART_RE.match(path):
+            return True
+        match = cls._OLD_RE.match(path)
+        return bool(match) and os.path.exists(match.group('stem') + '.r00')
+
+    def path(self, index: int) -> str:
+        """Ruta del volumen 'index' (0 = primero), exista o no."""
+        if self._old_style:
+            if index == 0:
+                return self._stem + self._ext
+            return f"{self._stem}.r{index - 1:02d}"
+        return f"{self._stem}{index + 1:0{self._width}d}{self._ext}"
+
+    def exists(self, index: int) -> bool:
+        return os.path.exists(self.path(index))
+
+    def __iter__(self) -> Iterator[str]:
+        """Rutas de los volúmenes presentes, en orden, hasta el primero que falte."""
+        index = 0
+        while self.exists(index):
+            yield self.path(index)
+            index += 1
+
+
+class VolumeSetParser:
+    """
+    Responsabilidad:
+    Presentar un conjunto de volúmenes como un único flujo de bloques, con la
+    misma interfaz que RarParser.iter_blocks().
+
+    - Cada volumen se recorre con su propio RarParser (handle, buffer de lectura
+      e índice en caché propios); el volumen se abre al llegar a él y se cierra
+      al terminar de recorrerlo.
+    - Una entrada partida (SPLIT_AFTER) se retiene hasta su último tramo: los headers
+      de continuación (SPLIT_BEFORE) suman su DataSize y agregan un tramo a
+      'block.parts'. Se emite un solo bloque por entrada, con el registro de
+      encriptación del primer tramo.
+    - Los offsets de cada bloque son relativos a su volumen ('block.volume').
+    - Ningún dato de los volúmenes se lee ni se copia: solo se recorren headers.
+    """
+
+    def __init__(self, file_path: str, strict: bool = False, **parser_options):
+        """
+        Args:
+            file_path: Cualquier volumen del conjunto (se empieza por el primero).
+            strict: Igual que en RarParser; además aplica a los volúmenes faltantes.
+            parser_options: Opciones de RarParser para cada volumen (use_mmap, use_cache...).
+        """
+        self.volume_set = VolumeSet(file_path)
+        self.file_path = self.volume_set.first
+        self.strict = strict
+        self.parser_options = parser_options
+        self.volumes: List[str] = []
+        self.errors: List[MalformedBlockError] = []
+        self.version = None
+
+    def iter_blocks(self) -> Iterator[BlockRecord]:
+        self.volumes = []
+        self.errors = []
+        pending: Optional[BlockRecord] = None
+        index = 0
+
+        while self.volume_set.exists(index):
+            parser = RarParser(self.volume_set.path(index), strict=self.strict, **self.parser_options)
+            self.volumes.append(parser.file_path)
+            blocks = parser.iter_blocks()
+            try:
+                for block in blocks:
+                    block.volume = index
+                    if block.file is not None and block.flags & HeaderFlags.SPLIT_BEFORE and pending is not None:
+                        self._merge(pending, block)
+                        if not block.flags & HeaderFlags.SPLIT_AFTER:
+                            yield pending
+                            pending = None
+                        continue
+                    if block.file is not None and block.flags & HeaderFlags.SPLIT_AFTER:
+                        block.parts = ((index, block.data_offset, block.data_size),)
+                        pending = block
+                        continue
+                    yield block
+            finally:
+                # Cierra el volumen (y guarda su índice) aunque el llamador se detenga
+                blocks.close()
+
+            self.version = self.version or parser.version
+            self.errors.extend(parser.errors)
+            if parser.errors and not parser.recover:
+                break
+            index += 1
+
+        if pending is not None:
+            error = MalformedBlockError(pending.offset, MalformedBlockError.MISSING_VOLUME,
+                                        f"la entrada continúa en {self.volume_set.path(index)}",
+                                        pending.type)
+            if self.strict:
+                raise error
+            logger.warning("%s", error)
+            self.errors.append(error)
+            yield pending
+
+    @staticmethod
+    def _merge(pending: BlockRecord, block: BlockRecord):
+        """
+        Suma el tramo de 'block' a la entrada retenida. El header del último tramo
+        trae el CRC de la entrada completa, así que su FileHeader reemplaza al anterior.
+        """
+        pending.parts += ((block.volume, block.data_offset, block.data_size),)
+        pending.data_size += block.data_size
+        pending.file = block.file
+        if not block.flags & HeaderFlags.SPLIT_AFTER:
+            pending.flags &= ~HeaderFlags.SPLIT_AFTER
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, Iterator
 from core.models import EncryptedEntry
 
 class PayloadExtractor:
@@ -9,8 +9,13 @@ class PayloadExtractor:
     Se encarga de operaciones de I/O de bajo nivel para recuperar 
     el payload cifrado (ciphertext) desde el archivo físico,
     basándose en la información provista por el Parser (EncryptedEntry).
+
+    Las entradas de archivos multivolumen traen sus tramos en 'entry.parts': cada
+    volumen se abre solo cuando se llega a su tramo.
     """
 
+    CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, rar_path: str):
         self.rar_path = rar_path
 
@@ -26,6 +31,9 @@ class PayloadExtractor:
         Returns:
             bytes: El ciphertext crudo.
         """
+        if entry.parts:
+            return b''.join(self.iter_payload(entry, limit=size))
+
         if not os.path.exists(self.rar_path):
             raise FileNotFoundError(f"Archivo no encontrado: {self.rar_path}")
 
@@ -47,3 +55,27 @@ class PayloadExtractor:
         Cuidado: Puede ser grande.
         """
         return self.extract_chunk(entry, size=entry.size)
+
+    def iter_payload(self, entry: EncryptedEntry, limit: Optional[int] = None,
+                     chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Genera el payload cifrado en tramos de hasta 'chunk_size' bytes, sin cargarlo
+        completo ni concatenar volúmenes. 'limit' corta la lectura tras esa cantidad de bytes.
+        """
+        parts = entry.parts or ((self.rar_path, entry.offset, entry.size),)
+        remaining = entry.size if limit is None else min(limit, entry.size)
+        for path, offset, size in parts:
+            if remaining <= 0:
+                return
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Volumen no encontrado: {path}")
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                to_read = min(size, remaining)
+                while to_read > 0:
+                    chunk = f.read(min(chunk_size, to_read))
+                    if not chunk:
+                        break
+                    to_read -= len(chunk)
+                    remaining -= len(chunk)
+                    yield chunk
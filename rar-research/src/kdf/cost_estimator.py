@@ -1,12 +1,37 @@
+from typing import Optional, Dict
+from kdf.hardware_profiles import HardwareProfile, HardwareProfileStore
+
+
+def format_duration(seconds) -> str:
+    """Duración legible en la unidad más grande que entra al menos una vez ('3 horas')."""
+    intervals = (
+        ('siglos', 3153600000), # 100 años aprox
+        ('años', 31536000),
+        ('días', 86400),
+        ('horas', 3600),
+        ('minutos', 60),
+        ('segundos', 1),
+    )
+    
+    for name, count in intervals:
+        value = seconds // count
+        if value >= 1:
+            return f"{int(value)} {name}"
+    return "< 1 segundo"
+
+
+
 class CostEstimator:
     """
     Estima el costo computacional de atacar un archivo RAR basándose en sus parámetros criptográficos.
-    Utiliza benchmarks de referencia para hardware moderno.
+    Utiliza los perfiles de hardware medidos en esta máquina (HardwareProfileStore, los
+    guarda el comando 'benchmark'); sin mediciones, recurre a la tabla de referencia.
     """
     
-    # Benchmarks de referencia para RAR5 (PBKDF2-HMAC-SHA256 con ~32k iteraciones)
-    # Velocidades en Hashes/segundo (H/s)
-    HARDWARE_PROFILES = {
+    # Velocidades de referencia para RAR5 (PBKDF2-HMAC-SHA256 con ~32k iteraciones), en H/s.
+    # Son estimaciones genéricas: solo se usan si no hay ningún perfil medido
+    # (o con include_reference=True, para comparar)
+    REFERENCE_PROFILES = {
         "legacy_cpu": 1500,       # CPU antigua / Laptop básica
         "modern_cpu": 5000,       # CPU moderna High-End (e.g., i9/Ryzen 9)
         "mid_gpu": 40000,         # GPU gama media (e.g., RTX 3060)
@@ -14,12 +39,37 @@ class CostEstimator:
         "mining_rig": 1000000,    # Rig de 8 GPUs
         "cloud_cluster": 10000000 # Cluster pequeño en la nube
     }
+    # Nombre anterior de la tabla de referencia
+    HARDWARE_PROFILES = REFERENCE_PROFILES
     
     # Baseline de iteraciones para RAR5
     BASELINE_ITERATIONS = 32768 + 32
 
-    def __init__(self):
-        pass
+    def __init__(self, profiles: Optional[Dict[str, HardwareProfile]] = None,
+                 profile_store: Optional[HardwareProfileStore] = None,
+                 include_reference: bool = False):
+        """
+        Args:
+            profiles: Perfiles a usar por nombre (None: los de profile_store).
+            profile_store: Almacén de perfiles medidos (None: el de la ubicación por defecto).
+            include_reference: Agrega la tabla de referencia aunque haya perfiles medidos.
+        """
+        self._profiles = profiles
+        self.profile_store = profile_store
+        self.include_reference = include_reference
+
+    @property
+    def profiles(self) -> Dict[str, HardwareProfile]:
+        """Perfiles medidos (se leen del almacén en cada consulta: un benchmark nuevo se ve enseguida)."""
+        if self._profiles is not None:
+            return dict(self._profiles)
+        store = self.profile_store if self.profile_store is not None else HardwareProfileStore()
+        return store.load()
+
+    @classmethod
+    def reference_profiles(cls) -> Dict[str, HardwareProfile]:
+        return {name: HardwareProfile(name, float(speed), cls.BASELINE_ITERATIONS, "reference")
+                for name, speed in cls.REFERENCE_PROFILES.items()}
 
     def calculate_theoretical_cost(self, iterations):
         """
@@ -39,16 +89,19 @@ class CostEstimator:
     def estimate_time(self, iterations, key_space_size):
         """
         Estima el tiempo necesario para recorrer un espacio de claves (key_space_size).
-        Ajusta la velocidad del hardware basado en el número de iteraciones.
-        
-        Si las iteraciones son el doble del baseline, la velocidad es la mitad.
+        Ajusta la velocidad de cada perfil a 'iterations' desde las iteraciones con
+        las que se midió: con el doble de iteraciones, la velocidad es la mitad.
         """
-        scaling_factor = self.BASELINE_ITERATIONS / iterations
+        profiles = self.profiles
+        measured = bool(profiles)
+        if not measured or self.include_reference:
+            for name, profile in self.reference_profiles().items():
+                profiles.setdefault(name, profile)
+
         estimates = {}
-        
-        for hw_name, base_speed in self.HARDWARE_PROFILES.items():
+        for hw_name, profile in profiles.items():
             # Velocidad ajustada
-            real_speed = base_speed * scaling_factor
+            real_speed = profile.speed_at(iterations)
             
             # Segundos totales
             seconds = key_space_size / real_speed
@@ -56,26 +109,16 @@ class CostEstimator:
             estimates[hw_name] = {
                 "speed_h_s": round(real_speed, 2),
                 "seconds": seconds,
-                "human_time": self._format_time(seconds)
+                "human_time": format_duration(seconds),
+                "backend": profile.backend,
+                "measured": profile.backend != "reference",
+                "measured_at": profile.measured_at or None
             }
             
         return estimates
 
     def _format_time(self, seconds):
-        intervals = (
-            ('siglos', 3153600000), # 100 años aprox
-            ('años', 31536000),
-            ('días', 86400),
-            ('horas', 3600),
-            ('minutos', 60),
-            ('segundos', 1),
-        )
-        
-        for name, count in intervals:
-            value = seconds // count
-            if value >= 1:
-                return f"{int(value)} {name}"
-        return "< 1 segundo"
+        return format_duration(seconds)
 
     def analyze_password_complexity(self, length, charset_size):
         """Calcula el tamaño del espacio de claves."""
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import socket
+import platform
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Iterator
+
+# Iteraciones del KDF por defecto de RAR5 (2^15 + 32 del PswCheck): las de CPUBenchmark
+# y las del hash de benchmark del modo 13000 de hashcat
+RAR5_DEFAULT_ITERATIONS = (1 << 15) + 32
+
+
+@dataclass(frozen=True)
+class HardwareProfile:
+    """Velocidad de PBKDF2-HMAC-SHA256 medida en esta máquina, con cómo se midió."""
+    name: str
+    hashes_per_second: float
+    iterations: int                  # Iteraciones PBKDF2 por hash durante la medición
+    backend: str                     # 'cpu-hashlib', 'hashcat/CUDA', 'hashcat/OpenCL'...
+    cores: Optional[int] = None      # Procesos de CPU o dispositivos de hashcat
+    device: Optional[str] = None     # Descripción del hardware
+    host: Optional[str] = None
+    measured_at: float = 0.0
+
+    def speed_at(self, iterations: int) -> float:
+        """H/s esperados con otra cantidad de iteraciones (el costo es lineal)."""
+        return self.hashes_per_second * self.iterations / iterations
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "hashes_per_second": self.hashes_per_second,
+            "iterations": self.iterations,
+            "backend": self.backend,
+            "cores": self.cores,
+            "device": self.device,
+            "host": self.host,
+            "measured_at": self.measured_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HardwareProfile":
+        return cls(data["name"], float(data["hashes_per_second"]), int(data["iterations"]),
+                   data.get("backend", "?"), data.get("cores"), data.get("device"),
+                   data.get("host"), data.get("measured_at", 0.0))
+
+    @classmethod
+    def from_cpu_benchmark(cls, result: dict, name: str = "cpu",
+                           iterations: int = RAR5_DEFAULT_ITERATIONS) -> "HardwareProfile":
+        """Perfil a partir de CPUBenchmark.run_multi_core/run_single_core."""
+        return cls(name, result["hashes_per_second"], iterations, "cpu-hashlib",
+                   cores=result.get("cores", 1),
+                   device=f"{platform.processor() or platform.machine()} ({result.get('mode', '?')})",
+                   host=socket.gethostname(), measured_at=time.time())
+
+    @classmethod
+    def from_hashcat_benchmark(cls, speeds: Dict[int, int], capabilities=None, name: str = "hashcat",
+                               iterations: int = RAR5_DEFAULT_ITERATIONS) -> "HardwareProfile":
+        """Perfil a partir de HashcatEngine.run_benchmark (H/s por dispositivo)."""
+        backend = "hashcat"
+        device = None
+        if capabilities is not None:
+            used = [d for d in capabilities.active_devices if d.device_id in speeds]
+            if used:
+                backend = "hashcat/" + "+".join(sorted({d.backend for d in used}))
+                device = ", ".join(d.name for d in used)
+        return cls(name, float(sum(speeds.values())), iterations, backend, cores=len(speeds),
+                   device=device, host=socket.gethostname(), measured_at=time.time())
+
+
+class HardwareProfileStore:
+    """
+    Responsabilidad:
+    Guardar los perfiles de hardware medidos en esta máquina (un JSON con un perfil
+    por nombre) para que CostEstimator estime con velocidades reales.
+
+    Guardar un perfil con un nombre existente lo reemplaza: volver a correr el
+    benchmark actualiza la estimación.
+    """
+
+    ENV_PATH = "RAR_RESEARCH_PROFILES"
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rar-research", "hardware_profiles.json")
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get(self.ENV_PATH) or self.DEFAULT_PATH
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, HardwareProfile]:
+        """Perfiles guardados por nombre (vacío si no hay archivo o está dañado)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != self.FORMAT_VERSION:
+                return {}
+            profiles = [HardwareProfile.from_dict(p) for p in data.get("profiles", [])]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+        return {p.name: p for p in profiles}
+
+    def get(self, name: str) -> Optional[HardwareProfile]:
+        return self.load().get(name)
+
+    def __iter__(self) -> Iterator[HardwareProfile]:
+        return iter(sorted(self.load().values(), key=lambda p: p.name))
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def save(self, profile: HardwareProfile) -> None:
+        with self._lock:
+            profiles = self.load()
+            profiles[profile.name] = profile
+            self._write(profiles)
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            profiles = self.load()
+            if profiles.pop(name, None) is None:
+                return False
+            self._write(profiles)
+            return True
+
+    def _write(self, profiles: Dict[str, HardwareProfile]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        data = {"version": self.FORMAT_VERSION,
+                "profiles": [p.to_dict() for p in sorted(profiles.values(), key=lambda p: p.name)]}
+        # Escritura atómica: un lector concurrente nunca ve un JSON a medias
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
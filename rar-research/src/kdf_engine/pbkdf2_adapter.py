@@ -57,6 +57,23 @@ class PBKDF2Adapter(KDFEngine):
             dklen=dklen
         )
 
+    def derive_psw_check(self, secret: bytes, salt: bytes, kdf_count: int) -> bytes:
+        """
+        Calcula el PswCheck de RAR5 para una contraseña.
+        Es PBKDF2-HMAC-SHA256 con 2^kdf_count + 32 iteraciones (la cadena continúa
+        más allá de la clave AES), plegado de 32 a 8 bytes con XOR.
+        Comparar este valor contra el del archivo verifica la contraseña sin descifrar.
+        """
+        value = self.derive_key(secret, {
+            "salt": salt,
+            "iterations": (1 << kdf_count) + 32,
+            "dklen": 32
+        })
+        check = bytearray(8)
+        for i, byte in enumerate(value):
+            check[i % 8] ^= byte
+        return bytes(check)
+
     def cost_profile(self):
         """
         Retorna el perfil de costo estándar para PBKDF2-SHA256.
@@ -5,7 +5,10 @@ import sys
 # Ajuste de path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 
-from core.rar_parser import RarParser
+from typing import Optional
+from core.archive_analyzer import ArchiveAnalyzer
+from core.models import ArchiveModel
+from core.result_store import ResultStore
 from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
 from cipher.aes256_rar_adapter import AES256RARAdapter
 from validation.structure_validator import StructureValidator
@@ -24,18 +27,34 @@ class ExecutionManager:
     3. Descifrado (Cipher Engine)
     4. Validación (Validation System)
     5. Métricas (Metrics)
+
+    Si el hash del archivo ya está resuelto en el ResultStore, el intento se responde
+    desde ahí sin derivar ninguna clave. Si el archivo trae PswCheck, el intento se
+    decide con ese único KDF; la clave AES y el descifrado quedan para los archivos
+    que no lo traen.
     """
 
-    def __init__(self):
+    def __init__(self, use_results: bool = True, result_store: Optional[ResultStore] = None):
+        """
+        Args:
+            use_results: Si es False, no consulta ni actualiza el almacén de resultados.
+            result_store: Almacén a utilizar (por defecto, el del directorio de usuario).
+        """
+        self.result_store = None
+        if use_results:
+            self.result_store = result_store if result_store is not None else ResultStore()
         self.metrics = ExecutionMetrics()
         self.kdf = PBKDF2Adapter()
         self.cipher = AES256RARAdapter()
         self.validator = StructureValidator()
 
-    def attempt_open(self, rar_path: str, password: str) -> dict:
+    def attempt_open(self, rar_path: str, password: str, use_cache: bool = True,
+                     model: Optional[ArchiveModel] = None) -> dict:
         """
         Intenta abrir un archivo RAR con una contraseña dada.
         Retorna un reporte completo.
+        use_cache=False ignora el índice de parseo persistido.
+        model: ArchiveModel ya analizado (evita volver a recorrer el archivo).
         """
         report = {
             "file": rar_path,
@@ -48,23 +67,63 @@ class ExecutionManager:
         self.metrics.start()
         
         try:
-            # 1. Parseo y Extracción de Contexto
-            print(f"[EXEC] Analizando {rar_path}...")
-            parser = RarParser(rar_path)
-            
-            with parser:
-                parser.parse()
-                ctx = parser.get_crypto_context()
+            # 1. Análisis (una sola pasada, compartida con el resto de la herramienta)
+            if model is None:
+                print(f"[EXEC] Analizando {rar_path}...")
+                # Solo se necesita la primera entrada cifrada: se detiene ahí
+                # en lugar de recorrer todo el archivo
+                model = ArchiveAnalyzer(rar_path, use_cache=use_cache).analyze(first_crypto_only=True)
             
-            salt = ctx.params.get('salt')
-            if not salt:
+            record = model.primary_record
+            target_entry = model.first_encrypted_entry()
+            if record is None:
                 report["status"] = "NO_ENCRYPTION_FOUND"
                 report["details"] = "No se detectó header de encriptación o salt."
                 return report
             
-            iterations = ctx.params.get('iterations', 32800)
+            rar_hash = record.hashcat_format()
+            known = self.result_store.lookup(rar_hash) if self.result_store is not None else None
+            if known is not None:
+                # Resultado ya verificado en otra ejecución: no hace falta ningún KDF
+                match = known.password == password
+                report["psw_check_match"] = match
+                report["result_store"] = known.to_dict()
+                report["validation_state"] = "NOT_VERIFIED"
+                report["validation_desc"] = "Resultado tomado del almacén local."
+                if match:
+                    report["status"] = "SUCCESS_KNOWN"
+                    report["details"] = "La contraseña ya estaba resuelta para este archivo."
+                else:
+                    report["status"] = "FAIL_INVALID_KEY"
+                    report["details"] = "El almacén local registra otra contraseña para este archivo."
+                return report
+
+            salt = record.salt
+            iterations = record.key_iterations
+            pass_bytes = password.encode('utf-8')
+            start = time.perf_counter()
+
+            # Verificación rápida: si el archivo trae PswCheck, decide con una sola
+            # derivación (2^k + 32 iteraciones) y la clave AES ya no hace falta
+            if record.psw_check is not None:
+                print(f"[EXEC] Verificando PswCheck (Salt: {salt.hex()[:8]}..., Iter: {iterations + 32})...")
+                match = self.kdf.derive_psw_check(pass_bytes, salt, record.kdf_count) == record.psw_check
+                elapsed = time.perf_counter() - start
+                report["psw_check_match"] = match
+                report["validation_state"] = "NOT_VERIFIED"
+                report["validation_desc"] = "Contraseña verificada con el PswCheck del archivo (sin descifrar)."
+                if not match:
+                    report["status"] = "FAIL_INVALID_KEY"
+                    report["details"] = "El PswCheck del archivo no coincide con la contraseña."
+                    return report
+                if self.result_store is not None:
+                    self.result_store.record(rar_hash, password, "execution_manager", archive=rar_path,
+                                             elapsed_seconds=elapsed, candidates=1)
+                report["status"] = "SUCCESS_VERIFIED"
+                report["details"] = "El PswCheck del archivo coincide con la contraseña."
+                return report
             
-            # 2. Derivación de Clave
+            # 2. Derivación de Clave (sin PswCheck, la única forma de validar es descifrar)
             print(f"[EXEC] Derivando clave (Salt: {salt.hex()[:8]}..., Iter: {iterations})...")
             kdf_params = {
                 "salt": salt,
@@ -72,20 +131,15 @@ class ExecutionManager:
                 "dklen": 32 # AES-256
             }
             
-            # Password a bytes
-            pass_bytes = password.encode('utf-8')
             derived_key = self.kdf.derive_key(pass_bytes, kdf_params)
             
             # 3. Extracción y Descifrado
-            entries = parser.get_encrypted_entries()
-            
-            if not entries:
+            if not target_entry:
                 report["status"] = "NO_PAYLOAD_FOUND"
                 report["details"] = "Se encontró Salt pero no se identificaron archivos cifrados para probar."
                 report["validation_state"] = "NOT_VERIFIED"
                 report["validation_desc"] = "No hay datos cifrados accesibles."
             else:
-                target_entry = entries[0]
                 print(f"[EXEC] Intentando descifrar entrada: {target_entry.filename} (Offset: {target_entry.offset})")
                 
                 extractor = PayloadExtractor(rar_path)
@@ -2,6 +2,7 @@ import time
 import hashlib
 import multiprocessing
 from concurrent.futures import ProcessPoolExecutor
+from kdf.hardware_profiles import HardwareProfile
 
 class CPUBenchmark:
     """
@@ -78,10 +79,20 @@ class CPUBenchmark:
             "elapsed_seconds": elapsed
         }
 
-def benchmark_cpu():
-    """Función de utilidad para correr el benchmark completo."""
-    print(f"[-] Iniciando Benchmark (Duración: {2}s por prueba)...")
-    bench = CPUBenchmark(duration_seconds=2)
+    def to_profile(self, result, name=None):
+        """Perfil de hardware (para HardwareProfileStore) de un resultado de run_*_core."""
+        if name is None:
+            name = "cpu" if result.get("mode") == "Multi-Core" else "cpu_single"
+        return HardwareProfile.from_cpu_benchmark(result, name, self.iterations)
+
+def benchmark_cpu(duration_seconds=2, store=None):
+    """
+    Función de utilidad para correr el benchmark completo.
+    Con un HardwareProfileStore, guarda los resultados como perfiles 'cpu' y
+    'cpu_single' (los que usa CostEstimator).
+    """
+    print(f"[-] Iniciando Benchmark (Duración: {duration_seconds}s por prueba)...")
+    bench = CPUBenchmark(duration_seconds=duration_seconds)
     
     # Single Core
     print("[-] Ejecutando Single-Core...")
@@ -95,4 +106,10 @@ def benchmark_cpu():
     
     print("\n[Resumen]")
     print(f"Factor de escalado: {m_res['hashes_per_second'] / s_res['hashes_per_second']:.2f}x")
+
+    if store is not None:
+        for result in (s_res, m_res):
+            profile = bench.to_profile(result)
+            store.save(profile)
+            print(f"[OK] Perfil '{profile.name}' guardado en {store.path}")
     return m_res
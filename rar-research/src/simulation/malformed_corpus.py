@@ -0,0 +1,104 @@
+import os
+import sys
+import random
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from core.rar_parser import RarParser
+from core.codec import encode_vint as _vint
+from simulation.parser_benchmark import _block, build_synthetic_archive
+
+SIGNATURE = RarParser.RAR5_SIGNATURE
+MAIN = _block(1, 0, body=_vint(0))
+ENDARC = _block(5, 0, body=_vint(0))
+
+
+def _raw_block(size_field: bytes, fields: bytes) -> bytes:
+    """Bloque con un campo Size arbitrario (CRC en cero: el recorrido no lo verifica)."""
+    return bytes(4) + size_field + fields
+
+
+def handcrafted_cases():
+    """
+    Archivos patológicos construidos a mano, uno por cada forma de romper el recorrido.
+    Retorna una lista de (nombre, contenido).
+    """
+    return [
+        ("only_signature", SIGNATURE),
+        ("zero_header_size", SIGNATURE + _raw_block(_vint(0), b'') + ENDARC),
+        ("header_smaller_than_fields",
+         SIGNATURE + _raw_block(_vint(1), _vint(2) + _vint(0x03) + _vint(50) + _vint(10)) + ENDARC),
+        ("vint_overflow", SIGNATURE + bytes(4) + b'\xff' * 16 + ENDARC),
+        ("header_too_large", SIGNATURE + _raw_block(_vint(3 * 1024 * 1024), _vint(2) + _vint(0))),
+        ("header_past_eof", SIGNATURE + _raw_block(_vint(4000), _vint(2) + _vint(0))),
+        ("data_past_eof", SIGNATURE + MAIN + _block(2, 0x0002, body=_vint(0) * 6, data_size=1 << 62)),
+        ("extra_larger_than_header",
+         SIGNATURE + _raw_block(_vint(4), _vint(2) + _vint(0x01) + _vint(200) + b'\x00') + ENDARC),
+        ("extra_record_zero_size",
+         SIGNATURE + MAIN + _block(2, 0x0001, body=_vint(0) * 6, extra=b'\x00' * 8) + ENDARC),
+        ("extra_record_overflows",
+         SIGNATURE + MAIN + _block(2, 0x0001, body=_vint(0) * 6, extra=_vint(120) + _vint(1) + bytes(4)) + ENDARC),
+        ("missing_endarc", SIGNATURE + MAIN),
+        ("truncated_base_fields", SIGNATURE + MAIN + bytes(4) + b'\x80'),
+    ]
+
+
+def mutated_cases(count=200, seed=0, entries=20):
+    """
+    Mutaciones deterministas de un archivo sintético válido: truncamientos,
+    bytes invertidos y tramos sobrescritos con 0x00/0xFF.
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "base.rar")
+        build_synthetic_archive(path, entries=entries, data_size=8)
+        with open(path, 'rb') as f:
+            base = f.read()
+
+    cases = []
+    for i in range(count):
+        data = bytearray(base)
+        kind = i % 3
+        if kind == 0:
+            data = data[:rng.randrange(len(SIGNATURE), len(data))]
+        elif kind == 1:
+            for _ in range(rng.randint(1, 8)):
+                pos = rng.randrange(len(SIGNATURE), len(data))
+                data[pos] ^= 1 << rng.randrange(8)
+        else:
+            pos = rng.randrange(len(SIGNATURE), len(data))
+            fill = rng.choice((0x00, 0xFF))
+            for j in range(pos, min(len(data), pos + rng.randint(1, 16))):
+                data[j] = fill
+        cases.append((f"mutated_{i:03d}", bytes(data)))
+    return cases
+
+
+def build_corpus(directory, count=200, seed=0):
+    """Escribe el corpus completo en 'directory' y retorna las rutas generadas."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, data in handcrafted_cases() + mutated_cases(count, seed):
+        path = os.path.join(directory, f"{name}.rar")
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def build_many_blocks_archive(path, blocks):
+    """
+    Archivo válido con 'blocks' headers mínimos de tipo desconocido:
+    maximiza la cantidad de bloques por byte para medir el costo por bloque.
+    """
+    unknown = _block(0x70, 0x0004, body=b'')   # SKIP_IF_UNKNOWN
+    with open(path, 'wb') as f:
+        f.write(SIGNATURE + MAIN)
+        f.write(unknown * blocks)
+        f.write(ENDARC)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "malformed_corpus"
+    print(f"[-] Generados {len(build_corpus(target))} archivos en {target}")
@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+import zlib
+import hashlib
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from core.rar_parser import RarParser
+from core.codec import encode_vint as _vint
+
+
+class CountingFile:
+    """
+    Proxy sobre un objeto archivo que cuenta las llamadas de I/O.
+    Cada read/seek del parser equivale a una syscall, y cada read
+    reserva un objeto bytes nuevo con los datos copiados.
+    """
+
+    def __init__(self, file_obj):
+        self._file = file_obj
+        self.read_calls = 0
+        self.seek_calls = 0
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self.read_calls += 1
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        self.seek_calls += 1
+        return self._file.seek(offset, whence)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def _block(header_type, flags, body=b'', extra=b'', data_size=None):
+    """Arma un bloque RAR5 (sin área de datos) con CRC32 correcto."""
+    fields = _vint(header_type) + _vint(flags)
+    if extra:
+        fields += _vint(len(extra))
+    if data_size is not None:
+        fields += _vint(data_size)
+    fields += body + extra
+    size = _vint(len(fields))
+    crc = zlib.crc32(size + fields)
+    return crc.to_bytes(4, 'little') + size + fields
+
+
+def _file_header(index, data_size):
+    """File Header cifrado (registro de encriptación con CheckValue válido) de la entrada 'index'."""
+    name = f"file_{index:07d}.bin".encode()
+    # FileFlags, UnpSize, Attr, CompInfo, HostOS, NameLen, Name
+    body = _vint(0) + _vint(data_size) + _vint(0x20) + _vint(0) + _vint(0) + _vint(len(name)) + name
+    salt = index.to_bytes(16, 'little')
+    psw_check = bytes(8)
+    check_value = psw_check + hashlib.sha256(psw_check).digest()[:4]
+    # Version, Flags (PswCheck), KDF Count, Salt, IV, CheckValue
+    record = _vint(1) + _vint(0) + _vint(0x01) + bytes([15]) + salt + bytes(16) + check_value
+    extra = _vint(len(record)) + record
+    return _block(2, 0x0003, body=body, extra=extra, data_size=data_size)
+
+
+def _quick_open_record(back_offset, header):
+    """Registro del service header QO: CRC32, Size, Flags, Offset, HeaderSize, Header."""
+    fields = _vint(0) + _vint(back_offset) + _vint(len(header)) + header
+    record = _vint(len(fields)) + fields
+    return zlib.crc32(record).to_bytes(4, 'little') + record
+
+
+def _main_header(quick_open_offset=None):
+    """Main Header, con registro Locator si se indica el offset del QO."""
+    if quick_open_offset is None:
+        return _block(1, 0, body=_vint(0))
+    locator = _vint(1) + _vint(0x0001) + _vint(quick_open_offset)
+    return _block(1, 0x0001, body=_vint(0), extra=_vint(len(locator)) + locator)
+
+
+def build_synthetic_archive(path, entries=10000, data_size=64, quick_open=False):
+    """
+    Escribe un RAR5 sintético con 'entries' File Headers cifrados y datos de relleno.
+    Con quick_open=True agrega el registro Locator y el service header "QO" al final.
+    Sirve para medir el recorrido de headers, no para ser extraído.
+    """
+    headers = [_file_header(i, data_size) for i in range(entries)]
+    body_size = sum(len(h) for h in headers) + entries * data_size
+
+    main = _main_header()
+    if quick_open:
+        # El offset del QO depende del largo del Main Header, que depende del offset
+        offset = 0
+        while True:
+            main = _main_header(offset)
+            if len(main) + body_size == offset:
+                break
+            offset = len(main) + body_size
+
+    with open(path, 'wb') as f:
+        f.write(RarParser.RAR5_SIGNATURE)
+        f.write(main)
+        positions = []
+        for header in headers:
+            positions.append(f.tell())
+            f.write(header)
+            f.write(b'\x00' * data_size)
+
+        if quick_open:
+            qo_pos = f.tell()
+            qo_data = b''.join(_quick_open_record(qo_pos - pos, header)
+                               for pos, header in zip(positions, headers))
+            name = RarParser.QUICK_OPEN_NAME
+            body = _vint(0) + _vint(len(qo_data)) + _vint(0) + _vint(0) + _vint(0) + _vint(len(name)) + name
+            f.write(_block(3, 0x0002, body=body, data_size=len(qo_data)))
+            f.write(qo_data)
+
+        f.write(_block(5, 0, body=_vint(0)))
+
+
+def measure_parse(path, use_mmap, readahead=None):
+    """
+    Parsea 'path' y retorna syscalls de lectura, bytes copiados y salteados,
+    memoria pico y duración.
+    """
+    kwargs = {"readahead": readahead} if readahead else {}
+    parser = RarParser(path, use_mmap=use_mmap, use_cache=False, **kwargs)
+    parser.open()
+    counter = CountingFile(parser.file_obj)
+    parser.file_obj = counter
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        parser.parse()
+        duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        parser.close()
+
+    stats = parser.io_stats() or {}
+    return {
+        "mode": "mmap" if use_mmap else "read",
+        "entries": len(parser.entries),
+        "read_calls": counter.read_calls,
+        "seek_calls": counter.seek_calls,
+        "bytes_copied": counter.bytes_read,
+        "bytes_skipped": stats.get("bytes_skipped", 0),
+        "peak_memory_bytes": peak,
+        "duration_seconds": duration
+    }
+
+
+def compare_parse_modes(path):
+    """Compara el modo clásico (read/seek) contra el modo mmap sobre el mismo archivo."""
+    classic = measure_parse(path, use_mmap=False)
+    mapped = measure_parse(path, use_mmap=True)
+    return {
+        "read": classic,
+        "mmap": mapped,
+        "syscalls_saved": (classic["read_calls"] + classic["seek_calls"])
+                          - (mapped["read_calls"] + mapped["seek_calls"]),
+        "bytes_copied_saved": classic["bytes_copied"] - mapped["bytes_copied"]
+    }
+
+
+def benchmark_parser(entries=10000):
+    """Función de utilidad: genera un archivo sintético y compara ambos modos."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.rar")
+        print(f"[-] Generando archivo sintético ({entries} entradas)...")
+        build_synthetic_archive(path, entries=entries)
+        result = compare_parse_modes(path)
+
+    for mode in ("read", "mmap"):
+        r = result[mode]
+        print(f"[{mode}] read={r['read_calls']} seek={r['seek_calls']} "
+              f"copiados={r['bytes_copied']} B pico={r['peak_memory_bytes']} B "
+              f"tiempo={r['duration_seconds']:.3f}s")
+    print(f"[Resumen] Syscalls evitadas: {result['syscalls_saved']} | "
+          f"Bytes no copiados: {result['bytes_copied_saved']}")
+    return result
+
+
+if __name__ == "__main__":
+    benchmark_parser()
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import tempfile
+import tracemalloc
+from typing import Optional, Dict, List, Callable, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from core.rar_parser import RarParser
+from core.metadata import Metadata, HeaderFlags
+from core.codec import encode_vint as _vint
+from GPU.extractor import RarHashExtractor
+from simulation.rar5_writer import Rar5Writer
+
+FORMAT_VERSION = 1
+
+# Tamaños a escala 1.0; 'scale' los multiplica (mínimo 1 entrada)
+SCENARIOS = {
+    "many_tiny": {"entries": 20000, "data_size": 16},
+    "few_huge": {"entries": 4, "data_size": 64 * 1024 * 1024},
+    "deep_extra": {"entries": 2000, "data_size": 16, "extra_records": 100},
+    "header_encrypted": {"entries": 200, "data_size": 16},
+    "truncated": {"entries": 5000, "data_size": 16, "keep_fraction": 0.7},
+}
+
+# Tipo de registro que el parser no interpreta: se recorre y se saltea
+_FILLER_RECORD = _vint(9) + _vint(0x70) + bytes(8)
+
+
+class BenchmarkRegression(AssertionError):
+    """Una o más métricas empeoraron más que la tolerancia respecto del baseline."""
+
+    def __init__(self, regressions: List[str]):
+        super().__init__("Regresiones de rendimiento:\n  " + "\n  ".join(regressions))
+        self.regressions = regressions
+
+
+def _scaled(value: int, scale: float) -> int:
+    return max(1, int(value * scale))
+
+
+def build_fixtures(directory: str, scale: float = 1.0, scenarios=None) -> Dict[str, str]:
+    """
+    Genera los archivos de cada escenario con Rar5Writer (deterministas, seed 0).
+    Las áreas de datos no se cifran: el benchmark mide el recorrido de headers.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name in scenarios or SCENARIOS:
+        spec = SCENARIOS[name]
+        path = os.path.join(directory, f"{name}.rar")
+        entries = _scaled(spec["entries"], scale)
+        data_size = spec["data_size"] if name != "few_huge" else _scaled(spec["data_size"], scale)
+        extra = _FILLER_RECORD * spec.get("extra_records", 0)
+
+        with Rar5Writer(path, password="benchmark", kdf_count=1, encrypt_payload=False,
+                        header_encryption=name == "header_encrypted") as writer:
+            for i in range(entries):
+                writer.add_file(f"entry_{i:07d}.bin", size=data_size, fill="zeros", extra_records=extra)
+
+        if "keep_fraction" in spec:
+            with open(path, 'r+b') as f:
+                f.truncate(int(os.path.getsize(path) * spec["keep_fraction"]))
+        paths[name] = path
+    return paths
+
+
+def _read_syscalls() -> Optional[Tuple[int, int]]:
+    """(syscalls de lectura, bytes leídos) del proceso según /proc/self/io; None fuera de Linux."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":") for line in f.read().splitlines())
+        return int(fields["syscr"]), int(fields["rchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _syscall_overhead() -> Tuple[int, int]:
+    """Lecturas que cuesta consultar /proc/self/io, para descontarlas de cada medición."""
+    before, after = _read_syscalls(), _read_syscalls()
+    if not before or not after:
+        return 0, 0
+    return after[0] - before[0], after[1] - before[1]
+
+
+def _walk(use_mmap: bool) -> Callable[[str], Tuple[int, int]]:
+    def run(path):
+        parser = RarParser(path, use_mmap=use_mmap, use_cache=False)
+        return sum(1 for _ in parser.iter_blocks()), os.path.getsize(path)
+    return run
+
+
+def _hash_extractor(path: str) -> Tuple[int, int]:
+    """El extractor se detiene en el primer registro cifrado: cuenta solo lo recorrido."""
+    extractor = RarHashExtractor(path, use_cache=False)
+    model = extractor.analyze()
+    extractor.get_hashcat_format(model)
+    if model is None:
+        return 0, 0
+    table = model.table
+    blocks = len(table) + sum(1 for r in model.crypto_records if r.header_encrypted)
+    if len(table):
+        scanned = table.header_offset[-1] + table.header_size[-1]
+    else:
+        scanned = max((r.block_offset for r in model.crypto_records), default=0)
+    return blocks, scanned
+
+
+def _extra_areas(path: str) -> List[bytes]:
+    """Extra Areas de los headers del archivo (recolectadas fuera de la medición)."""
+    metadata = Metadata()
+    areas = []
+    with open(path, 'rb') as f:
+        data = f.read()
+    for block in RarParser(path, use_mmap=True, use_cache=False).iter_blocks():
+        if block.flags & HeaderFlags.EXTRA_AREA:
+            raw = data[block.offset:block.offset + block.header_size]
+            info, _ = metadata.parse_header_base(raw)
+            areas.append(raw[len(raw) - info['extra_size']:])
+    return areas
+
+
+def _parse_extra_area(areas: List[bytes]) -> Tuple[int, int]:
+    metadata = Metadata()
+    for area in areas:
+        metadata.parse_extra_area(area)
+    return len(areas), sum(len(a) for a in areas)
+
+
+PARSERS = ("rar_parser", "rar_parser_mmap", "hash_extractor", "parse_extra_area")
+
+
+def _target(parser: str, path: str) -> Callable[[], Tuple[int, int]]:
+    """Función sin argumentos que ejecuta 'parser' y retorna (bloques, bytes recorridos)."""
+    if parser == "parse_extra_area":
+        areas = _extra_areas(path)
+        return lambda: _parse_extra_area(areas)
+    if parser == "hash_extractor":
+        return lambda: _hash_extractor(path)
+    return lambda: _walk(parser == "rar_parser_mmap")(path)
+
+
+def measure(run: Callable[[], Tuple[int, int]], repeats: int = 3) -> dict:
+    """
+    Mide 'run': mejor tiempo de 'repeats' corridas, syscalls de lectura de una corrida
+    y memoria pico en una corrida aparte (tracemalloc distorsiona los tiempos).
+    """
+    run()   # Calentamiento: imports perezosos y caché de páginas del SO
+    overhead = _syscall_overhead()
+    best = None
+    syscalls = read_bytes = None
+    for _ in range(max(repeats, 1)):
+        before = _read_syscalls()
+        start = time.perf_counter()
+        blocks, scanned = run()
+        elapsed = time.perf_counter() - start
+        after = _read_syscalls()
+        if best is None or elapsed < best:
+            best = elapsed
+        if before and after:
+            syscalls = max(after[0] - before[0] - overhead[0], 0)
+            read_bytes = max(after[1] - before[1] - overhead[1], 0)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = max(best, 1e-9)
+    return {
+        "blocks": blocks,
+        "seconds": best,
+        "blocks_per_sec": blocks / best,
+        "mb_per_sec": scanned / best / (1024 * 1024),
+        "read_syscalls": syscalls,
+        "read_bytes": read_bytes,
+        "peak_memory_bytes": peak
+    }
+
+
+def run_suite(directory: Optional[str] = None, scale: float = 1.0, repeats: int = 3,
+              scenarios=None, parsers=None) -> dict:
+    """
+    Genera los fixtures (en 'directory' o en un temporal) y mide cada parser sobre cada uno.
+    Retorna el resultado serializable a JSON.
+
+    'read_syscalls' cuenta las llamadas read() del proceso (Linux): en modo mmap las
+    lecturas son fallos de página y no aparecen ahí. Los avisos de bloques malformados
+    (escenario 'truncated') se silencian durante la medición.
+    """
+    result = {
+        "version": FORMAT_VERSION,
+        "scale": scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": {}
+    }
+    logging.disable(logging.WARNING)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = build_fixtures(directory or tmp, scale, scenarios)
+            for name, path in paths.items():
+                entry = {"archive_bytes": os.path.getsize(path), "parsers": {}}
+                for parser in parsers or PARSERS:
+                    entry["parsers"][parser] = measure(_target(parser, path), repeats)
+                result["scenarios"][name] = entry
+    finally:
+        logging.disable(logging.NOTSET)
+    return result
+
+
+def compare(result: dict, baseline: dict, tolerance: float = 0.5) -> List[str]:
+    """
+    Compara 'result' contra 'baseline' y retorna las regresiones encontradas.
+    Una métrica regresiona si empeora más que 'tolerance' (0.5 = 50%):
+    throughput (blocks/sec) más bajo, o más syscalls de lectura o memoria pico.
+    Los escenarios o parsers que no están en ambos lados se ignoran.
+    """
+    regressions = []
+    for name, scenario in result["scenarios"].items():
+        base_scenario = baseline.get("scenarios", {}).get(name)
+        if not base_scenario:
+            continue
+        for parser, metrics in scenario["parsers"].items():
+            base = base_scenario["parsers"].get(parser)
+            if not base:
+                continue
+            label = f"{name}/{parser}"
+            if metrics["blocks_per_sec"] < base["blocks_per_sec"] * (1 - tolerance):
+                regressions.append(f"{label}: {metrics['blocks_per_sec']:.0f} bloques/s "
+                                   f"(baseline {base['blocks_per_sec']:.0f})")
+            # Margen absoluto: unas pocas syscalls o KiB de diferencia no son regresión
+            if metrics["read_syscalls"] is not None and base["read_syscalls"] is not None and \
+                    metrics["read_syscalls"] > base["read_syscalls"] * (1 + tolerance) + 8:
+                regressions.append(f"{label}: {metrics['read_syscalls']} syscalls de lectura "
+                                   f"(baseline {base['read_syscalls']})")
+            if metrics["peak_memory_bytes"] > base["peak_memory_bytes"] * (1 + tolerance) + 64 * 1024:
+                regressions.append(f"{label}: {metrics['peak_memory_bytes']} B de memoria pico "
+                                   f"(baseline {base['peak_memory_bytes']})")
+    return regressions
+
+
+def check_baseline(result: dict, baseline_path: str, tolerance: float = 0.5):
+    """Lanza BenchmarkRegression si 'result' regresiona respecto del baseline guardado."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("scale") != result["scale"]:
+        raise ValueError(f"El baseline se midió con escala {baseline.get('scale')}, "
+                         f"no {result['scale']}")
+    regressions = compare(result, baseline, tolerance)
+    if regressions:
+        raise BenchmarkRegression(regressions)
+
+
+def save_results(result: dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+
+def format_table(result: dict) -> str:
+    lines = [f"{'escenario':<18}{'parser':<18}{'bloques/s':>12}{'MB/s':>10}{'syscalls':>10}{'pico KiB':>10}"]
+    for name, scenario in result["scenarios"].items():
+        for parser, m in scenario["parsers"].items():
+            syscalls = m["read_syscalls"] if m["read_syscalls"] is not None else "-"
+            lines.append(f"{name:<18}{parser:<18}{m['blocks_per_sec']:>12.0f}{m['mb_per_sec']:>10.1f}"
+                         f"{syscalls:>10}{m['peak_memory_bytes'] // 1024:>10}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(format_table(run_suite(scale=float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)))
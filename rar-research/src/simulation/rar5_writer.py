@@ -0,0 +1,374 @@
+import os
+import sys
+import zlib
+import random
+import hashlib
+from typing import Optional, Dict, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from core.rar_parser import RarParser
+from core.codec import encode_vint as _vint
+from core.metadata import HeaderType, HeaderFlags, MainFlags, FileFlags, HostOS, CryptFlags
+from cipher.aes256_rar_adapter import AES256RARAdapter
+from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
+
+
+class Rar5Writer:
+    """
+    Responsabilidad:
+    Escribir archivos RAR5 válidos (CRC de headers y de datos correctos) para tests
+    y benchmarks, sin WinRAR.
+
+    - Entradas con método stored (sin compresión), opcionalmente cifradas con
+      AES-256-CBC: salt, IV, KDF Count y CheckValue (PswCheck) reales.
+    - Cifrado de headers opcional (Archive Encryption Header + headers con IV).
+    - Determinista con 'seed': mismos salts, IVs y contenidos en cada corrida.
+    - Los datos se escriben por tramos: entradas de varios GB no se cargan en memoria.
+    - Volúmenes de un archivo partido ('volume'), con entradas que continúan en el
+      volumen siguiente (add_file_part; ver build_volume_set).
+
+    Con encrypt_payload=False los datos se escriben sin cifrar aunque la entrada
+    declare cifrado: los headers son válidos y los tamaños correctos (útil para
+    medir el parser sobre archivos enormes), pero el contenido no se puede extraer.
+    """
+
+    DEFAULT_KDF_COUNT = 15
+    CHUNK_SIZE = 1024 * 1024
+    SALT_SIZE = 16
+    IV_SIZE = 16
+
+    def __init__(self, path: str, password: Optional[str] = None, kdf_count: int = DEFAULT_KDF_COUNT,
+                 header_encryption: bool = False, psw_check: bool = True, seed: Optional[int] = 0,
+                 per_entry_salt: bool = False, encrypt_payload: bool = True,
+                 volume: Optional[int] = None, last_volume: bool = True):
+        """
+        Args:
+            path: Archivo a crear.
+            password: Contraseña; None escribe entradas sin cifrar.
+            kdf_count: Log2 de las iteraciones PBKDF2 (RAR5 admite hasta 24).
+            header_encryption: Cifra todos los headers (requiere password).
+            psw_check: Incluye el CheckValue que permite verificar la contraseña.
+            seed: Semilla de salts, IVs y contenidos de relleno (None = os.urandom).
+            per_entry_salt: Un salt nuevo por entrada (cada uno paga su propio PBKDF2).
+            encrypt_payload: Si es False, el área de datos no se cifra (ver docstring).
+            volume: Número de volumen (0 = primero) si el archivo es parte de un conjunto.
+            last_volume: False si el conjunto continúa en otro volumen (flag del End of Archive).
+        """
+        if header_encryption and password is None:
+            raise ValueError("El cifrado de headers requiere contraseña")
+        if not 0 <= kdf_count <= 24:
+            raise ValueError("KDF Count fuera de rango (0..24)")
+
+        self.path = path
+        self.password = password.encode('utf-8') if password is not None else None
+        self.kdf_count = kdf_count
+        self.header_encryption = header_encryption
+        self.psw_check = psw_check
+        self.per_entry_salt = per_entry_salt
+        self.encrypt_payload = encrypt_payload
+        self.volume = volume
+        self.last_volume = last_volume
+        self._rng = random.Random(seed) if seed is not None else None
+        self._cipher = AES256RARAdapter()
+        self._keys: Dict[bytes, Tuple[bytes, bytes]] = {}
+
+        self._archive_salt = self._random(self.SALT_SIZE) if password is not None else None
+        self._header_key = None
+        self.entries = 0
+        self._file = open(path, 'wb')
+        self._file.write(RarParser.RAR5_SIGNATURE)
+        if header_encryption:
+            self._write_crypt_header()
+        self._write_header(self._block(HeaderType.MAIN, 0, body=self._main_body()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def set_password(self, password: Optional[str], kdf_count: Optional[int] = None):
+        """
+        Cambia la contraseña (y opcionalmente el KDF Count) de las entradas siguientes,
+        como un archivo actualizado con otra contraseña: usan un salt de archivo nuevo.
+        """
+        if self.header_encryption:
+            raise ValueError("Con headers cifrados la contraseña es única para todo el archivo")
+        if kdf_count is not None:
+            if not 0 <= kdf_count <= 24:
+                raise ValueError("KDF Count fuera de rango (0..24)")
+            self.kdf_count = kdf_count
+        self.password = password.encode('utf-8') if password is not None else None
+        self._archive_salt = self._random(self.SALT_SIZE) if password is not None else None
+        self._keys.clear()
+
+    def _main_body(self) -> bytes:
+        if self.volume is None:
+            return _vint(0)
+        if self.volume == 0:
+            return _vint(MainFlags.VOLUME)
+        return _vint(MainFlags.VOLUME | MainFlags.VOLUME_NUMBER) + _vint(self.volume)
+
+    def _random(self, size: int) -> bytes:
+        if self._rng is None:
+            return os.urandom(size)
+        return self._rng.getrandbits(8 * size).to_bytes(size, 'little')
+
+    def derive(self, salt: bytes) -> Tuple[bytes, bytes]:
+        """(clave AES, PswCheck) para 'salt', calculados una sola vez por salt."""
+        if salt not in self._keys:
+            kdf = PBKDF2Adapter()
+            key = kdf.derive_key(self.password, {"salt": salt, "iterations": 1 << self.kdf_count})
+            self._keys[salt] = (key, kdf.derive_psw_check(self.password, salt, self.kdf_count))
+        return self._keys[salt]
+
+    @staticmethod
+    def _block(header_type: int, flags: int, body: bytes = b'', extra: bytes = b'',
+               data_size: Optional[int] = None) -> bytes:
+        """Header RAR5 completo: CRC32 | Size | Type | Flags | [ExtraSize] | [DataSize] | cuerpo | extra."""
+        if extra:
+            flags |= HeaderFlags.EXTRA_AREA
+        if data_size is not None:
+            flags |= HeaderFlags.DATA_AREA
+        fields = _vint(header_type) + _vint(flags)
+        if extra:
+            fields += _vint(len(extra))
+        if data_size is not None:
+            fields += _vint(data_size)
+        fields += body + extra
+        size = _vint(len(fields))
+        return zlib.crc32(size + fields).to_bytes(4, 'little') + size + fields
+
+    def _check_value(self, salt: bytes) -> bytes:
+        check = self.derive(salt)[1]
+        return check + hashlib.sha256(check).digest()[:4]
+
+    def _crypt_fields(self, salt: bytes) -> Tuple[bytes, bytes]:
+        """Flags, KDF Count y Salt (+ CheckValue), comunes al header CRYPT y al registro de archivo."""
+        flags = CryptFlags.PSW_CHECK if self.psw_check else 0
+        fields = _vint(flags) + bytes([self.kdf_count]) + salt
+        return fields, (self._check_value(salt) if self.psw_check else b'')
+
+    def _write_crypt_header(self):
+        flags, check = self._crypt_fields(self._archive_salt)
+        self._file.write(self._block(HeaderType.CRYPT, 0, body=_vint(0) + flags + check))
+        self._header_key = self.derive(self._archive_salt)[0]
+
+    def _write_header(self, header: bytes):
+        """Escribe un header; con cifrado de headers va como IV + AES-CBC(header con relleno)."""
+        if self._header_key is None:
+            self._file.write(header)
+            return
+        iv = self._random(self.IV_SIZE)
+        padded = header + bytes(-len(header) % 16)
+        self._file.write(iv + self._cipher.encrypt_block(padded, self._header_key, iv))
+
+    def _file_body(self, name: bytes, unpacked_size: int, file_flags: int, attributes: int,
+                   mtime: Optional[int], crc: int) -> bytes:
+        body = _vint(file_flags) + _vint(unpacked_size) + _vint(attributes)
+        if file_flags & FileFlags.UTIME:
+            body += mtime.to_bytes(4, 'little')
+        if file_flags & FileFlags.CRC32:
+            body += crc.to_bytes(4, 'little')
+        # CompInfo 0: versión 0, método stored
+        return body + _vint(0) + _vint(HostOS.UNIX) + _vint(len(name)) + name
+
+    def add_directory(self, name: str, mtime: Optional[int] = None):
+        flags = FileFlags.DIRECTORY | (FileFlags.UTIME if mtime is not None else 0)
+        body = self._file_body(name.encode('utf-8'), 0, flags, 0o40755, mtime, 0)
+        self._write_header(self._block(HeaderType.FILE, 0, body=body))
+        self.entries += 1
+
+    def add_file(self, name: str, data: Optional[bytes] = None, size: Optional[int] = None,
+                 mtime: Optional[int] = None, fill: str = "random", extra_records: bytes = b''):
+        """
+        Agrega una entrada stored.
+
+        Args:
+            data: Contenido; si es None se generan 'size' bytes de relleno.
+            size: Tamaño del relleno ('random' determinista con la semilla, o 'zeros').
+            mtime: Fecha Unix de modificación (opcional).
+            extra_records: Registros del Extra Area ya codificados (Size, Type, datos),
+                           escritos antes del registro de encriptación.
+        """
+        if data is None and size is None:
+            raise ValueError("Se requiere data o size")
+        unpacked_size = len(data) if data is not None else size
+        encrypted = self.password is not None
+        packed_size = unpacked_size + (-unpacked_size % 16 if encrypted else 0)
+
+        extra = extra_records
+        key = iv = None
+        if encrypted:
+            salt, iv = self.new_crypto()
+            key = self.derive(salt)[0]
+            extra += self._encryption_record(salt, iv)
+
+        flags = FileFlags.CRC32 | (FileFlags.UTIME if mtime is not None else 0)
+        name_bytes = name.encode('utf-8')
+        # El CRC de los datos se conoce recién al escribirlos: se reserva el header
+        # con CRC 0 y se reescribe al final (el largo no cambia: el campo es fijo)
+        header = self._block(HeaderType.FILE, 0, extra=extra, data_size=packed_size,
+                             body=self._file_body(name_bytes, unpacked_size, flags, 0o644, mtime, 0))
+        header_pos = self._file.tell()
+        self._write_header(header)
+
+        crc = self._write_data(data, unpacked_size, fill, key if self.encrypt_payload else None, iv)
+
+        end = self._file.tell()
+        header = self._block(HeaderType.FILE, 0, extra=extra, data_size=packed_size,
+                             body=self._file_body(name_bytes, unpacked_size, flags, 0o644, mtime, crc))
+        self._file.seek(header_pos)
+        self._write_header(header)
+        self._file.seek(end)
+        self.entries += 1
+
+    def new_crypto(self) -> Tuple[bytes, bytes]:
+        """(salt, IV) para una entrada nueva."""
+        salt = self._random(self.SALT_SIZE) if self.per_entry_salt else self._archive_salt
+        return salt, self._random(self.IV_SIZE)
+
+    def _encryption_record(self, salt: bytes, iv: bytes) -> bytes:
+        """Registro File Encryption del Extra Area (Size, Type, datos)."""
+        crypt_fields, check = self._crypt_fields(salt)
+        record = _vint(CryptFlags.RECORD_TYPE) + _vint(0) + crypt_fields + iv + check
+        return _vint(len(record)) + record
+
+    def pack(self, data: bytes, salt: Optional[bytes], iv: Optional[bytes]) -> bytes:
+        """Área de datos completa de 'data': con relleno a 16 y cifrada si corresponde."""
+        if self.password is None:
+            return data
+        padded = data + bytes(-len(data) % 16)
+        if not self.encrypt_payload:
+            return padded
+        return self._cipher.encrypt_block(padded, self.derive(salt)[0], iv)
+
+    def add_file_part(self, name: str, packed: bytes, unpacked_size: int, crc: int,
+                      salt: Optional[bytes] = None, iv: Optional[bytes] = None,
+                      split_before: bool = False, split_after: bool = False):
+        """
+        Agrega un tramo de una entrada partida entre volúmenes.
+
+        Args:
+            packed: Bytes del área de datos de este tramo (ya cifrados, ver pack()).
+            unpacked_size: Tamaño de la entrada completa.
+            crc: CRC32 de 'packed' en los tramos con split_after; en el último,
+                 el CRC32 del contenido completo (especificación RAR5).
+            salt, iv: Los mismos en todos los tramos de la entrada (None = sin cifrar).
+        """
+        flags = (HeaderFlags.SPLIT_BEFORE if split_before else 0) | \
+                (HeaderFlags.SPLIT_AFTER if split_after else 0)
+        extra = self._encryption_record(salt, iv) if salt is not None else b''
+        body = self._file_body(name.encode('utf-8'), unpacked_size, FileFlags.CRC32, 0o644, None, crc)
+        self._write_header(self._block(HeaderType.FILE, flags, body=body, extra=extra,
+                                       data_size=len(packed)))
+        self._file.write(packed)
+        if not split_before:
+            self.entries += 1
+
+    def _chunks(self, data: Optional[bytes], size: int, fill: str):
+        if data is not None:
+            for pos in range(0, len(data), self.CHUNK_SIZE):
+                yield data[pos:pos + self.CHUNK_SIZE]
+            return
+        for pos in range(0, size, self.CHUNK_SIZE):
+            length = min(self.CHUNK_SIZE, size - pos)
+            yield bytes(length) if fill == "zeros" else self._random(length)
+
+    def _write_data(self, data: Optional[bytes], size: int, fill: str,
+                    key: Optional[bytes], iv: Optional[bytes]) -> int:
+        """Escribe el área de datos (cifrada si hay clave) y retorna el CRC32 del contenido."""
+        crc = 0
+        pending = b''
+        for chunk in self._chunks(data, size, fill):
+            crc = zlib.crc32(chunk, crc)
+            if key is None:
+                self._file.write(chunk)
+                continue
+            # CBC encadenado entre tramos: el IV del siguiente es el último bloque cifrado
+            pending += chunk
+            usable = len(pending) - len(pending) % 16
+            if usable:
+                encrypted = self._cipher.encrypt_block(pending[:usable], key, iv)
+                iv = encrypted[-16:]
+                self._file.write(encrypted)
+                pending = pending[usable:]
+
+        padding = -size % 16 if self.password is not None else 0
+        if key is not None and (pending or padding):
+            self._file.write(self._cipher.encrypt_block(pending + bytes(padding), key, iv))
+        elif padding:
+            self._file.write(bytes(padding))
+        return crc
+
+    def close(self):
+        """Escribe el End of Archive y cierra el archivo."""
+        if self._file is None:
+            return
+        # EndOfArchiveFlags 0x01: el conjunto continúa en el volumen siguiente
+        self._write_header(self._block(HeaderType.ENDARC, 0, body=_vint(0 if self.last_volume else 1)))
+        self._file.close()
+        self._file = None
+
+
+def build_encrypted_archive(path, entries=10, data_size=64, password="password",
+                            kdf_count=Rar5Writer.DEFAULT_KDF_COUNT, header_encryption=False,
+                            seed=0, encrypt_payload=True):
+    """
+    Atajo: archivo RAR5 con 'entries' entradas stored cifradas de 'data_size' bytes.
+    Retorna la lista de contenidos escritos, en orden.
+    """
+    contents = []
+    with Rar5Writer(path, password=password, kdf_count=kdf_count, header_encryption=header_encryption,
+                    seed=seed, encrypt_payload=encrypt_payload) as writer:
+        rng = random.Random(seed)
+        for i in range(entries):
+            data = rng.getrandbits(8 * data_size).to_bytes(data_size, 'little') if data_size else b''
+            writer.add_file(f"file_{i:07d}.bin", data=data, mtime=1700000000 + i)
+            contents.append(data)
+    return contents
+
+
+def volume_path(base: str, index: int, volumes: int) -> str:
+    """Ruta del volumen 'index' (0 = primero) con el esquema base.partN.rar."""
+    return f"{base}.part{index + 1:0{len(str(volumes))}d}.rar"
+
+
+def build_volume_set(base, volumes=3, files_per_volume=2, data_size=64, span_size=200,
+                     password="password", kdf_count=Rar5Writer.DEFAULT_KDF_COUNT, seed=0):
+    """
+    Atajo: conjunto de 'volumes' volúmenes base.partN.rar. Cada volumen trae
+    'files_per_volume' entradas completas y, salvo el último, una entrada de
+    'span_size' bytes cuya segunda mitad del área de datos sigue en el volumen siguiente.
+
+    Retorna (rutas de los volúmenes, {nombre: contenido}).
+    """
+    rng = random.Random(seed)
+    paths, contents = [], {}
+    pending = None
+    for index in range(volumes):
+        path = volume_path(base, index, volumes)
+        paths.append(path)
+        with Rar5Writer(path, password=password, kdf_count=kdf_count, seed=seed + index,
+                        volume=index, last_volume=index == volumes - 1) as writer:
+            if pending is not None:
+                name, rest, size, crc, salt, iv = pending
+                writer.add_file_part(name, rest, size, crc, salt, iv, split_before=True)
+                pending = None
+            for i in range(files_per_volume):
+                data = rng.getrandbits(8 * data_size).to_bytes(data_size, 'little') if data_size else b''
+                name = f"vol{index}_file{i}.bin"
+                writer.add_file(name, data=data)
+                contents[name] = data
+            if index < volumes - 1:
+                data = rng.getrandbits(8 * span_size).to_bytes(span_size, 'little')
+                name = f"vol{index}_span.bin"
+                salt, iv = writer.new_crypto() if password is not None else (None, None)
+                packed = writer.pack(data, salt, iv)
+                cut = len(packed) // 2
+                writer.add_file_part(name, packed[:cut], len(data), zlib.crc32(packed[:cut]),
+                                     salt, iv, split_after=True)
+                pending = (name, packed[cut:], len(data), zlib.crc32(data), salt, iv)
+                contents[name] = data
+    return paths, contents
@@ -0,0 +1,18 @@
+import os
+import pytest
+
+# Cachés y almacenes que por defecto viven en ~/.cache/rar-research
+CACHE_ENV = {
+    "RAR_RESEARCH_CACHE_DIR": "index",
+    "RAR_RESEARCH_RESULTS": "results.sqlite",
+    "RAR_RESEARCH_PROFILES": "hardware_profiles.json",
+    "RAR_RESEARCH_SESSIONS": "sessions",
+    "RAR_RESEARCH_HASHCAT_DIR": "hashcat",
+}
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_cache(tmp_path, monkeypatch):
+    """Ningún test escribe en el caché real del usuario."""
+    for name, entry in CACHE_ENV.items():
+        monkeypatch.setenv(name, str(tmp_path / "rar-research" / entry))
@@ -0,0 +1,150 @@
+import unittest
+import tempfile
+import hashlib
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.rar_parser import RarParser
+from core.codec import encode_vint as vint
+from GPU.extractor import RarHashExtractor
+from GPU.cpu_engine import CPUEngine
+from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
+from orchestrator.execution_manager import ExecutionManager
+from simulation.parser_benchmark import _block, build_synthetic_archive
+
+PASSWORD = "secreto"
+SALT = bytes(range(16))
+IV = bytes(range(16, 32))
+KDF_COUNT = 4  # 2^4 iteraciones: suficiente para probar sin demorar la suite
+
+def _check_value(password=PASSWORD):
+    psw_check = PBKDF2Adapter().derive_psw_check(password.encode(), SALT, KDF_COUNT)
+    return psw_check + hashlib.sha256(psw_check).digest()[:4]
+
+def _file_archive(path):
+    """RAR5 con un único archivo cifrado cuyo PswCheck corresponde a PASSWORD."""
+    name = b"doc.txt"
+    body = vint(0) + vint(16) + vint(0x20) + vint(0) + vint(0) + vint(len(name)) + name
+    record = vint(1) + vint(0) + vint(0x01) + bytes([KDF_COUNT]) + SALT + IV + _check_value()
+    extra = vint(len(record)) + record
+    with open(path, 'wb') as f:
+        f.write(RarParser.RAR5_SIGNATURE)
+        f.write(_block(1, 0, body=vint(0)))
+        f.write(_block(2, 0x0003, body=body, extra=extra, data_size=16))
+        f.write(bytes(16))
+        f.write(_block(5, 0, body=vint(0)))
+
+def _header_encrypted_archive(path):
+    """RAR5 con headers cifrados (-hp): CRYPT header seguido del IV del primer header."""
+    body = vint(0) + vint(0x01) + bytes([KDF_COUNT]) + SALT + _check_value()
+    with open(path, 'wb') as f:
+        f.write(RarParser.RAR5_SIGNATURE)
+        f.write(_block(4, 0, body=body))
+        f.write(IV)
+        f.write(os.urandom(64))
+
+class TestArchiveAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "archive.rar")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _analyze(self, **kwargs):
+        return ArchiveAnalyzer(self.rar_file, use_cache=False).analyze(**kwargs)
+
+    def test_file_record_layout(self):
+        """Los campos del registro se leen en el orden de la especificación."""
+        _file_archive(self.rar_file)
+        model = self._analyze()
+
+        self.assertTrue(model.complete)
+        self.assertEqual(len(model.table), 1)
+        self.assertEqual(model.table.name(0), "doc.txt")
+        record = model.crypto_records[0]
+        self.assertFalse(record.header_encrypted)
+        self.assertEqual((record.kdf_count, record.salt, record.iv),
+                         (KDF_COUNT, SALT, IV))
+        self.assertEqual(record.psw_check, _check_value()[:8])
+        self.assertEqual(record.iterations, (1 << KDF_COUNT) + 32)
+        self.assertEqual(model.hashcat_hash,
+                         f"$rar5$16${SALT.hex()}${KDF_COUNT}${IV.hex()}$8${_check_value()[:8].hex()}")
+
+    def test_header_encrypted(self):
+        """Con headers cifrados el IV es el que sigue al CRYPT header y el recorrido termina ahí."""
+        _header_encrypted_archive(self.rar_file)
+        model = self._analyze()
+
+        self.assertTrue(model.header_encrypted)
+        self.assertEqual(len(model.table), 0)
+        self.assertEqual(model.crypto_records[0].iv, IV)
+        self.assertEqual(model.hashcat_hash.count('$'), 7)
+        self.assertEqual(model.crypto_profile().is_header_encrypted, True)
+
+    def test_bad_checksum_drops_psw_check(self):
+        """Un CheckValue cuya suma SHA-256 no coincide no se usa como PswCheck."""
+        build_synthetic_archive(self.rar_file, entries=1)
+        with open(self.rar_file, 'r+b') as f:
+            data = bytearray(f.read())
+            # Último byte del CheckValue del único registro (antes de los datos y ENDARC)
+            pos = data.index(bytes(8) + hashlib.sha256(bytes(8)).digest()[:4]) + 11
+            data[pos] ^= 0xFF
+            f.seek(0)
+            f.write(data)
+
+        record = self._analyze().crypto_records[0]
+        self.assertIsNone(record.psw_check)
+        self.assertIsNone(self._analyze().hashcat_hash)
+
+    def test_extractor_consumes_model(self):
+        """El extractor de hashcat no analiza de nuevo si recibe el modelo."""
+        _file_archive(self.rar_file)
+        model = self._analyze(first_crypto_only=True)
+        extractor = RarHashExtractor(self.rar_file, use_cache=False)
+        extractor.analyze = lambda: self.fail("No debe volver a analizar")
+
+        self.assertFalse(model.complete)
+        self.assertEqual(extractor.get_hashcat_format(model), model.hashcat_hash)
+
+    def test_cpu_engine_uses_psw_check(self):
+        """Con PswCheck el motor CPU verifica en proceso, sin UnRAR."""
+        _file_archive(self.rar_file)
+        wordlist = os.path.join(self.tmp, "words.txt")
+        with open(wordlist, 'w') as f:
+            f.write("uno\ndos\n" + PASSWORD + "\ntres\n")
+
+        engine = CPUEngine(use_results=False)
+        engine.unrar_path = None
+        found = engine.start_dictionary_attack(self.rar_file, wordlist, workers=2,
+                                               model=self._analyze())
+        self.assertEqual(found, PASSWORD)
+
+    def test_execution_manager_decides_with_psw_check(self):
+        """Con PswCheck, un intento cuesta un solo KDF y una contraseña rechazada no se descifra."""
+        _file_archive(self.rar_file)
+        model = self._analyze(first_crypto_only=True)
+        manager = ExecutionManager(use_results=False)
+        derivations = []
+        derive_key = manager.kdf.derive_key
+        manager.kdf.derive_key = lambda secret, params: derivations.append(params["iterations"]) \
+            or derive_key(secret, params)
+
+        report = manager.attempt_open(self.rar_file, "otra", model=model)
+        self.assertEqual(report["status"], "FAIL_INVALID_KEY")
+        self.assertFalse(report["psw_check_match"])
+
+        report = manager.attempt_open(self.rar_file, PASSWORD, model=model)
+        self.assertEqual(report["status"], "SUCCESS_VERIFIED")
+        self.assertTrue(report["psw_check_match"])
+        # Solo la cadena del PswCheck, sin la clave AES aparte
+        self.assertEqual(derivations, [(1 << KDF_COUNT) + 32] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from GPU.attack_planner import AttackPlanner, AttackPhase, mask_keyspace, count_lines
+from GPU.capabilities import HashcatCapabilities, CapabilityCache
+from GPU.engine import HashcatEngine
+
+HASH = "$rar5$16$00112233445566778899aabbccddeeff$16$00000000000000000000000000000000$8$0102030405060708"
+
+# Hashcat simulado: registra sus argumentos y agota el keyspace sin encontrar nada
+FAKE_HASHCAT = '''#!{python}
+import json, sys
+with open({log!r}, "a") as log:
+    log.write(json.dumps(sys.argv[1:]) + "\\n")
+sys.exit(0 if "--version" in sys.argv else 1)
+'''
+
+
+class TestAttackPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.wordlist = os.path.join(self.tmp, "words.txt")
+        with open(self.wordlist, "w") as f:
+            f.write("\n".join(f"palabra{i}" for i in range(1000)))  # sin salto final
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_keyspaces(self):
+        self.assertEqual(mask_keyspace("?d?d?d"), 1000)
+        self.assertEqual(mask_keyspace("ab?l?d"), 260)
+        self.assertEqual(mask_keyspace("?d?d?d?d", ["--increment", "--increment-min", "1", "--increment-max", "4"]), 11110)
+        self.assertEqual(mask_keyspace("?d?d?d?d", ["-i", "--increment-min=3"]), 11000)
+        self.assertEqual(mask_keyspace("?1?1?b", ["-1", "?l?d"]), 36 * 36 * 256)
+        self.assertEqual(mask_keyspace("?a??"), 95)
+        with self.assertRaises(ValueError):
+            mask_keyspace("?9")
+        self.assertEqual(count_lines(self.wordlist), 1000)
+
+        rules = os.path.join(self.tmp, "best.rule")
+        with open(rules, "w") as f:
+            f.write("# reglas\n:\nu\n\nc\n")
+        planner = AttackPlanner()
+        self.assertEqual(planner.keyspace(AttackPhase("r", "0", [self.wordlist], ["-r", rules])), 3000)
+        self.assertEqual(planner.keyspace(AttackPhase("h", "6", [self.wordlist, "?d?d"])), 100000)
+        self.assertEqual(planner.keyspace(AttackPhase("h", "7", ["?d", self.wordlist])), 10000)
+
+    def test_kdf_scaling_and_order(self):
+        planner = AttackPlanner(speed=1000, kdf_count=AttackPlanner.kdf_count_from_hash(HASH), overhead_seconds=0)
+        # 2^16 iteraciones: la mitad de rápido que el benchmark (2^15)
+        self.assertAlmostEqual(planner.speed, 1000 * (32768 + 32) / (65536 + 32))
+        for bad in ("$rar5$16$aa$xx$bb$8$cc", "$zip2$0*1*1*aa", "no es un hash", "$rar5$16$aa$15"):
+            with self.assertRaises(ValueError):
+                AttackPlanner.kdf_count_from_hash(bad)
+
+        phases = list(reversed(AttackPlanner.smart_phases(self.wordlist)))
+        plan = planner.plan(phases)
+        self.assertEqual([p.keyspace for p in plan.phases], [1000, 10000, 100000, 1000000, 10000000])
+        self.assertEqual(plan.phases[0].name, "Diccionario directo")
+        self.assertTrue(all(p.time_box is None for p in plan.phases))
+        self.assertAlmostEqual(plan.estimated_seconds, 11111000 / planner.speed)
+
+    def test_budget_water_filling(self):
+        planner = AttackPlanner(speed=1000, kdf_count=15, overhead_seconds=0)
+        # Estimaciones ~1, 10, 100, 1000 y 10000 s (speed ≈ 1000 H/s)
+        plan = planner.plan(AttackPlanner.smart_phases(self.wordlist), budget_seconds=600)
+        boxes = [p.time_box for p in plan.phases]
+        self.assertEqual(boxes[:3], [None, None, None])
+        # Las dos caras se reparten lo que queda, sin que la primera se lo lleve todo
+        remaining = 600 - sum(p.estimated_seconds for p in plan.phases[:3])
+        self.assertEqual(boxes[3:], [int(remaining / 2), int(remaining / 2)])
+        self.assertTrue(any("cortada" in line for line in plan.lines()))
+
+        # Sin velocidad: orden por keyspace y partes iguales del presupuesto
+        plan = AttackPlanner().plan(AttackPlanner.smart_phases(self.wordlist), budget_seconds=500)
+        self.assertEqual([p.time_box for p in plan.phases], [100] * 5)
+        self.assertIn("velocidad desconocida", plan.lines()[0])
+
+    def test_smart_attack_prints_plan_then_runs_phases(self):
+        log = os.path.join(self.tmp, "args.log")
+        fake = os.path.join(self.tmp, "hashcat")
+        with open(fake, "w") as f:
+            f.write(FAKE_HASHCAT.format(python=sys.executable, log=log))
+        os.chmod(fake, 0o755)
+        engine = HashcatEngine(fake, use_results=False, session_dir=os.path.join(self.tmp, "sessions"),
+                               capability_cache=CapabilityCache(os.path.join(self.tmp, "probe")))
+        engine.capabilities = HashcatCapabilities(fake, "x", "host", "v6.2.6", ("CUDA",), (),
+                                                  {3: {1: 2000, 2: 10}})
+        engine._apply_capabilities()
+        self.assertEqual(engine.measured_speed(), 2000)
+
+        messages = []
+        self.assertIsNone(engine.start_smart_attack(HASH, self.wordlist, callback=messages.append,
+                                                    budget_seconds=120))
+        self.assertTrue(messages[0].startswith("[PLAN] 5 fases"))
+        self.assertIn("[GPU] Fase 1: Diccionario directo...", messages)
+
+        with open(log) as f:
+            attacks = [json.loads(line) for line in f][1:]
+        self.assertEqual([a[-1] for a in attacks], [self.wordlist, "?d", "?d?d", "?d?d?d", "?d?d?d?d"])
+        self.assertNotIn("--runtime", attacks[0])
+        self.assertIn("--runtime", attacks[-1])
+        self.assertEqual(attacks[-1][attacks[-1].index("-d") + 1], "1")
+
+if __name__ == '__main__':
+    unittest.main()
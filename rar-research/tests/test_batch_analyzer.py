@@ -0,0 +1,100 @@
+import unittest
+import json
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from unittest import mock
+from core import batch_analyzer
+from core.batch_analyzer import BatchAnalyzer, BatchOptions
+from simulation.parser_benchmark import build_synthetic_archive
+
+_analyze_one = batch_analyzer.analyze_one
+
+def _crashing_analyze_one(path, options):
+    """analyze_one que mata su proceso (como un crash u OOM) con 'crash.rar'."""
+    if os.path.basename(path) == "crash.rar":
+        os._exit(1)
+    return _analyze_one(path, options)
+
+class TestBatchAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp, "sub"))
+        self.archives = []
+        for i in range(6):
+            folder = self.tmp if i % 2 else os.path.join(self.tmp, "sub")
+            path = os.path.join(folder, f"archive_{i}.rar")
+            build_synthetic_archive(path, entries=5 + i)
+            self.archives.append(path)
+        self.broken = os.path.join(self.tmp, "broken.rar")
+        with open(self.broken, 'wb') as f:
+            f.write(b"not a rar archive")
+        with open(os.path.join(self.tmp, "notes.txt"), 'w') as f:
+            f.write("ignored")
+        self.options = BatchOptions(use_cache=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_expand_directories_and_globs(self):
+        batch = BatchAnalyzer(workers=1)
+        paths = list(batch.expand_targets([self.tmp, os.path.join(self.tmp, "*.rar"), self.archives[0]]))
+        self.assertEqual(len(paths), 7)
+        self.assertNotIn(os.path.join(self.tmp, "notes.txt"), paths)
+        self.assertEqual(list(batch.expand_targets([os.path.join(self.tmp, "missing*.rar")])), [])
+
+    def test_pool_streams_every_file(self):
+        """Cada archivo produce una línea; el archivo roto no aborta el lote."""
+        batch = BatchAnalyzer(workers=2, max_in_flight=2, options=self.options)
+        results = {r["path"]: r for r in batch.run([self.tmp])}
+
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results[self.broken]["status"], "error")
+        self.assertIn("ValueError", results[self.broken]["error"])
+
+        ok = results[self.archives[3]]
+        self.assertEqual(ok["status"], "ok")
+        self.assertTrue(ok["is_encrypted"])
+        self.assertFalse(ok["header_encrypted"])
+        self.assertEqual(ok["kdf_count"], 15)
+        self.assertEqual(ok["crypto_profile"]["kdf_iterations"], (1 << 15) + 32)
+        self.assertIn("parse_seconds", ok["timings"])
+        json.dumps(ok)
+
+        summary = batch.summary
+        self.assertEqual((summary.files, summary.failed, summary.encrypted), (7, 1, 6))
+        self.assertGreater(summary.files_per_second, 0)
+
+    def test_in_process_matches_pool(self):
+        def run(workers):
+            batch = BatchAnalyzer(workers=workers, options=self.options)
+            results = {}
+            for r in batch.run([self.tmp]):
+                r.pop("timings")
+                results[r["path"]] = r
+            return results
+
+        self.assertEqual(run(1), run(3))
+
+    def test_dead_worker_only_fails_its_file(self):
+        """Un proceso que muere no arrastra a los demás archivos en vuelo."""
+        crash = os.path.join(self.tmp, "crash.rar")
+        build_synthetic_archive(crash, entries=3)
+        batch = BatchAnalyzer(workers=4, max_in_flight=8, options=self.options)
+        with mock.patch.object(batch_analyzer, "analyze_one", _crashing_analyze_one):
+            results = {r["path"]: r for r in batch.run([self.tmp])}
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[crash]["status"], "error")
+        self.assertIn("BrokenProcessPool", results[crash]["error"])
+        self.assertTrue(all(results[p]["status"] == "ok" for p in self.archives))
+        self.assertEqual(batch.summary.failed, 2)  # crash.rar y broken.rar
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import random
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.block_reader import BlockReader
+from core.rar_parser import RarParser
+from simulation.parser_benchmark import build_synthetic_archive, measure_parse
+
+class TestBlockReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "synthetic.rar")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_read_at_matches_file(self):
+        """Cualquier rango leído coincide con el contenido del archivo, dentro o fuera del buffer."""
+        data = bytes(random.Random(0).randrange(256) for _ in range(200000))
+        with open(self.rar_file, 'wb') as f:
+            f.write(data)
+
+        rng = random.Random(1)
+        with open(self.rar_file, 'rb') as f:
+            reader = BlockReader(f, readahead=4096)
+            for _ in range(500):
+                pos = rng.randrange(len(data))
+                size = rng.choice((1, 16, 300, 5000))
+                self.assertEqual(bytes(reader.read_at(pos, size)), data[pos:pos + size])
+            self.assertEqual(len(reader.window(len(data))), 0)
+            self.assertGreaterEqual(len(reader.window(len(data) - 10, 64)), 10)
+
+    def test_small_blocks_share_one_read(self):
+        """Headers con áreas de datos chicas se sirven desde pocas lecturas grandes."""
+        build_synthetic_archive(self.rar_file, entries=2000, data_size=64)
+        result = measure_parse(self.rar_file, use_mmap=False)
+
+        self.assertEqual(result["entries"], 2000)
+        self.assertLess(result["read_calls"], 20)
+        self.assertLess(result["bytes_copied"], 1.1 * os.path.getsize(self.rar_file))
+
+    def test_data_areas_are_skipped(self):
+        """Las áreas de datos grandes se saltan con seek: se leen headers, no datos."""
+        build_synthetic_archive(self.rar_file, entries=200, data_size=64 * 1024)
+        result = measure_parse(self.rar_file, use_mmap=False)
+
+        size = os.path.getsize(self.rar_file)
+        self.assertLess(result["bytes_copied"], size // 50)
+        self.assertGreater(result["bytes_skipped"], 200 * 60 * 1024)
+        self.assertLessEqual(result["bytes_copied"] + result["bytes_skipped"], size + 1024)
+
+    def test_readahead_does_not_change_results(self):
+        build_synthetic_archive(self.rar_file, entries=300, data_size=100)
+        results = []
+        for readahead in (BlockReader.MIN_READAHEAD, 4096, BlockReader.DEFAULT_READAHEAD):
+            parser = RarParser(self.rar_file, use_cache=False, readahead=readahead)
+            parser.parse()
+            self.assertEqual(parser.io_stats()["readahead"], readahead)
+            results.append(parser.entries)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertIsInstance(results[0][0].salt, bytes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -49,5 +49,14 @@ class TestCipherEngine(unittest.TestCase):
         else:
             print("WARNING: 'cryptography' library not found. Skipping functional AES tests.")
 
+    def test_encrypt_decrypt_fips197_vector(self):
+        """Vector AES-256 de FIPS-197 (C.3) en ambos sentidos, con o sin 'cryptography'."""
+        key = bytes(range(32))
+        plaintext = bytes.fromhex("00112233445566778899aabbccddeeff")
+        ciphertext = bytes.fromhex("8ea2b7ca516745bfeafc49904b496089")
+
+        self.assertEqual(self.adapter.encrypt_block(plaintext, key, b'\x00' * 16), ciphertext)
+        self.assertEqual(self.adapter.decrypt_block(ciphertext, key, b'\x00' * 16), plaintext)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import subprocess
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from simulation.parser_benchmark import build_synthetic_archive
+from simulation.rar5_writer import build_encrypted_archive
+
+MAIN = os.path.join(os.path.dirname(__file__), '../src/cli/main.py')
+
+class TestCli(unittest.TestCase):
+    """La salida de 'analyze' es JSON puro en stdout: se puede encadenar con otras herramientas."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.archives = []
+        for i in range(3):
+            path = os.path.join(self.tmp, f"archive_{i}.rar")
+            build_synthetic_archive(path, entries=3 + i)
+            self.archives.append(path)
+        self.env = dict(os.environ, RAR_RESEARCH_CACHE_DIR=os.path.join(self.tmp, "cache"),
+                        RAR_RESEARCH_RESULTS=os.path.join(self.tmp, "results.sqlite"),
+                        RAR_RESEARCH_PROFILES=os.path.join(self.tmp, "profiles.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run(self, *args, stdin=None):
+        result = subprocess.run([sys.executable, MAIN] + list(args), input=stdin, env=self.env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr.decode(errors="replace"))
+        return result.stdout.decode("utf-8")
+
+    def test_analyze_stdin_is_json(self):
+        encrypted = os.path.join(self.tmp, "enc.rar")
+        build_encrypted_archive(encrypted, entries=2, password="secreto", kdf_count=4)
+        with open(encrypted, 'rb') as f:
+            out = self._run("analyze", "-", stdin=f.read())
+        data = json.loads(out)
+        self.assertTrue(data["hashcat"].startswith("$rar5$"))
+
+    def test_analyze_directory_is_ndjson(self):
+        out = self._run("analyze", self.tmp, "--workers", "1")
+        lines = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(sorted(r["path"] for r in lines), sorted(self.archives))
+        self.assertTrue(all(r["status"] == "ok" for r in lines))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core import codec
+from core.metadata import Metadata
+from GPU.extractor import RarHashExtractor
+
+class TestCodec(unittest.TestCase):
+
+    def test_vint_roundtrip(self):
+        """Valores de 1, 2 y varios bytes sobreviven encode -> decode."""
+        for value in (0, 1, 0x7F, 0x80, 0x3FFF, 0x4000, 2**32 + 7, 2**63):
+            encoded = codec.encode_vint(value)
+            self.assertEqual(codec.read_vint(encoded), (value, len(encoded)))
+            self.assertEqual(codec.read_vint(memoryview(b'\xff' + encoded), 1), (value, len(encoded)))
+
+    def test_truncation_is_consistent(self):
+        """Todos los lectores reportan (0, 0) ante un VINT truncado."""
+        truncated = codec.encode_vint(300)[:1]
+        self.assertEqual(codec.read_vint(truncated), (0, 0))
+        self.assertEqual(codec.read_vint(b''), (0, 0))
+        self.assertEqual(Metadata.read_vint(truncated), (0, 0))
+        self.assertEqual(RarHashExtractor.read_vint(truncated, 0), (0, 0))
+
+    def test_vint_too_long(self):
+        with self.assertRaises(ValueError):
+            codec.read_vint(b'\x80' * 11)
+
+    def test_read_vints_bulk(self):
+        data = b''.join(codec.encode_vint(v) for v in (5, 300, 70000))
+        values, length = codec.read_vints(data, 0, 3)
+        self.assertEqual(values, (5, 300, 70000))
+        self.assertEqual(length, len(data))
+        self.assertEqual(codec.read_vints(data[:-1], 0, 3), (None, 0))
+
+    def test_parse_base_header(self):
+        """El header base incluye ExtraSize y DataSize cuando los flags lo indican."""
+        fields = codec.encode_vint(2) + codec.encode_vint(0x03) + codec.encode_vint(7) + codec.encode_vint(1000)
+        body = b'\x00' * 5 + b'\x01' * 7
+        size = codec.encode_vint(len(fields) + len(body))
+        block = b'\xaa\xbb\xcc\xdd' + size + fields + body
+
+        base = codec.parse_base_header(block)
+        self.assertEqual(base.crc, 0xDDCCBBAA)
+        self.assertEqual(base.type, 2)
+        self.assertEqual((base.extra_size, base.data_size), (7, 1000))
+        self.assertEqual(base.body_offset, 4 + len(size) + len(fields))
+        self.assertEqual(base.header_len, len(block))
+        self.assertEqual(block[base.extra_offset:], b'\x01' * 7)
+        self.assertIsNone(codec.parse_base_header(block[:6]))
+
+if __name__ == '__main__':
+    unittest.main()
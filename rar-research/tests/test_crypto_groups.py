@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.rar_parser import RarParser
+from GPU.extractor import RarHashExtractor
+from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
+from simulation.rar5_writer import Rar5Writer
+
+class TestCryptoGroups(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "updated.rar")
+        # Archivo "actualizado": tres entradas con una contraseña y dos con otra
+        with Rar5Writer(self.rar_file, password="primera", kdf_count=1) as writer:
+            for i in range(3):
+                writer.add_file(f"old_{i}.txt", size=32)
+            writer.add_directory("dir")
+            writer.set_password("segunda", kdf_count=2)
+            for i in range(2):
+                writer.add_file(f"new_{i}.txt", size=32)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_groups_by_key(self):
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        groups = model.crypto_groups()
+        self.assertEqual(len(model.crypto_records), 5)
+        self.assertEqual(len(groups), 2)
+        self.assertEqual([g.entries for g in groups], [(0, 1, 2), (4, 5)])
+        self.assertEqual([g.record_indices for g in groups], [(0, 1, 2), (3, 4)])
+        self.assertEqual([g.record.kdf_count for g in groups], [1, 2])
+        self.assertEqual(len(set(model.hashcat_hashes)), 2)
+
+        # Cada grupo verifica con su propia contraseña
+        kdf = PBKDF2Adapter()
+        for group, password in zip(groups, (b"primera", b"segunda")):
+            record = group.record
+            self.assertEqual(kdf.derive_psw_check(password, record.salt, record.kdf_count), record.psw_check)
+
+    def test_extractor_returns_every_key(self):
+        extractor = RarHashExtractor(self.rar_file, use_cache=False)
+        self.assertEqual(len(extractor.analyze().crypto_groups()), 1)
+
+        formats = extractor.get_hashcat_formats()
+        self.assertEqual(len(formats), 2)
+        self.assertEqual(formats[0][0], extractor.get_hashcat_format())
+        self.assertTrue(formats[1][0].startswith(f"$rar5$16${formats[1][1].record.salt.hex()}$2$"))
+
+    def test_context_keeps_primary_record(self):
+        """Las entradas con otra contraseña ya no pisan el salt del contexto."""
+        parser = RarParser(self.rar_file, use_cache=False)
+        parser.parse()
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        params = parser.get_crypto_context().params
+        self.assertEqual((params['salt'], params['kdf_count'], params['psw_check']), model.primary_record.key)
+
+    def test_per_entry_salt(self):
+        path = os.path.join(self.tmp, "salted.rar")
+        with Rar5Writer(path, password="x", kdf_count=1, per_entry_salt=True) as writer:
+            for i in range(4):
+                writer.add_file(f"f{i}", size=16)
+        groups = ArchiveAnalyzer(path, use_cache=False).analyze().crypto_groups()
+        self.assertEqual([g.entries for g in groups], [(0,), (1,), (2,), (3,)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core import entry_table
+from core.archive_analyzer import ArchiveAnalyzer
+from core.rar_parser import RarParser
+from core.metadata import HeaderType, FileFlags, HostOS
+from core.codec import encode_vint as vint
+from simulation.parser_benchmark import _block, build_synthetic_archive
+
+def _file_body(name, unpacked_size, file_flags=0, mtime=None, crc=None, method=0,
+               host_os=HostOS.UNIX, attributes=0o644):
+    body = vint(file_flags) + vint(unpacked_size) + vint(attributes)
+    if mtime is not None:
+        body += mtime.to_bytes(4, 'little')
+    if crc is not None:
+        body += crc.to_bytes(4, 'little')
+    return body + vint(method << 7) + vint(host_os) + vint(len(name)) + name
+
+def _encryption_extra():
+    record = vint(1) + vint(0) + vint(0) + bytes([15]) + bytes(16) + bytes(16)
+    return vint(len(record)) + record
+
+def _mixed_archive(path):
+    """Archivos con y sin cifrado, stored y comprimidos, un directorio y un service header."""
+    files = [
+        # (nombre, tamaño, método, cifrado)
+        (b"big_stored.bin", 5000, 0, True),
+        (b"small_stored.bin", 10, 0, True),
+        (b"plain.txt", 20, 0, False),
+        (b"packed.doc", 3, 3, True),
+        ("año/ñandú.txt".encode(), 7, 0, True),
+    ]
+    with open(path, 'wb') as f:
+        f.write(RarParser.RAR5_SIGNATURE)
+        f.write(_block(1, 0, body=vint(0)))
+        f.write(_block(2, 0, body=_file_body(b"dir", 0, file_flags=FileFlags.DIRECTORY)))
+        for name, size, method, encrypted in files:
+            flags = FileFlags.UTIME | FileFlags.CRC32
+            body = _file_body(name, size, file_flags=flags, mtime=1700000000,
+                              crc=0xDEADBEEF, method=method)
+            extra = _encryption_extra() if encrypted else b''
+            f.write(_block(2, 0x0003 if extra else 0x0002, body=body, extra=extra, data_size=size))
+            f.write(bytes(size))
+        f.write(_block(3, 0x0002, body=_file_body(b"CMT", 4), data_size=4))
+        f.write(bytes(4))
+        f.write(_block(5, 0, body=vint(0)))
+
+class TestEntryTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "mixed.rar")
+        _mixed_archive(self.rar_file)
+        self._numpy = entry_table._HAS_NUMPY
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+        entry_table._HAS_NUMPY = self._numpy
+
+    def _table(self):
+        return ArchiveAnalyzer(self.rar_file, use_cache=False).analyze().table
+
+    def test_file_header_fields(self):
+        """Se decodifican tamaño, atributos, mtime, CRC, método, host y nombre."""
+        table = self._table()
+        self.assertEqual(len(table), 7)
+
+        row = table.row(1)
+        self.assertEqual(row['name'], "big_stored.bin")
+        self.assertEqual(row['unpacked_size'], 5000)
+        self.assertEqual(row['attributes'], 0o644)
+        self.assertEqual(row['mtime'], 1700000000)
+        self.assertEqual(row['crc'], 0xDEADBEEF)
+        self.assertEqual(row['host_os'], HostOS.UNIX)
+        self.assertTrue(row['is_encrypted'])
+
+        self.assertIsNone(table.row(0)['mtime'])
+        self.assertEqual(table.name(5), "año/ñandú.txt")
+        self.assertEqual(table.method(4), 3)
+        self.assertEqual(table.header_type[6], HeaderType.SERVICE)
+
+    def test_parser_entries_use_header_fields(self):
+        """Las EncryptedEntry del parser ya no llevan nombres ni tamaños de relleno."""
+        parser = RarParser(self.rar_file, use_cache=False)
+        parser.parse()
+        names = [e.filename for e in parser.entries]
+        self.assertIn("small_stored.bin", names)
+        self.assertEqual(parser.entries[0].original_size, 5000)
+
+    def _encrypted_stored_smallest(self, table):
+        return table.sort_by('unpacked_size', table.filter(encrypted=True, method=0, directory=False))
+
+    def test_filter_encrypted_stored_smallest(self):
+        table = self._table()
+        order = self._encrypted_stored_smallest(table)
+        self.assertEqual([table.name(i) for i in order],
+                         ["año/ñandú.txt", "small_stored.bin", "big_stored.bin"])
+        self.assertEqual(table.filter(header_type=None, directory=True), [0])
+
+    def test_filter_without_numpy(self):
+        """El camino puro-Python da los mismos resultados que el vectorizado."""
+        table = self._table()
+        expected = self._encrypted_stored_smallest(table)
+        entry_table._HAS_NUMPY = False
+        self.assertEqual(self._encrypted_stored_smallest(table), expected)
+        self.assertEqual(table.filter(encrypted=False, directory=False), [3])
+
+    def test_memory_per_entry(self):
+        """La tabla cuesta un número fijo de bytes por entrada más el nombre."""
+        synthetic = os.path.join(self.tmp, "many.rar")
+        build_synthetic_archive(synthetic, entries=20000, data_size=0)
+        table = ArchiveAnalyzer(synthetic, use_cache=False).analyze().table
+
+        self.assertEqual(len(table), 20000)
+        fixed = table.memory_bytes() - len(table.name_blob)
+        self.assertLessEqual(fixed / len(table), 64)
+
+    def test_long_header_in_read_mode(self):
+        """Un nombre más largo que la ventana de lectura se decodifica completo."""
+        name = ("x" * 2000).encode()
+        with open(self.rar_file, 'wb') as f:
+            f.write(RarParser.RAR5_SIGNATURE)
+            f.write(_block(2, 0x0002, body=_file_body(name, 1), data_size=1))
+            f.write(b'\x00')
+            f.write(_block(5, 0, body=vint(0)))
+
+        table = self._table()
+        self.assertEqual(table.name(0), name.decode())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import tempfile
+import shutil
+import hashlib
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.codec import encode_vint as vint
+from core.metadata import Metadata, ExtraRecordType, HTimeFlags, OwnerFlags, RedirectionType
+from core.extra_records import (iter_records, EncryptionRecord, HashRecord, HighPrecisionTimeRecord,
+                                OwnerRecord, RedirectionRecord, ExtraRecord)
+from simulation.rar5_writer import Rar5Writer
+
+
+def _record(record_type: int, data: bytes) -> bytes:
+    body = vint(record_type) + data
+    return vint(len(body)) + body
+
+
+HASH = _record(ExtraRecordType.HASH, vint(0) + bytes(range(32)))
+# Unix con nanosegundos: mtime y atime
+HTIME = _record(ExtraRecordType.HTIME,
+                vint(HTimeFlags.UNIX_TIME | HTimeFlags.MTIME | HTimeFlags.ATIME | HTimeFlags.UNIX_NS)
+                + (1700000000).to_bytes(4, 'little') + (1700000100).to_bytes(4, 'little')
+                + (123456789).to_bytes(4, 'little') + (5).to_bytes(4, 'little'))
+# Windows FILETIME de 1970-01-02 00:00:00
+HTIME_WINDOWS = _record(ExtraRecordType.HTIME, vint(HTimeFlags.MTIME)
+                        + (116444736000000000 + 864000000000).to_bytes(8, 'little'))
+VERSION = _record(ExtraRecordType.VERSION, vint(0) + vint(3))
+REDIR = _record(ExtraRecordType.REDIRECTION, vint(RedirectionType.UNIX_SYMLINK) + vint(0) + vint(7) + b"../dest")
+OWNER = _record(ExtraRecordType.OWNER, vint(OwnerFlags.USER_NAME | OwnerFlags.GROUP_ID) + vint(5) + b"alice" + vint(100))
+UNKNOWN = _record(0x50, b"\x01\x02")
+
+
+class TestExtraRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "extra.rar")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_typed_records(self):
+        records = list(iter_records(HASH + HTIME + HTIME_WINDOWS + VERSION + REDIR + OWNER + UNKNOWN))
+        self.assertEqual([type(r) for r in records][:2], [HashRecord, HighPrecisionTimeRecord])
+
+        hash_record, htime, windows, version, redir, owner, unknown = records
+        self.assertEqual(bytes(hash_record.digest), bytes(range(32)))
+        self.assertEqual(htime.mtime_ns, 1700000000123456789)
+        self.assertEqual(htime.atime_ns, 1700000100000000005)
+        self.assertNotIn('ctime', htime.fields)
+        self.assertEqual(windows.mtime, 86400.0)
+        self.assertEqual(version.version, 3)
+        self.assertEqual((redir.redirection_type, redir.target), (RedirectionType.UNIX_SYMLINK, "../dest"))
+        self.assertEqual((owner.user, owner.gid), ("alice", 100))
+        self.assertNotIn('group', owner.fields)
+        self.assertIs(type(unknown), ExtraRecord)
+        self.assertEqual(unknown.to_dict(), {'type': 0x50, 'name': 'unknown', 'data': '0102'})
+
+    def test_views_decode_on_access(self):
+        record = next(iter_records(OWNER))
+        self.assertIsNone(record._fields)
+        self.assertEqual(record.user, "alice")
+        self.assertIsNotNone(record._fields)
+        with self.assertRaises(AttributeError):
+            record.group
+
+    def test_truncated_record_keeps_prefix(self):
+        """Un registro cortado no lanza: conserva los campos que cabían y marca 'truncated'."""
+        data = vint(OwnerFlags.USER_NAME) + vint(10) + b"bob"
+        record = next(iter_records(_record(ExtraRecordType.OWNER, data)))
+        self.assertTrue(record.truncated)
+        self.assertEqual(record.flags, OwnerFlags.USER_NAME)
+
+        # Size que excede el área: el recorrido termina sin registros
+        self.assertEqual(list(iter_records(vint(50) + vint(1))), [])
+
+    def test_crypto_fast_path_matches_view(self):
+        psw_check = b"12345678"
+        crypt = (vint(0) + vint(1) + bytes([15]) + b"s" * 16 + b"i" * 16
+                 + psw_check + hashlib.sha256(psw_check).digest()[:4])
+        area = HASH + OWNER + _record(ExtraRecordType.ENCRYPTION, crypt)
+
+        info = Metadata().parse_extra_area(area)
+        view = [r for r in Metadata().parse_extra_records(area) if isinstance(r, EncryptionRecord)][0]
+        self.assertEqual((info['salt'], info['iv'], info['psw_check']),
+                         (bytes(view.salt), bytes(view.iv), bytes(view.psw_check)))
+        self.assertEqual(view.kdf_count, 15)
+
+    def test_analyzer_full_picture(self):
+        with Rar5Writer(self.rar_file, password="x", kdf_count=1) as writer:
+            writer.add_file("a.bin", data=b"abc", extra_records=HASH + HTIME + OWNER)
+            writer.add_file("b.bin", data=b"def")
+
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False, extra_records=True).analyze()
+        names = [[r.NAME for r in model.table.extra_records(i)] for i in range(len(model.table))]
+        self.assertEqual(names, [["hash", "htime", "owner", "encryption"], ["encryption"]])
+        self.assertEqual(model.table.extra_records(0)[2].user, "alice")
+
+        # Sin extra_records solo se decodifica el registro de encriptación
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        self.assertEqual(model.table.extras, {})
+        self.assertEqual(model.table.extra_records(0), [])
+        self.assertIsNotNone(model.primary_record.psw_check)
+
+if __name__ == '__main__':
+    unittest.main()
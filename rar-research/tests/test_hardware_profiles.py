@@ -0,0 +1,84 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from kdf.hardware_profiles import HardwareProfile, HardwareProfileStore
+from kdf.cost_estimator import CostEstimator
+from simulation.cpu_benchmark import CPUBenchmark
+
+
+class TestHardwareProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = HardwareProfileStore(os.path.join(self.tmp, "sub", "profiles.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_store_roundtrip_and_replace(self):
+        self.assertEqual(len(self.store), 0)
+        self.store.save(HardwareProfile("cpu", 100.0, 32800, "cpu-hashlib", cores=8, measured_at=1.0))
+        self.store.save(HardwareProfile("hashcat", 5000.0, 32800, "hashcat/CUDA", cores=1))
+        # Volver a medir reemplaza el perfil del mismo nombre
+        self.store.save(HardwareProfile("cpu", 120.0, 32800, "cpu-hashlib", cores=8, measured_at=2.0))
+
+        again = HardwareProfileStore(self.store.path)
+        self.assertEqual([p.name for p in again], ["cpu", "hashcat"])
+        self.assertEqual(again.get("cpu").hashes_per_second, 120.0)
+        self.assertEqual(again.get("cpu").measured_at, 2.0)
+        self.assertTrue(again.remove("hashcat"))
+        self.assertFalse(again.remove("hashcat"))
+        self.assertEqual(len(again), 1)
+
+        # Un archivo dañado no rompe la estimación: no hay perfiles
+        with open(self.store.path, "w") as f:
+            f.write("{no es json")
+        self.assertEqual(self.store.load(), {})
+
+    def test_estimate_uses_measured_profiles(self):
+        # Medido con 2^14 + 32 iteraciones: se escala desde ahí, no desde el baseline
+        self.store.save(HardwareProfile("cpu", 200.0, 16416, "cpu-hashlib", cores=4, measured_at=10.0))
+        estimator = CostEstimator(profile_store=self.store)
+
+        estimates = estimator.estimate_time(32832, 1000)
+        self.assertEqual(list(estimates), ["cpu"])
+        self.assertEqual(estimates["cpu"]["speed_h_s"], 100.0)
+        self.assertEqual(estimates["cpu"]["seconds"], 10.0)
+        self.assertEqual(estimates["cpu"]["backend"], "cpu-hashlib")
+        self.assertTrue(estimates["cpu"]["measured"])
+
+        # La tabla genérica solo si se pide para comparar
+        with_reference = CostEstimator(profile_store=self.store, include_reference=True).estimate_time(32800, 1)
+        self.assertIn("high_gpu", with_reference)
+        self.assertFalse(with_reference["high_gpu"]["measured"])
+
+    def test_estimate_falls_back_to_reference(self):
+        estimates = CostEstimator(profile_store=self.store).estimate_time(CostEstimator.BASELINE_ITERATIONS * 2, 5000)
+        self.assertEqual(set(estimates), set(CostEstimator.REFERENCE_PROFILES))
+        self.assertEqual(estimates["modern_cpu"]["speed_h_s"], 2500)
+        self.assertEqual(estimates["modern_cpu"]["seconds"], 2.0)
+        self.assertFalse(estimates["modern_cpu"]["measured"])
+
+    def test_cpu_benchmark_profile(self):
+        bench = CPUBenchmark(duration_seconds=0.05)
+        result = bench.run_single_core()
+        profile = bench.to_profile(result)
+        self.assertEqual((profile.name, profile.backend, profile.cores), ("cpu_single", "cpu-hashlib", 1))
+        self.assertEqual(profile.iterations, bench.iterations)
+        self.assertGreater(profile.hashes_per_second, 0)
+        self.assertGreater(profile.measured_at, 0)
+
+        self.store.save(profile)
+        with open(self.store.path) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["profiles"][0]["name"], "cpu_single")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from GPU.engine import HashcatEngine
+from GPU.capabilities import HashcatProbe, CapabilityCache
+from kdf.hardware_profiles import HardwareProfileStore
+from kdf.cost_estimator import CostEstimator
+
+HASH = "$rar5$16$00112233445566778899aabbccddeeff$15$00000000000000000000000000000000$8$0102030405060708"
+
+BACKEND_INFO = """hashcat (v6.2.6) starting in backend information mode
+
+CUDA Info:
+==========
+
+CUDA.Version.: 12.2
+
+Backend Device ID #1 (Alias: #3)
+  Name...........: NVIDIA GeForce RTX 3080
+  Processor(s)...: 68
+  Clock..........: 1710
+
+OpenCL Info:
+============
+
+OpenCL Platform ID #1
+  Vendor..: Intel(R) Corporation
+  Name....: Intel(R) OpenCL
+  Version.: OpenCL 3.0 LINUX
+
+  Backend Device ID #2
+    Type...........: CPU
+    Vendor.ID......: 8
+    Name...........: Intel(R) Core(TM) i7-10700 CPU @ 2.90GHz
+
+OpenCL Platform ID #2
+  Vendor..: NVIDIA Corporation
+  Name....: NVIDIA CUDA
+
+  Backend Device ID #3 (Alias: #1)
+    Type...........: GPU
+    Name...........: NVIDIA GeForce RTX 3080
+"""
+
+# H/s por perfil (-w) y dispositivo: el perfil 3 es el más rápido y la CPU no aporta
+SPEEDS = {"1": {"1": 100000, "2": 1000}, "2": {"1": 150000, "2": 1000},
+          "3": {"1": 180000, "2": 1000}, "4": {"1": 170000, "2": 1000}}
+
+FAKE_HASHCAT = '''#!{python}
+import json, sys
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if "--version" in args:
+    print("v6.2.6"); sys.exit(0)
+if "-I" in args:
+    sys.stdout.write({info!r}); sys.exit(0)
+if "-b" in args:
+    for device, speed in {speeds!r}[args[args.index("-w") + 1]].items():
+        print(device + ":13000:1710:9501:431.52:" + str(speed))
+    sys.exit(0)
+sys.exit(1)
+'''
+
+
+class TestHashcatCapabilities(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp, "args.log")
+        self.fake = os.path.join(self.tmp, "hashcat")
+        with open(self.fake, "w") as f:
+            f.write(FAKE_HASHCAT.format(python=sys.executable, log=self.log, info=BACKEND_INFO, speeds=SPEEDS))
+        os.chmod(self.fake, 0o755)
+        self.cache = CapabilityCache(os.path.join(self.tmp, "probe"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _calls(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as f:
+            return [json.loads(line) for line in f]
+
+    def _engine(self, **kwargs):
+        return HashcatEngine(self.fake, use_results=False, session_dir=os.path.join(self.tmp, "sessions"),
+                             capability_cache=self.cache, **kwargs)
+
+    def test_parse_backend_info(self):
+        backends, devices = HashcatProbe.parse_backend_info(BACKEND_INFO)
+        self.assertEqual(backends, ("CUDA", "OpenCL"))
+        self.assertEqual([(d.device_id, d.backend, d.device_type, d.alias_of) for d in devices],
+                         [(1, "CUDA", "GPU", None), (2, "OpenCL", "CPU", None), (3, "OpenCL", "GPU", 1)])
+        self.assertEqual(devices[1].name, "Intel(R) Core(TM) i7-10700 CPU @ 2.90GHz")
+        self.assertEqual(HashcatProbe.parse_benchmark("1:13000:1710:9501:431.52:180000\nStarted: x\n"), {1: 180000})
+
+    def test_probe_is_cached_and_tunes_engine(self):
+        engine = self._engine(auto_probe=True)
+        caps = engine.capabilities
+        self.assertEqual(caps.version, "v6.2.6")
+        self.assertEqual([d.device_id for d in caps.active_devices], [1, 2])
+        self.assertEqual(caps.total_speed(3), 181000)
+        self.assertEqual((engine.workload, engine.devices), (3, [1]))
+        probe_calls = len(self._calls())
+        self.assertEqual(probe_calls, 6)  # --version, -I y un benchmark por perfil
+
+        # Otro motor con el mismo binario arranca sin lanzar hashcat
+        again = self._engine()
+        self.assertEqual(len(self._calls()), probe_calls)
+        self.assertEqual(again.capabilities, caps)
+        self.assertEqual((again.workload, again.devices), (3, [1]))
+
+        # Lo fijado por el llamador manda
+        fixed = self._engine(workload=2, devices=[1, 2])
+        self.assertEqual((fixed.workload, fixed.devices), (2, [1, 2]))
+
+        # El ataque usa el perfil y los dispositivos elegidos
+        again.start_bruteforce(HASH, "?d")
+        attack = self._calls()[-1]
+        self.assertEqual(attack[attack.index("-w") + 1], "3")
+        self.assertEqual(attack[attack.index("-d") + 1], "1")
+
+        self.assertEqual(again.run_benchmark(), {1: 180000, 2: 1000})
+        self.assertEqual(self._calls()[-1][-2:], ["-d", "1"])
+
+    def test_benchmark_updates_hardware_profile(self):
+        engine = self._engine(auto_probe=True)
+        store = HardwareProfileStore(os.path.join(self.tmp, "profiles.json"))
+        engine.run_benchmark(profile_store=store)
+        profile = store.get("hashcat")
+        # El falso hashcat ignora -d: reporta los dos dispositivos
+        self.assertEqual(profile.hashes_per_second, 181000)
+        self.assertEqual((profile.backend, profile.cores, profile.iterations), ("hashcat/CUDA+OpenCL", 2, 32800))
+        self.assertTrue(profile.device.startswith("NVIDIA GeForce RTX 3080"))
+
+        # Las estimaciones pasan a describir esta máquina
+        estimates = CostEstimator(profile_store=store).estimate_time(32800 * 2, 181000)
+        self.assertEqual(list(estimates), ["hashcat"])
+        self.assertEqual(estimates["hashcat"]["seconds"], 2.0)
+        self.assertTrue(estimates["hashcat"]["measured"])
+
+    def test_new_binary_is_probed_again(self):
+        self._engine(auto_probe=True)
+        with open(self.fake, "a") as f:
+            f.write("# actualizado\n")
+        before = len(self._calls())
+        engine = self._engine()
+        self.assertIsNone(engine.capabilities)
+        self.assertEqual(self._calls()[before:], [["--version"]])  # solo la comprobación de siempre
+        self.assertEqual((engine.workload, engine.devices), (HashcatEngine.DEFAULT_WORKLOAD, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from GPU.engine import HashcatEngine
+from GPU.job_queue import HashcatJobQueue, JobState
+
+HASH = "$rar5$16$00112233445566778899aabbccddeeff$15$00000000000000000000000000000000$8$0102030405060708"
+HASH_B = HASH.replace("0011", "ffee")
+
+# Hashcat simulado. El "objetivo" indica qué hacer:
+#   sleep:S  -> corre S segundos y termina agotado
+#   found    -> escribe la contraseña en el outfile
+#   forever  -> corre hasta SIGINT; entonces deja checkpoint (como Ctrl-C)
+FAKE_HASHCAT = '''#!{python}
+import json, signal, sys, time
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(json.dumps(args) + "\\n")
+def opt(name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+if "--version" in args:
+    print("v6.2.6"); sys.exit(0)
+restore_file = opt("--restore-file-path")
+if "--restore" in args:
+    args = json.load(open(restore_file))
+def status(code):
+    print(json.dumps({{"status": code, "session": opt("--session"), "progress": [0, 10],
+                      "recovered_hashes": [int(code == 6), 1], "devices": []}}), flush=True)
+def interrupted(*_):
+    with open(restore_file, "w") as f:
+        json.dump(args, f)
+    status(7); sys.exit(1)
+signal.signal(signal.SIGINT, interrupted)
+target = args[-1]
+status(3)
+if target == "found":
+    with open(opt("--outfile"), "w") as f:
+        f.write(open(args[-2]).read().strip() + ":" + b"clave".hex() + "\\n")
+    status(6); sys.exit(0)
+if target == "forever":
+    while True:
+        time.sleep(0.02)
+time.sleep(float(target.split(":")[1]))
+status(5); sys.exit(1)
+'''
+
+
+class TestHashcatJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp, "args.log")
+        self.sessions = os.path.join(self.tmp, "sessions")
+        fake = os.path.join(self.tmp, "hashcat")
+        with open(fake, "w") as f:
+            f.write(FAKE_HASHCAT.format(python=sys.executable, log=self.log))
+        os.chmod(fake, 0o755)
+        self.engine = HashcatEngine(fake, use_results=False, session_dir=self.sessions)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _calls(self):
+        with open(self.log) as f:
+            return [json.loads(line) for line in f][1:]  # sin --version
+
+    def _wait_running(self, job):
+        deadline = time.monotonic() + 5
+        while job.last_status is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNotNone(job.last_status)
+
+    def test_priority_order(self):
+        with HashcatJobQueue(self.engine) as queue:
+            first = queue.submit_bruteforce(HASH, "sleep:0.3")
+            self._wait_running(first)
+            low = queue.submit_bruteforce(HASH, "sleep:0.01")
+            high = queue.submit_bruteforce(HASH, "found", priority=5)
+            self.assertTrue(queue.wait_all(10))
+
+        self.assertEqual([c[-1] for c in self._calls()], ["sleep:0.3", "found", "sleep:0.01"])
+        self.assertEqual(high.result, "clave")
+        self.assertEqual((low.state, low.result), (JobState.DONE, None))
+        self.assertEqual(os.listdir(self.sessions), [])
+
+    def test_concurrent_devices(self):
+        with HashcatJobQueue(self.engine, devices=[[1], [2]]) as queue:
+            jobs = [queue.submit_bruteforce(HASH, "sleep:0.5"), queue.submit_bruteforce(HASH_B, "sleep:0.5")]
+            self.assertTrue(queue.wait_all(10))
+
+        self.assertEqual(sorted(job.devices for job in jobs), [[1], [2]])
+        self.assertNotEqual(jobs[0].last_session, jobs[1].last_session)
+        # Corrieron a la vez, cada uno con su hash y outfile
+        self.assertLess(max(job.started_at for job in jobs), min(job.finished_at for job in jobs))
+        calls = self._calls()
+        self.assertEqual(sorted(c[c.index("-d") + 1] for c in calls), ["1", "2"])
+        self.assertEqual(len({c[c.index("--outfile") + 1] for c in calls}), 2)
+
+    def test_cancel_and_resume(self):
+        with HashcatJobQueue(self.engine) as queue:
+            job = queue.submit_bruteforce(HASH, "forever")
+            queued = queue.submit_bruteforce(HASH, "sleep:0.01")
+            # El mismo trabajo no se duplica
+            self.assertIs(queue.submit_bruteforce(HASH, "forever"), job)
+            self._wait_running(job)
+
+            self.assertTrue(queued.cancel())
+            self.assertTrue(job.cancel())
+            self.assertTrue(job.wait(5))
+            self.assertEqual((job.state, queued.state), (JobState.CANCELLED, JobState.CANCELLED))
+            self.assertFalse(job.cancel())
+            self.assertTrue(self.engine.has_checkpoint(job.last_session))
+
+            # Volver a encolarlo reanuda desde el checkpoint
+            again = queue.submit_bruteforce(HASH, "forever")
+            self.assertIsNot(again, job)
+            self._wait_running(again)
+            again.cancel()
+            again.wait(5)
+
+        calls = self._calls()
+        self.assertEqual(len(calls), 2)  # el cancelado en cola nunca corrió
+        self.assertIn("--restore", calls[1])
+        self.assertEqual(queue.status()[0]["state"], JobState.CANCELLED)
+
+    def test_failed_job_frees_slot(self):
+        with HashcatJobQueue(self.engine) as queue:
+            # Un status_callback que falla: hashcat se interrumpe y el slot sigue con el próximo
+            bad = queue.submit_bruteforce(HASH, "forever", status_callback=self._raise)
+            good = queue.submit_bruteforce(HASH_B, "found")
+            self.assertTrue(queue.wait_all(10))
+        self.assertEqual(bad.state, JobState.FAILED)
+        self.assertIsInstance(bad.error, RuntimeError)
+        self.assertEqual(good.result, "clave")
+        # Del interrumpido solo queda su checkpoint
+        self.assertEqual(os.listdir(self.sessions), [bad.last_session])
+        self.assertTrue(self.engine.has_checkpoint(bad.last_session))
+
+    @staticmethod
+    def _raise(status):
+        raise RuntimeError(status.status_name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import tempfile
+import shutil
+import itertools
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from GPU.engine import HashcatEngine
+from GPU.candidate_pipe import CandidateFeeder
+from GPU.job_queue import HashcatJobQueue
+
+HASH = "$rar5$16$00112233445566778899aabbccddeeff$15$00000000000000000000000000000000$8$0102030405060708"
+SECRET = b"cla\nve\xff"
+
+# Hashcat simulado en modo stdin: lee candidatos línea a línea (decodificando $HEX[])
+# y termina en cuanto encuentra SECRET, sin leer el resto
+FAKE_HASHCAT = '''#!{python}
+import json, sys
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if "--version" in args:
+    print("v6.2.6"); sys.exit(0)
+def status(code, done):
+    print(json.dumps({{"status": code, "progress": [done, 0], "recovered_hashes": [int(code == 6), 1],
+                      "devices": []}}), flush=True)
+done = 0
+for line in sys.stdin.buffer:
+    word = line.rstrip(b"\\n")
+    if word.startswith(b"$HEX[") and word.endswith(b"]"):
+        word = bytes.fromhex(word[5:-1].decode())
+    done += 1
+    if word == {secret!r}:
+        with open(args[args.index("--outfile") + 1], "w") as f:
+            f.write(open(args[-1]).read().strip() + ":" + word.hex() + "\\n")
+        status(6, done); sys.exit(0)
+status(5, done); sys.exit(1)
+'''
+
+
+class TestHashcatPipe(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp, "args.log")
+        self.sessions = os.path.join(self.tmp, "sessions")
+        fake = os.path.join(self.tmp, "hashcat")
+        with open(fake, "w") as f:
+            f.write(FAKE_HASHCAT.format(python=sys.executable, log=self.log, secret=SECRET))
+        os.chmod(fake, 0o755)
+        self.engine = HashcatEngine(fake, use_results=False, session_dir=self.sessions)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _calls(self):
+        with open(self.log) as f:
+            return [json.loads(line) for line in f][1:]  # sin --version
+
+    def test_found_stops_generator(self):
+        generated = [0]
+
+        def candidates():
+            # Infinito: solo la contrapresión del pipe lo detiene
+            for i in itertools.count():
+                generated[0] += 1
+                yield SECRET if i == 5000 else f"palabra{i}"
+
+        feeder = CandidateFeeder(candidates(), batch_size=4096)
+        password = self.engine.start_pipe_attack(HASH, feeder)
+
+        self.assertEqual(password.encode("utf-8", errors="surrogateescape"), SECRET)
+        self.assertEqual(self.engine.last_status.progress_done, 5001)
+        self.assertGreaterEqual(feeder.written, 5001)
+        # Lo generado no pasa de lo escrito más un lote
+        self.assertLessEqual(generated[0], feeder.written + 4096)
+        self.assertLess(generated[0], 100000)
+        self.assertFalse(feeder.exhausted)
+
+        call = self._calls()[0]
+        self.assertEqual(call[call.index("-a") + 1], "0")
+        self.assertTrue(call[-1].endswith(".hash"))  # sin wordlist: hashcat lee stdin
+        self.assertIn("--restore-disable", call)
+        self.assertEqual(os.listdir(self.sessions), [])
+
+    def test_exhausted_counts_every_candidate(self):
+        words = [f"w{i}" for i in range(1234)] + ["$HEX[41]", b"\x00\x01", ""]
+        feeder = CandidateFeeder(iter(words), batch_size=100)
+        self.assertIsNone(self.engine.start_pipe_attack(HASH, feeder))
+        self.assertTrue(feeder.exhausted)
+        self.assertEqual(feeder.written, len(words))
+        self.assertEqual(self.engine.last_status.progress_done, len(words))
+
+    def test_generator_error_is_not_a_closed_pipe(self):
+        def words():
+            yield from (f"w{i}" for i in range(10))
+            raise ValueError("generador roto")
+
+        feeder = CandidateFeeder(words(), batch_size=16)
+        self.assertIsNone(self.engine.start_pipe_attack(HASH, feeder))
+        self.assertIsInstance(feeder.error, ValueError)
+        self.assertFalse(feeder.exhausted)
+        self.assertEqual(self.engine.last_status.progress_done, feeder.written)
+
+    def test_encode(self):
+        self.assertEqual(CandidateFeeder.encode("año"), "año".encode())
+        self.assertEqual(CandidateFeeder.encode("a\nb"), b"$HEX[610a62]")
+        self.assertEqual(CandidateFeeder.encode("$HEX[41]"), b"$HEX[244845585b34315d]")
+
+    def test_queue_pipe_jobs_are_not_deduplicated(self):
+        with HashcatJobQueue(self.engine) as queue:
+            first = queue.submit_pipe(HASH, ["uno", "dos"])
+            second = queue.submit_pipe(HASH, ["tres", SECRET])
+            self.assertIsNot(first, second)
+            self.assertTrue(queue.wait_all(10))
+        self.assertIsNone(first.result)
+        self.assertEqual(second.result.encode("utf-8", errors="surrogateescape"), SECRET)
+        self.assertEqual(queue.status()[1]["piped"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from GPU.engine import HashcatEngine
+from GPU.hashcat_status import HashcatStatusCode
+
+HASH = "$rar5$16$00112233445566778899aabbccddeeff$15$00000000000000000000000000000000$8$0102030405060708"
+
+# Hashcat simulado: keyspace de 1000 candidatos, la clave está en la posición 700 y
+# cada segundo de --runtime recorre 100. Deja checkpoint (cabecera de restore_data_t
+# + argumentos originales en JSON) al cortar por tiempo y lo borra al terminar.
+FAKE_HASHCAT = '''#!{python}
+import json, struct, sys
+HEADER = struct.Struct("<i256sII4xQ")
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(json.dumps(args) + "\\n")
+def opt(name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+if "--version" in args:
+    print("v6.2.6"); sys.exit(0)
+if "--keyspace" in args:
+    print(1000); sys.exit(0)
+restore_file = opt("--restore-file-path")
+if "--restore" in args:
+    data = open(restore_file, "rb").read()
+    pos = HEADER.unpack(data[:HEADER.size])[4]
+    args = json.loads(data[HEADER.size:])
+    restore_file = opt("--restore-file-path")
+else:
+    pos = int(opt("--skip", 0))
+end = min(1000, int(opt("--skip", 0)) + int(opt("--limit", 1000)))
+runtime = opt("--runtime")
+stop = min(end, pos + int(runtime) * 100) if runtime else end
+def status(code, done):
+    print(json.dumps({{"status": code, "session": opt("--session", "hashcat"), "progress": [done, 1000],
+                      "restore_point": done, "recovered_hashes": [int(code == 6), 1],
+                      "devices": [{{"device_id": 1, "speed": 50}}]}}), flush=True)
+if pos <= 700 < stop:
+    target = [a for a in args if a.endswith(".hash")][0]
+    with open(opt("--outfile"), "w") as f:
+        f.write(open(target).read().strip() + ":" + b"secreto".hex() + "\\n")
+    status(6, 701)
+elif stop < end:
+    if restore_file:
+        with open(restore_file, "wb") as f:
+            f.write(HEADER.pack(1, b"", 0, 0, stop) + json.dumps(args).encode())
+    status(11, stop); sys.exit(1)
+else:
+    status(5, stop); sys.exit(1)
+import os
+if restore_file and os.path.exists(restore_file):
+    os.remove(restore_file)
+sys.exit(0)
+'''
+
+
+class TestHashcatSessions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp, "args.log")
+        self.sessions = os.path.join(self.tmp, "sessions")
+        fake = os.path.join(self.tmp, "hashcat")
+        with open(fake, "w") as f:
+            f.write(FAKE_HASHCAT.format(python=sys.executable, log=self.log))
+        os.chmod(fake, 0o755)
+        self.engine = HashcatEngine(fake, use_results=False, session_dir=self.sessions)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _calls(self):
+        with open(self.log) as f:
+            return [json.loads(line) for line in f][1:]  # sin --version
+
+    def test_interrupted_job_resumes(self):
+        # Tres corridas de 3 s: 0-300, 300-600 (reanudada) y 600-900 (la encuentra en 700)
+        self.assertIsNone(self.engine.start_bruteforce(HASH, "?d?d?d", max_runtime=3))
+        session = self.engine.last_session
+        self.assertEqual(self.engine.last_status.status, HashcatStatusCode.ABORTED_RUNTIME)
+        self.assertTrue(self.engine.has_checkpoint(session))
+        self.assertEqual(self.engine.checkpoint_position(session), 300)
+
+        self.assertIsNone(self.engine.start_bruteforce(HASH, "?d?d?d", max_runtime=3))
+        self.assertEqual(self.engine.last_session, session)
+        self.assertEqual(self.engine.checkpoint_position(session), 600)
+
+        self.assertEqual(self.engine.start_bruteforce(HASH, "?d?d?d", max_runtime=3), "secreto")
+        calls = self._calls()
+        self.assertNotIn("--restore", calls[0])
+        self.assertIn("--session", calls[0])
+        self.assertEqual(calls[1], ["--session", session, "--restore", "--restore-file-path",
+                                    os.path.join(self.sessions, session, "target.restore")])
+        self.assertIn("--restore", calls[2])
+        # Terminada la sesión no quedan archivos
+        self.assertFalse(self.engine.has_checkpoint(session))
+        self.assertEqual(os.listdir(self.sessions), [])
+
+    def test_sessions_per_phase_and_slice(self):
+        names = {
+            self.engine.session_name(HASH, "3", ["?d?d?d"]),
+            self.engine.session_name(HASH, "3", ["?d?d?d?d"]),
+            self.engine.session_name(HASH, "0", ["words.txt"]),
+            self.engine.session_name(HASH, "3", ["?d?d?d"], skip=0, limit=100),
+            self.engine.session_name(HASH.upper().replace("$RAR5$", "$rar5$"), "3", ["?d?d?d"]),
+        }
+        self.assertEqual(len(names), 4)
+        self.assertTrue(all(name.startswith("rar5_") for name in names))
+
+    def test_keyspace_slices(self):
+        self.assertEqual(self.engine.keyspace("3", ["?d?d?d"]), 1000)
+        slices = self.engine.plan_slices(1000, seconds=3, speed=100)
+        self.assertEqual(slices, [(0, 300), (300, 300), (600, 300), (900, 100)])
+        self.assertEqual(self.engine.plan_slices(1000, seconds=3, speed=1000, amplifier=10), slices)
+
+        results = [self.engine.start_bruteforce(HASH, "?d?d?d", skip=skip, limit=limit)
+                   for skip, limit in slices]
+        self.assertEqual(results, [None, None, "secreto", None])
+        self.assertIn("--skip", self._calls()[1])
+        self.assertEqual(self.engine.last_status.status, HashcatStatusCode.EXHAUSTED)
+
+        with self.assertRaises(ValueError):
+            self.engine.start_bruteforce(HASH, "?d?d?d", skip=0, limit=10, extra_args=["--increment"])
+        with self.assertRaises(ValueError):
+            HashcatEngine(self.engine.hashcat_path, use_results=False).plan_slices(1000, seconds=3)
+
+    def test_without_sessions(self):
+        engine = HashcatEngine(self.engine.hashcat_path, use_results=False, session_dir=self.sessions,
+                               use_sessions=False)
+        self.assertIsNone(engine.start_bruteforce(HASH, "?d?d?d", max_runtime=3))
+        self.assertIn("--restore-disable", self._calls()[-1])
+        self.assertNotIn("--restore-file-path", self._calls()[-1])
+        self.assertEqual(os.listdir(self.sessions), [])
+
+if __name__ == '__main__':
+    unittest.main()
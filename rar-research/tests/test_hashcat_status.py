@@ -0,0 +1,107 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from GPU.engine import HashcatEngine
+from GPU.hashcat_status import HashcatStatus, HashcatStatusCode, ThrottledStatusCallback
+
+HASH = "$rar5$16$00112233445566778899aabbccddeeff$15$00000000000000000000000000000000$8$0102030405060708"
+PASSWORD = "clave:ñ"
+
+
+def _status(code, done, total=1000, recovered=0, speeds=(1000, 500)):
+    return {
+        "session": "hashcat", "status": code, "target": "target.hash",
+        "progress": [done, total], "restore_point": done, "recovered_hashes": [recovered, 1],
+        "recovered_salts": [recovered, 1], "rejected": 0,
+        "devices": [{"device_id": i + 1, "device_name": f"GPU {i}", "device_type": "GPU",
+                     "speed": speed, "temp": 60, "util": 99} for i, speed in enumerate(speeds)],
+        "time_start": 1700000000, "estimated_stop": 1700000100
+    }
+
+# Hashcat simulado: emite estados JSON, escribe el outfile y registra sus argumentos
+FAKE_HASHCAT = '''#!{python}
+import json, sys
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if "--version" in args:
+    print("v6.2.6"); sys.exit(0)
+out = args[args.index("--outfile") + 1]
+target = [a for a in args if a.endswith(".hash")][0]
+rar_hash = open(target).read().strip()
+print("hashcat (v6.2.6) starting")
+for line in {lines!r}:
+    print(line, flush=True)
+with open(out, "w") as f:
+    f.write(rar_hash + ":" + {password!r}.encode().hex() + "\\n")
+sys.exit(0)
+'''
+
+
+class TestHashcatStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def test_parse_status_line(self):
+        status = HashcatStatus.parse_line(json.dumps(_status(HashcatStatusCode.RUNNING, 250)))
+        self.assertEqual((status.progress_done, status.progress_total), (250, 1000))
+        self.assertEqual(status.speed, 1500)
+        self.assertEqual(status.progress_percent, 25.0)
+        self.assertEqual(status.devices[1].name, "GPU 1")
+        self.assertEqual(status.status_name, "Running")
+        self.assertFalse(status.is_final or status.is_cracked)
+
+        self.assertIsNone(HashcatStatus.parse_line("Session..........: hashcat"))
+        self.assertIsNone(HashcatStatus.parse_line("{no json"))
+
+    def test_throttle_keeps_final_states(self):
+        now = [0.0]
+        delivered = []
+        throttled = ThrottledStatusCallback(delivered.append, interval=5, clock=lambda: now[0])
+        for done in range(0, 10):
+            now[0] = done
+            throttled(HashcatStatus.from_json(_status(HashcatStatusCode.RUNNING, done)))
+        throttled(HashcatStatus.from_json(_status(HashcatStatusCode.CRACKED, 10, recovered=1)))
+        self.assertEqual([s.progress_done for s in delivered], [0, 5, 10])
+
+    def test_engine_reads_json_status_and_outfile(self):
+        log = os.path.join(self.tmp, "args.log")
+        lines = [json.dumps(_status(HashcatStatusCode.RUNNING, i * 100)) for i in range(5)]
+        lines.append(json.dumps(_status(HashcatStatusCode.CRACKED, 600, recovered=1)))
+        fake = os.path.join(self.tmp, "hashcat")
+        with open(fake, "w") as f:
+            f.write(FAKE_HASHCAT.format(python=sys.executable, log=log, lines=lines, password=PASSWORD))
+        os.chmod(fake, 0o755)
+
+        engine = HashcatEngine(fake, use_results=False, status_interval=60, session_dir=self.tmp)
+        texts, statuses = [], []
+        password = engine.start_bruteforce(HASH, mask="?d", callback=texts.append,
+                                           status_callback=statuses.append)
+
+        self.assertEqual(password, PASSWORD)
+        self.assertEqual(texts, ["hashcat (v6.2.6) starting"])
+        # Throttle: el primer estado y el final
+        self.assertEqual([s.status for s in statuses], [HashcatStatusCode.RUNNING, HashcatStatusCode.CRACKED])
+        self.assertTrue(engine.last_status.is_cracked)
+
+        with open(log) as f:
+            calls = [json.loads(line) for line in f]
+        self.assertEqual(len(calls), 2)  # --version y el ataque: sin --show
+        self.assertIn("--status-json", calls[1])
+
+if __name__ == '__main__':
+    unittest.main()
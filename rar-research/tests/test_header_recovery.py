@@ -0,0 +1,76 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.rar_parser import RarParser, MalformedBlockError
+from simulation.rar5_writer import Rar5Writer
+
+class TestHeaderRecovery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "damaged.rar")
+        with Rar5Writer(self.rar_file, password="x", kdf_count=1, per_entry_salt=True,
+                        encrypt_payload=False) as writer:
+            for i in range(10):
+                writer.add_file(f"file_{i}.bin", size=4096 if i != 3 else 256 * 1024)
+        self.offsets = [b.offset for b in RarParser(self.rar_file, use_cache=False).iter_blocks()
+                        if b.file is not None]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _damage(self, offset: int, data: bytes):
+        with open(self.rar_file, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+
+    def _names(self, model):
+        return [model.table.name(i) for i in range(len(model.table))]
+
+    def test_verify_detects_bad_crc(self):
+        """Un byte cambiado en el nombre pasa sin verificación y se detecta con verify_crc."""
+        self._damage(self.offsets[2] + 30, b"#")
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        self.assertEqual(len(model.table), 10)
+        self.assertEqual(model.errors, ())
+
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False, verify_crc=True).analyze()
+        self.assertEqual(len(model.table), 2)
+        self.assertEqual(model.errors[0].reason, MalformedBlockError.BAD_CRC)
+        self.assertEqual(model.errors[0].offset, self.offsets[2])
+
+    def test_recover_after_damaged_header(self):
+        """Tras el daño se sigue desde el próximo header con CRC válido: un solo error."""
+        self._damage(self.offsets[3] + 4, b"\xff\xff\xff\xff")
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap):
+                model = ArchiveAnalyzer(self.rar_file, use_cache=False, use_mmap=use_mmap,
+                                        recover=True).analyze()
+                self.assertEqual(self._names(model), [f"file_{i}.bin" for i in range(10) if i != 3])
+                self.assertEqual(len(model.crypto_records), 9)
+                self.assertEqual([e.offset for e in model.errors], [self.offsets[3]])
+
+    def test_recover_across_overwritten_region(self):
+        """Una región que pisa varios headers y datos se saltea entera."""
+        start = self.offsets[5] + 10
+        self._damage(start, os.urandom(self.offsets[8] - start + 3))
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False, recover=True).analyze()
+        self.assertEqual(self._names(model), [f"file_{i}.bin" for i in (0, 1, 2, 3, 4, 9)])
+        self.assertTrue(model.complete)
+
+    def test_recover_without_following_header(self):
+        size = os.path.getsize(self.rar_file)
+        self._damage(self.offsets[9], os.urandom(size - self.offsets[9]))
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False, recover=True).analyze()
+        self.assertEqual(len(model.table), 9)
+        self.assertEqual(len(model.errors), 1)
+
+if __name__ == '__main__':
+    unittest.main()
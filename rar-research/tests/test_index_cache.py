@@ -0,0 +1,130 @@
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.rar_parser import RarParser, MalformedBlockError
+from core.index_cache import IndexCache
+from GPU.extractor import RarHashExtractor
+from simulation.parser_benchmark import build_synthetic_archive
+from simulation.rar5_writer import build_encrypted_archive
+from core.archive_analyzer import ArchiveAnalyzer
+
+class TestIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = IndexCache(cache_dir=os.path.join(self.tmp, "cache"))
+        self.rar_file = os.path.join(self.tmp, "synthetic.rar")
+        build_synthetic_archive(self.rar_file, entries=30)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _parse(self, **kwargs):
+        parser = RarParser(self.rar_file, index_cache=self.cache, **kwargs)
+        parser.parse()
+        return parser
+
+    def test_warm_parse_skips_file(self):
+        """Un segundo parseo reproduce el índice sin abrir el archivo."""
+        cold = self._parse()
+
+        warm = RarParser(self.rar_file, index_cache=self.cache)
+        warm.open = lambda: self.fail("El parseo en caliente no debe abrir el archivo")
+        warm.parse()
+
+        self.assertEqual(warm.entries, cold.entries)
+        self.assertEqual(warm.crypto_context.params, cold.crypto_context.params)
+        self.assertEqual(warm.version, "RAR5")
+
+    def test_partial_walk_is_resumed(self):
+        """Un recorrido detenido temprano guarda el prefijo y el siguiente lo continúa."""
+        with RarParser(self.rar_file, index_cache=self.cache) as parser:
+            next(b for b in parser.iter_blocks() if b.has_crypto)
+
+        index = self.cache.load(self.rar_file)['parser']
+        self.assertFalse(index['complete'])
+        self.assertEqual(len(index['blocks']), 2)
+
+        resumed = self._parse()
+        reference = RarParser(self.rar_file, use_cache=False)
+        reference.parse()
+        self.assertEqual(resumed.entries, reference.entries)
+        self.assertTrue(self.cache.load(self.rar_file)['parser']['complete'])
+
+    def test_header_encrypted_walk_is_not_resumed(self):
+        """Un índice que termina en el header CRYPT queda completo: no se recorren bytes cifrados."""
+        encrypted = os.path.join(self.tmp, "hp.rar")
+        build_encrypted_archive(encrypted, entries=2, password="secreto", kdf_count=4,
+                                header_encryption=True)
+        first = ArchiveAnalyzer(encrypted, index_cache=self.cache).analyze(first_crypto_only=True)
+        self.assertTrue(first.header_encrypted)
+        self.assertTrue(self.cache.load(encrypted)['parser']['complete'])
+
+        full = ArchiveAnalyzer(encrypted, index_cache=self.cache).analyze()
+        self.assertEqual(list(full.errors), [])
+        self.assertTrue(full.header_encrypted)
+
+    def test_strict_parse_raises_from_cache(self):
+        """Un caché con bloques malformados no convierte un parseo estricto en tolerante."""
+        with open(self.rar_file, 'r+b') as f:
+            f.truncate(os.path.getsize(self.rar_file) - 40)  # Sin End of Archive
+        lenient = self._parse()
+        self.assertEqual(len(lenient.errors), 1)
+
+        warm = RarParser(self.rar_file, index_cache=self.cache, strict=True)
+        warm.open = lambda: self.fail("Debe lanzar desde el índice en caché")
+        with self.assertRaises(MalformedBlockError) as ctx:
+            warm.parse()
+        self.assertEqual(ctx.exception.offset, lenient.errors[0].offset)
+
+    def test_modified_archive_invalidates(self):
+        """Cambiar el archivo cambia la huella y la entrada anterior no se usa."""
+        self._parse()
+        build_synthetic_archive(self.rar_file, entries=5)
+        os.utime(self.rar_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+        self.assertIsNone(self.cache.load(self.rar_file))
+        self.assertEqual(len(self._parse().entries), 5)
+
+    def test_bypass_flag(self):
+        RarParser(self.rar_file, use_cache=False, index_cache=self.cache).parse()
+        self.assertFalse(os.path.exists(self.cache.cache_dir))
+
+    def test_extractor_shares_entry(self):
+        """El extractor reutiliza el índice del parser: no vuelve a leer el archivo."""
+        self._parse()
+        extractor = RarHashExtractor(self.rar_file, index_cache=self.cache)
+
+        original_open = RarParser.open
+        RarParser.open = lambda parser: self.fail("Debe responder desde el caché")
+        try:
+            rar_hash = extractor.get_hashcat_format()
+        finally:
+            RarParser.open = original_open
+
+        self.assertEqual(rar_hash, f"$rar5$16${'00' * 16}$15${'00' * 16}$8${'00' * 8}")
+
+    def test_eviction(self):
+        """Se eliminan entradas viejas y, si sobra tamaño, las menos usadas."""
+        other = os.path.join(self.tmp, "other.rar")
+        build_synthetic_archive(other, entries=3)
+        self._parse()
+        RarParser(other, index_cache=self.cache).parse()
+
+        old = os.path.join(self.cache.cache_dir, os.listdir(self.cache.cache_dir)[0])
+        os.utime(old, (0, 0))
+        self.assertEqual(self.cache.evict(), 1)
+
+        self.cache.max_total_bytes = 0
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(os.listdir(self.cache.cache_dir), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.rar_parser import RarParser, MalformedBlockError
+from core.codec import encode_vint as vint
+from crypto_engine.execution_limits import ExecutionLimits
+from simulation.parser_benchmark import _block
+from simulation.malformed_corpus import handcrafted_cases, mutated_cases, build_many_blocks_archive
+
+EXPECTED_REASONS = {
+    "only_signature": MalformedBlockError.MISSING_END,
+    "zero_header_size": MalformedBlockError.INVALID_HEADER_SIZE,
+    "header_smaller_than_fields": MalformedBlockError.INVALID_HEADER_SIZE,
+    "vint_overflow": MalformedBlockError.VINT_OVERFLOW,
+    "header_too_large": MalformedBlockError.HEADER_TOO_LARGE,
+    "header_past_eof": MalformedBlockError.TRUNCATED_HEADER,
+    "data_past_eof": MalformedBlockError.DATA_OUT_OF_BOUNDS,
+    "extra_larger_than_header": MalformedBlockError.INVALID_HEADER_SIZE,
+    "extra_record_zero_size": None,
+    "extra_record_overflows": None,
+    "missing_endarc": MalformedBlockError.MISSING_END,
+    "truncated_base_fields": MalformedBlockError.TRUNCATED_HEADER,
+}
+
+class TestMalformedBlocks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "case.rar")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write(self, data):
+        with open(self.rar_file, 'wb') as f:
+            f.write(data)
+
+    def _walk(self, use_mmap=False, **kwargs):
+        parser = RarParser(self.rar_file, use_mmap=use_mmap, use_cache=False, **kwargs)
+        blocks = list(parser.iter_blocks())
+        return parser, blocks
+
+    def test_handcrafted_cases(self):
+        """Cada forma de corrupción se reporta con su código y el offset del bloque."""
+        for name, data in handcrafted_cases():
+            with self.subTest(case=name):
+                self._write(data)
+                for use_mmap in (False, True):
+                    parser, blocks = self._walk(use_mmap)
+                    reasons = [e.reason for e in parser.errors]
+                    expected = EXPECTED_REASONS[name]
+                    self.assertEqual(reasons, [expected] if expected else [])
+
+                if EXPECTED_REASONS[name]:
+                    with self.assertRaises(MalformedBlockError) as ctx:
+                        self._walk(strict=True)
+                    self.assertGreaterEqual(ctx.exception.offset, len(RarParser.RAR5_SIGNATURE))
+
+    def test_mutated_corpus_terminates(self):
+        """Ninguna mutación cuelga el recorrido ni lanza otra cosa que MalformedBlockError."""
+        start = time.perf_counter()
+        for name, data in mutated_cases(count=150):
+            self._write(data)
+            for use_mmap in (False, True):
+                parser, blocks = self._walk(use_mmap)
+                offsets = [b.offset for b in blocks]
+                self.assertEqual(offsets, sorted(set(offsets)), name)
+                self.assertLessEqual(len(blocks), len(data) // 7, name)
+                try:
+                    self._walk(use_mmap, strict=True)
+                except MalformedBlockError:
+                    pass
+        self.assertLess(time.perf_counter() - start, 30)
+
+    def test_parse_time_is_linear(self):
+        """Cuadruplicar la cantidad de bloques no multiplica el tiempo más que linealmente."""
+        def best_time(blocks):
+            build_many_blocks_archive(self.rar_file, blocks)
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                parser, walked = self._walk()
+                timings.append(time.perf_counter() - start)
+            self.assertEqual(len(walked), blocks + 2)
+            self.assertEqual(parser.errors, [])
+            return min(timings)
+
+        small = best_time(5000)
+        large = best_time(20000)
+        self.assertLess(large / small, 4 * 2.5)
+
+    def test_timeout_enforced(self):
+        """El timeout de ExecutionLimits acota el recorrido."""
+        build_many_blocks_archive(self.rar_file, 5000)
+        limits = ExecutionLimits()
+        limits.timeout = 0
+        with self.assertRaises(TimeoutError):
+            self._walk(limits=limits)
+
+    def test_extra_area_starting_with_0x6b(self):
+        """Un Extra Area cuyo primer byte es 0x6B ya no se desplaza (heurística eliminada)."""
+        salt = bytes(range(16))
+        record = vint(1) + vint(0) + vint(0) + bytes([15]) + salt + bytes(16)
+        record += bytes(0x6B - len(record))      # Relleno: Size del registro = 0x6B
+        extra = vint(len(record)) + record
+        self.assertEqual(extra[0], 0x6B)
+        body = vint(0) + vint(1) + vint(0) + vint(0) + vint(0) + vint(1) + b'k'
+        self._write(RarParser.RAR5_SIGNATURE + _block(2, 0x0003, body=body, extra=extra, data_size=1)
+                    + b'\x00' + _block(5, 0, body=vint(0)))
+
+        parser, blocks = self._walk()
+        self.assertEqual(bytes(blocks[0].salt), salt)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
 
 from core.rar_parser import RarParser
+from core.codec import encode_vint as to_vint
 
 def create_mock_rar5(filename):
     """
@@ -16,15 +17,6 @@ def create_mock_rar5(filename):
     """
     signature = b'\x52\x61\x72\x21\x1A\x07\x01\x00'
     
-    # Helper para VINT
-    def to_vint(val):
-        out = []
-        while val >= 0x80:
-            out.append((val & 0x7f) | 0x80)
-            val >>= 7
-        out.append(val)
-        return bytes(out)
-
     # Construcción de Main Header (Type 1)
     # CRC(4) + Size(V) + Type(V) + Flags(V) + [Extra] + [Data]
     # Type = 1
@@ -0,0 +1,78 @@
+import unittest
+import copy
+import json
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.rar_parser import RarParser
+from simulation.parser_suite import (SCENARIOS, PARSERS, BenchmarkRegression, build_fixtures,
+                                     run_suite, compare, check_baseline, save_results)
+
+class TestParserSuite(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.result = run_suite(scale=0.01, repeats=1)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_fixtures(self):
+        paths = build_fixtures(self.tmp, scale=0.01)
+        self.assertEqual(set(paths), set(SCENARIOS))
+
+        parser = RarParser(paths["deep_extra"], use_cache=False)
+        parser.parse()
+        self.assertEqual(len(parser.entries), 20)
+        self.assertTrue(all(e.is_encrypted for e in parser.entries))
+
+        parser = RarParser(paths["truncated"], use_cache=False)
+        parser.parse()
+        self.assertEqual(len(parser.errors), 1)
+
+    def test_result_shape(self):
+        """Cada escenario reporta las métricas de cada parser y el resultado es JSON."""
+        json.dumps(self.result)
+        self.assertEqual(set(self.result["scenarios"]), set(SCENARIOS))
+        for scenario in self.result["scenarios"].values():
+            self.assertEqual(set(scenario["parsers"]), set(PARSERS))
+
+        many_tiny = self.result["scenarios"]["many_tiny"]["parsers"]["rar_parser"]
+        self.assertEqual(many_tiny["blocks"], 200 + 2)
+        self.assertGreater(many_tiny["blocks_per_sec"], 0)
+        self.assertGreater(many_tiny["mb_per_sec"], 0)
+        self.assertGreater(many_tiny["peak_memory_bytes"], 0)
+
+    def test_same_result_has_no_regressions(self):
+        self.assertEqual(compare(self.result, self.result), [])
+
+    def test_regression_fails_loudly(self):
+        baseline = copy.deepcopy(self.result)
+        metrics = baseline["scenarios"]["many_tiny"]["parsers"]["rar_parser"]
+        metrics["blocks_per_sec"] *= 10
+        metrics["peak_memory_bytes"] = 0
+        path = os.path.join(self.tmp, "baseline.json")
+        save_results(baseline, path)
+
+        with self.assertRaises(BenchmarkRegression) as ctx:
+            check_baseline(self.result, path)
+        self.assertEqual(len(ctx.exception.regressions), 2)
+        self.assertIn("many_tiny/rar_parser", str(ctx.exception))
+
+    def test_baseline_scale_must_match(self):
+        baseline = dict(self.result, scale=2.0)
+        path = os.path.join(self.tmp, "baseline.json")
+        save_results(baseline, path)
+        with self.assertRaises(ValueError):
+            check_baseline(self.result, path)
+
+if __name__ == '__main__':
+    unittest.main()
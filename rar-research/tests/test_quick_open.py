@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.rar_parser import RarParser
+from core.archive_analyzer import ArchiveAnalyzer
+from simulation.parser_benchmark import build_synthetic_archive, CountingFile
+
+class TestQuickOpen(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "quick.rar")
+        build_synthetic_archive(self.rar_file, entries=40, data_size=4096, quick_open=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _parse(self, use_mmap=False, **kwargs):
+        parser = RarParser(self.rar_file, use_mmap=use_mmap, use_cache=False, **kwargs)
+        parser.parse()
+        return parser
+
+    def _corrupt(self, marker, replacement):
+        with open(self.rar_file, 'rb') as f:
+            data = f.read()
+        pos = data.rindex(marker)
+        with open(self.rar_file, 'wb') as f:
+            f.write(data[:pos] + replacement + data[pos + len(replacement):])
+
+    def test_listing_matches_full_walk(self):
+        for use_mmap in (False, True):
+            quick = self._parse(use_mmap)
+            full = self._parse(use_mmap, use_quick_open=False)
+
+            self.assertTrue(quick.quick_open_used)
+            self.assertFalse(full.quick_open_used)
+            self.assertEqual(len(quick.entries), 40)
+            self.assertEqual(quick.entries, full.entries)
+            self.assertEqual(quick.crypto_context.params, full.crypto_context.params)
+
+    def test_reads_proportional_to_headers(self):
+        """Con quick open no se recorren las áreas de datos bloque por bloque."""
+        parser = RarParser(self.rar_file, use_cache=False)
+        parser.open()
+        counter = CountingFile(parser.file_obj)
+        parser.file_obj = counter
+        blocks = list(parser.iter_blocks())
+        parser.close()
+
+        headers = sum(b.header_size for b in blocks)
+        self.assertLess(counter.read_calls, 12)
+        self.assertLess(counter.bytes_read, 3 * headers + 4 * RarParser.HEADER_WINDOW)
+        self.assertLess(counter.bytes_read, os.path.getsize(self.rar_file) // 20)
+
+    def test_without_locator_walks_everything(self):
+        build_synthetic_archive(self.rar_file, entries=5)
+        parser = self._parse()
+        self.assertFalse(parser.quick_open_used)
+        self.assertEqual(len(parser.entries), 5)
+
+    def test_bad_record_crc_falls_back(self):
+        """Un registro QO alterado se descarta y se recorre el archivo completo."""
+        reference = self._parse(use_quick_open=False).entries
+        self._corrupt(b"file_0000039.bin", b"file_9999999.bin")
+
+        parser = self._parse()
+        self.assertFalse(parser.quick_open_used)
+        self.assertEqual(parser.entries, reference)
+
+    def test_wrong_service_name_falls_back(self):
+        self._corrupt(RarParser.QUICK_OPEN_NAME, b"CM")
+        parser = self._parse()
+        self.assertFalse(parser.quick_open_used)
+        self.assertEqual(len(parser.entries), 40)
+
+    def test_analyzer_uses_quick_open(self):
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        self.assertEqual(len(model.table.filter(encrypted=True)), 40)
+        self.assertIsNotNone(model.hashcat_hash)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import tempfile
+import shutil
+import zlib
+import sys
+import os
+
+import rarfile
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.metadata import Metadata, HeaderType
+from cipher.aes256_rar_adapter import AES256RARAdapter
+from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
+from simulation.rar5_writer import Rar5Writer, build_encrypted_archive
+
+class TestRar5Writer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "fixture.rar")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _read(self):
+        with open(self.rar_file, 'rb') as f:
+            return f.read()
+
+    def test_plain_archive_readable_by_rarfile(self):
+        """rarfile descarta headers con CRC inválido: si lista y extrae, los CRC son correctos."""
+        with Rar5Writer(self.rar_file) as writer:
+            writer.add_directory("docs", mtime=1700000000)
+            writer.add_file("docs/a.txt", data=b"hola mundo", mtime=1700000001)
+            writer.add_file("empty.bin", data=b"")
+
+        archive = rarfile.RarFile(self.rar_file)
+        self.assertEqual([i.filename for i in archive.infolist()], ["docs/", "docs/a.txt", "empty.bin"])
+        self.assertTrue(archive.getinfo("docs/").is_dir())
+        self.assertEqual(archive.read("docs/a.txt"), b"hola mundo")
+
+    def test_encrypted_entries(self):
+        """Datos AES-256-CBC con la clave PBKDF2 del salt, PswCheck real y CRC del contenido."""
+        contents = build_encrypted_archive(self.rar_file, entries=3, data_size=40,
+                                           password="secreto", kdf_count=4)
+        infos = rarfile.RarFile(self.rar_file).infolist()
+        self.assertEqual([i.CRC for i in infos], [zlib.crc32(c) for c in contents])
+        self.assertTrue(all(i.needs_password() for i in infos))
+
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        record = model.primary_record
+        self.assertEqual(record.kdf_count, 4)
+        self.assertEqual(record.psw_check, PBKDF2Adapter().derive_psw_check(b"secreto", record.salt, 4))
+        self.assertTrue(model.hashcat_hash.startswith(f"$rar5$16${record.salt.hex()}$4$"))
+
+        entry = model.table.entry(0, model.crypto_records)
+        key = PBKDF2Adapter().derive_key(b"secreto", {"salt": record.salt, "iterations": 1 << 4})
+        with open(self.rar_file, 'rb') as f:
+            f.seek(model.table.header_offset[0] + model.table.header_size[0])
+            ciphertext = f.read(48)
+        plain = AES256RARAdapter().decrypt_block(ciphertext, key, entry.iv)
+        self.assertEqual(plain, contents[0] + bytes(8))
+
+    def test_header_encryption(self):
+        build_encrypted_archive(self.rar_file, entries=2, password="secreto", kdf_count=4,
+                                header_encryption=True)
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        self.assertTrue(model.header_encrypted)
+        record = model.primary_record
+        self.assertEqual(record.psw_check, PBKDF2Adapter().derive_psw_check(b"secreto", record.salt, 4))
+
+        # El header siguiente al CRYPT (Main Header) se descifra con la clave del archivo
+        data = self._read()
+        start = data.index(record.iv) + 16
+        key = PBKDF2Adapter().derive_key(b"secreto", {"salt": record.salt, "iterations": 1 << 4})
+        plain = AES256RARAdapter().decrypt_block(data[start:start + 16], key, record.iv)
+        info, _ = Metadata().parse_header_base(plain)
+        self.assertEqual(info['type'], HeaderType.MAIN)
+        self.assertEqual(zlib.crc32(plain[4:4 + info['size_len'] + info['header_size']]), info['crc'])
+
+    def test_deterministic(self):
+        build_encrypted_archive(self.rar_file, entries=4, kdf_count=2, seed=7)
+        first = self._read()
+        build_encrypted_archive(self.rar_file, entries=4, kdf_count=2, seed=7)
+        self.assertEqual(self._read(), first)
+        build_encrypted_archive(self.rar_file, entries=4, kdf_count=2, seed=8)
+        self.assertNotEqual(self._read(), first)
+
+    def test_streamed_large_entry(self):
+        """Una entrada de varios tramos se escribe sin cargarla y declara tamaño y CRC correctos."""
+        size = 3 * Rar5Writer.CHUNK_SIZE + 5
+        with Rar5Writer(self.rar_file, password="x", kdf_count=1, encrypt_payload=False) as writer:
+            writer.add_file("big.bin", size=size, fill="zeros")
+
+        info = rarfile.RarFile(self.rar_file).infolist()[0]
+        self.assertEqual(info.file_size, size)
+        self.assertEqual(info.compress_size, size + 11)
+        self.assertEqual(info.CRC, zlib.crc32(bytes(size)))
+
+if __name__ == '__main__':
+    unittest.main()
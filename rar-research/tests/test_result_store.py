@@ -0,0 +1,114 @@
+import unittest
+import time
+import tempfile
+import shutil
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.result_store import ResultStore
+from GPU.cpu_engine import CPUEngine
+from GPU.engine import HashcatEngine
+from orchestrator.execution_manager import ExecutionManager
+from simulation.rar5_writer import build_encrypted_archive
+
+PASSWORD = "secreto"
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "solved.rar")
+        build_encrypted_archive(self.rar_file, entries=2, password=PASSWORD, kdf_count=2)
+        self.rar_hash = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze().hashcat_hash
+        self.store = ResultStore(os.path.join(self.tmp, "results.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp)
+
+    def _wordlist(self, *words):
+        path = os.path.join(self.tmp, "words.txt")
+        with open(path, 'w') as f:
+            f.write("\n".join(words) + "\n")
+        return path
+
+    def test_record_persists_across_instances(self):
+        self.store.record(self.rar_hash.upper().replace("$RAR5$", "$rar5$") + "\n", "x:y", "cpu",
+                          archive=self.rar_file, elapsed_seconds=1.5, candidates=10)
+        with ResultStore(self.store.path) as other:
+            result = other.lookup(self.rar_hash)
+        self.assertEqual((result.password, result.engine, result.candidates), ("x:y", "cpu", 10))
+        self.assertIsNone(self.store.lookup("$rar5$16$00$1$00$8$00"))
+        self.assertIsNone(self.store.lookup(None))
+
+    def test_potfile_roundtrip(self):
+        potfile = os.path.join(self.tmp, "hashcat.potfile")
+        with open(potfile, 'w', encoding='utf-8') as f:
+            f.write(f"{self.rar_hash}:pa:ss\n")
+            f.write("$rar5$16$aa$15$bb$8$cc:$HEX[c3b1ff00]\n")
+            f.write("5f4dcc3b5aa765d61d8327deb882cf99:password\n")
+        self.assertEqual(self.store.import_potfile(potfile), 2)
+        self.assertEqual(self.store.import_potfile(potfile), 0)
+        self.assertEqual(self.store.lookup(self.rar_hash).password, "pa:ss")
+
+        exported = os.path.join(self.tmp, "out.potfile")
+        self.assertEqual(self.store.export_potfile(exported), 2)
+        with open(exported, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertIn("$rar5$16$aa$15$bb$8$cc:$HEX[c3b1ff00]", lines)
+        self.assertIn(f"{self.rar_hash}:pa:ss", lines)
+
+    def test_cpu_engine_records_then_short_circuits(self):
+        model = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        engine = CPUEngine(result_store=self.store)
+        found = engine.start_dictionary_attack(self.rar_file, self._wordlist("a", PASSWORD), workers=2, model=model)
+        self.assertEqual(found, PASSWORD)
+        result = self.store.lookup(self.rar_hash)
+        self.assertEqual(result.engine, "cpu")
+        self.assertIsNotNone(result.elapsed_seconds)
+
+        # Segunda corrida: ni siquiera se lee el diccionario
+        engine = CPUEngine(result_store=self.store)
+        self.assertEqual(engine.start_dictionary_attack(self.rar_file, "/no/existe", model=model), PASSWORD)
+
+    def test_hashcat_engine_short_circuits(self):
+        self.store.record(self.rar_hash, PASSWORD, "potfile")
+        engine = HashcatEngine(os.path.join(self.tmp, "no-hashcat"), result_store=self.store)
+        messages = []
+        self.assertEqual(engine.start_bruteforce(self.rar_hash, callback=messages.append), PASSWORD)
+        self.assertIn("ya resuelto", messages[0])
+        self.assertIsNone(engine.process)
+
+    def test_execution_manager_uses_store(self):
+        manager = ExecutionManager(result_store=self.store)
+        derivations = []
+        derive_key = manager.kdf.derive_key
+
+        def slow_derive_key(secret, params):
+            derivations.append(params["iterations"])
+            time.sleep(0.05)
+            return derive_key(secret, params)
+
+        manager.kdf.derive_key = slow_derive_key
+        report = manager.attempt_open(self.rar_file, PASSWORD, use_cache=False)
+        self.assertTrue(report["psw_check_match"])
+        result = self.store.lookup(self.rar_hash)
+        self.assertEqual(result.engine, "execution_manager")
+        # Una resolución nueva cuesta un solo KDF y el tiempo registrado lo incluye
+        self.assertEqual(len(derivations), 1)
+        self.assertGreaterEqual(result.elapsed_seconds, 0.05)
+
+        # Con el resultado registrado no se deriva ninguna clave
+        manager.kdf = None
+        report = manager.attempt_open(self.rar_file, PASSWORD, use_cache=False)
+        self.assertEqual(report["status"], "SUCCESS_KNOWN")
+        report = manager.attempt_open(self.rar_file, "otra", use_cache=False)
+        self.assertEqual(report["status"], "FAIL_INVALID_KEY")
+        self.assertFalse(report["psw_check_match"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import tempfile
+import threading
+import shutil
+import io
+import sys
+import os
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.block_reader import StreamBlockReader, skip_stream
+from core.rar_parser import MalformedBlockError
+from core.stream_parser import StreamParser
+from GPU.extractor import RarHashExtractor
+from simulation.rar5_writer import Rar5Writer
+
+
+class _Pipe(io.RawIOBase):
+    """Flujo no posicionable que cuenta los bytes entregados."""
+
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self.consumed = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self._data) - self.consumed)
+        buffer[:count] = self._data[self.consumed:self.consumed + count]
+        self.consumed += count
+        return count
+
+
+class TestStreamParser(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rar_file = os.path.join(self.tmp, "stream.rar")
+        with Rar5Writer(self.rar_file, password="x", kdf_count=1, per_entry_salt=True,
+                        encrypt_payload=False) as writer:
+            for i in range(6):
+                writer.add_file(f"file_{i}.bin", size=3 * 1024 * 1024 if i % 2 else 100)
+        with open(self.rar_file, 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _names(self, model):
+        return [model.table.name(i) for i in range(len(model.table))]
+
+    def test_stream_matches_file(self):
+        expected = ArchiveAnalyzer(self.rar_file, use_cache=False).analyze()
+        raw = _Pipe(self.data)
+        model = ArchiveAnalyzer("<stdin>", stream=io.BufferedReader(raw), verify_crc=True).analyze()
+
+        self.assertEqual(self._names(model), self._names(expected))
+        self.assertEqual(model.crypto_records, expected.crypto_records)
+        self.assertEqual(model.errors, ())
+        self.assertTrue(model.complete)
+        self.assertEqual(raw.consumed, len(self.data))
+
+    def test_data_areas_are_discarded_not_buffered(self):
+        parser = StreamParser(io.BufferedReader(_Pipe(self.data)), readahead=4096, skip_chunk=64 * 1024)
+        blocks = list(parser.iter_blocks())
+        self.assertEqual(len([b for b in blocks if b.file is not None]), 6)
+
+        stats = parser.io_stats()
+        self.assertGreater(stats["bytes_skipped"], 8 * 1024 * 1024)
+        self.assertLess(stats["bytes_read"], 64 * 1024)
+        self.assertEqual(stats["seek_calls"], 0)
+
+    def test_first_crypto_stops_reading(self):
+        """El hash sale del primer header: el flujo queda casi sin consumir."""
+        raw = _Pipe(self.data)
+        stream = io.BufferedReader(raw)
+        extractor = RarHashExtractor("<stdin>", stream=stream)
+        rar_hash = extractor.get_hashcat_format()
+
+        self.assertEqual(rar_hash, RarHashExtractor(self.rar_file, use_cache=False).get_hashcat_format())
+        self.assertLess(raw.consumed, 1024 * 1024)
+        # El llamador puede drenar el resto para no cortar al productor
+        self.assertEqual(raw.consumed + skip_stream(stream), len(self.data))
+
+    def test_os_pipe(self):
+        read_fd, write_fd = os.pipe()
+
+        def produce():
+            with os.fdopen(write_fd, 'wb') as out:
+                out.write(self.data)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        with os.fdopen(read_fd, 'rb') as stream:
+            model = ArchiveAnalyzer("<pipe>", stream=stream).analyze()
+        producer.join()
+        self.assertEqual(len(model.table), 6)
+        self.assertEqual(model.errors, ())
+
+    def test_truncated_stream(self):
+        cut = [b for b in StreamParser(io.BytesIO(self.data)).iter_blocks()][-1].offset
+        model = ArchiveAnalyzer("<stdin>", stream=io.BufferedReader(_Pipe(self.data[:cut]))).analyze()
+        self.assertEqual(len(model.table), 6)
+        self.assertEqual(model.errors[0].reason, MalformedBlockError.MISSING_END)
+
+        # Cortado dentro de un área de datos
+        model = ArchiveAnalyzer("<stdin>", stream=io.BufferedReader(_Pipe(self.data[:cut - 10]))).analyze()
+        self.assertEqual(len(model.errors), 1)
+
+    def test_reader_is_forward_only(self):
+        reader = StreamBlockReader(io.BytesIO(bytes(range(200)) * 100), readahead=512)
+        self.assertEqual(bytes(reader.read_at(10, 4)), bytes(range(10, 14)))
+        self.assertEqual(bytes(reader.read_at(5000, 2)), bytes(range(200))[0:2])
+        with self.assertRaises(ValueError):
+            reader.window(10)
+        self.assertEqual(len(reader.window(30000)), 0)
+        self.assertEqual(reader.size, 20000)
+
+    def test_recover_needs_seekable_file(self):
+        with self.assertRaises(ValueError):
+            ArchiveAnalyzer("<stdin>", stream=io.BytesIO(self.data), recover=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import tempfile
+import shutil
+import zlib
+import sys
+import os
+
+import rarfile
+
+# Ajuste de path para importaciones
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from core.archive_analyzer import ArchiveAnalyzer
+from core.rar_parser import MalformedBlockError
+from core.volume_set import VolumeSet, VolumeSetParser
+from core.batch_analyzer import BatchAnalyzer
+from cipher.aes256_rar_adapter import AES256RARAdapter
+from extraction.payload_extractor import PayloadExtractor
+from kdf_engine.pbkdf2_adapter import PBKDF2Adapter
+from GPU.extractor import RarHashExtractor
+from simulation.rar5_writer import build_volume_set
+
+class TestVolumeSet(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.base = os.path.join(self.tmp, "set")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _touch(self, *names):
+        for name in names:
+            open(os.path.join(self.tmp, name), 'wb').close()
+
+    def test_naming_schemes(self):
+        self._touch("a.part01.rar", "a.part02.rar", "b.rar", "b.r00", "c.rar")
+        volumes = VolumeSet(os.path.join(self.tmp, "a.part02.rar"))
+        self.assertEqual(volumes.first, os.path.join(self.tmp, "a.part01.rar"))
+        self.assertEqual(volumes.path(9), os.path.join(self.tmp, "a.part10.rar"))
+        self.assertEqual(len(list(volumes)), 2)
+
+        old = VolumeSet(os.path.join(self.tmp, "b.r00"))
+        self.assertEqual(list(old), [os.path.join(self.tmp, "b.rar"), os.path.join(self.tmp, "b.r00")])
+
+        self.assertTrue(VolumeSet.is_multivolume(os.path.join(self.tmp, "b.rar")))
+        self.assertFalse(VolumeSet.is_multivolume(os.path.join(self.tmp, "c.rar")))
+        with self.assertRaises(FileNotFoundError):
+            VolumeSet(os.path.join(self.tmp, "z.part2.rar"))
+
+    def test_spanning_entries_are_merged(self):
+        """Cada entrada aparece una vez, con sus tramos en cada volumen; rarfile valida el conjunto."""
+        paths, contents = build_volume_set(self.base, volumes=3, password=None)
+        archive = rarfile.RarFile(paths[0])
+        self.assertEqual(archive.read("vol0_span.bin"), contents["vol0_span.bin"])
+
+        model = ArchiveAnalyzer(paths[1], use_cache=False).analyze()
+        self.assertEqual(model.volumes, tuple(paths))
+        self.assertEqual(model.errors, ())
+        self.assertEqual([model.table.name(i) for i in range(len(model.table))], list(contents))
+
+        extractor = PayloadExtractor(model.path)
+        for index in range(len(model.table)):
+            entry = model.table.entry(index, model.crypto_records, model.volumes)
+            self.assertEqual(b''.join(extractor.iter_payload(entry)), contents[entry.filename])
+            self.assertEqual(model.table.crc[index], zlib.crc32(contents[entry.filename]))
+
+        span = model.table.entry(2, volumes=model.volumes)
+        self.assertEqual([p[0] for p in span.parts], paths[:2])
+        self.assertEqual(span.size, 200)
+        self.assertEqual(model.table.volume[3], 1)
+
+    def test_encrypted_span_decrypts_across_volumes(self):
+        paths, contents = build_volume_set(self.base, volumes=2, files_per_volume=0,
+                                           span_size=100, password="secreto", kdf_count=2)
+        model = ArchiveAnalyzer(paths[0], use_cache=False).analyze()
+        self.assertEqual(len(model.crypto_records), 1)
+        entry = model.first_encrypted_entry()
+        self.assertEqual(len(entry.parts), 2)
+
+        key = PBKDF2Adapter().derive_key(b"secreto", {"salt": entry.salt, "iterations": 1 << 2})
+        ciphertext = b''.join(PayloadExtractor(model.path).iter_payload(entry, chunk_size=7))
+        plain = AES256RARAdapter().decrypt_block(ciphertext, key, entry.iv)
+        self.assertEqual(plain[:100], contents["vol0_span.bin"])
+
+        extractor = RarHashExtractor(paths[1], use_cache=False)
+        self.assertTrue(extractor.get_hashcat_format().startswith(f"$rar5$16${entry.salt.hex()}$2$"))
+
+    def test_batch_analyzes_each_set_once(self):
+        paths, _ = build_volume_set(self.base, volumes=3, password=None)
+        self._touch("single.rar")
+        targets = list(BatchAnalyzer(workers=1).expand_targets([self.tmp]))
+        self.assertEqual(targets, [os.path.join(self.tmp, "set.part1.rar"),
+                                   os.path.join(self.tmp, "single.rar")])
+
+    def test_missing_volume(self):
+        paths, _ = build_volume_set(self.base, volumes=3, password=None)
+        os.remove(paths[2])
+
+        model = ArchiveAnalyzer(paths[0], use_cache=False).analyze()
+        self.assertEqual(len(model.errors), 1)
+        self.assertEqual(model.errors[0].reason, MalformedBlockError.MISSING_VOLUME)
+        self.assertEqual(model.table.name(len(model.table) - 1), "vol1_span.bin")
+
+        with self.assertRaises(MalformedBlockError):
+            list(VolumeSetParser(paths[0], strict=True, use_cache=False).iter_blocks())
+
+    def test_many_volumes_without_leaking_handles(self):
+        """Un conjunto de 200 volúmenes se recorre con un handle a la vez."""
+        paths, contents = build_volume_set(self.base, volumes=200, files_per_volume=0,
+                                           span_size=32, password=None)
+        self.assertTrue(paths[0].endswith("set.part001.rar"))
+        fds = len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else None
+
+        parser = VolumeSetParser(paths[57], use_cache=False)
+        blocks = [b for b in parser.iter_blocks() if b.file is not None]
+        self.assertEqual(len(blocks), 199)
+        self.assertEqual(len(parser.volumes), 200)
+        self.assertTrue(all(len(b.parts) == 2 and b.data_size == 32 for b in blocks))
+        if fds is not None:
+            self.assertEqual(len(os.listdir('/proc/self/fd')), fds)
+
+if __name__ == '__main__':
+    unittest.main()